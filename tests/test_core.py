@@ -13,6 +13,7 @@ from xross.core import (
     interp_nk,
     parse_nk_file,
     parratt,
+    parratt_batch,
     reflectivity_matrix,
 )
 
@@ -127,6 +128,23 @@ class TestParratt:
         assert R_rough[0] <= R_smooth[0]
 
 
+class TestParrattBatch:
+    def test_matches_single(self):
+        """Each row of the batch must equal the scalar recursion."""
+        theta = np.linspace(0.2, 3.0, 200)
+        rng = np.random.default_rng(0)
+        n_pop = 5
+        n_arr = np.tile([1.0, 1.0 - 1e-5, 1.0 - 7.6e-6], (n_pop, 1))
+        k_arr = np.tile([0.0, 1e-7, 1.7e-7], (n_pop, 1))
+        d_arr = np.column_stack([np.zeros(n_pop), rng.uniform(5, 30, n_pop), np.zeros(n_pop)])
+        s_arr = np.column_stack([np.zeros(n_pop), rng.uniform(0, 0.5, n_pop), np.zeros(n_pop)])
+        R = parratt_batch(theta, n_arr, k_arr, d_arr, s_arr, 0.15418)
+        assert R.shape == (n_pop, theta.size)
+        for p in range(n_pop):
+            ref = parratt(theta, n_arr[p], k_arr[p], d_arr[p], s_arr[p], 0.15418)
+            np.testing.assert_allclose(R[p], ref, rtol=1e-10)
+
+
 # -----------------------------------------------------------------------
 #  nk file parsing
 # -----------------------------------------------------------------------
@@ -1,14 +1,24 @@
 """Tests for xross.fileio — layer model save/load, logging."""
 
+import json
 import os
 import tempfile
+import threading
+import zipfile
 
+import numpy as np
 import pandas as pd
 import pytest
 
 from xross.fileio import (
+    PROJECT_VERSION,
+    AsyncLogger,
+    LayerModel,
     load_layer_model,
     log_message,
+    open_project,
+    read_layer_model,
+    save_project,
     save_layer_model,
     save_results_csv,
 )
@@ -52,6 +62,102 @@ class TestSaveLoadLayerModel:
         assert len(loaded[0]["params"]) == len(loaded[1]["params"])
 
 
+class TestReadLayerModel:
+    def _rows(self):
+        return [
+            {"subroutine": "Cap", "loop_count": "", "params": ["Ru", "0.89", "0.017", "2.0", "12.4", "0.2"]},
+            {"subroutine": "MoSi", "loop_count": "40", "params": ["Mo", "0.92", "0.006", "2.8", "10.2", "0.3"]},
+            {"subroutine": "Orphan", "loop_count": "", "params": ["NA", "1.0", "0.0", "", "2.0", "0.1"]},
+            {"subroutine": "MoSi", "loop_count": "30", "params": ["Si", "1.0", "0.002", "4.1", "2.33", "0.3"]},
+            {"subroutine": "Orphan", "loop_count": "", "params": ["Si", "1.0", "0.002", "1e6", "2.33", "0.1"]},
+        ]
+
+    def test_blocks_follow_gui_grouping(self, tmp_path):
+        fp = str(tmp_path / "model.csv")
+        save_layer_model(fp, self._rows())
+        m = read_layer_model(fp)
+        # subroutine rows gathered at first appearance; each orphan its own block
+        assert list(m.names) == ["Ru", "Mo", "Si", "NA", "Si"]
+        assert m.block_names == ["Cap", "MoSi", "Orphan", "Orphan"]
+        assert m.blocks == [("single", 0, 1, 1), ("repeat", 1, 3, 30), ("single", 3, 4, 1), ("single", 4, 5, 1)]
+        np.testing.assert_array_equal(m.file_row, [0, 1, 3, 2, 4])
+        assert np.isnan(m.thickness[3]) and m.thickness[4] == 1e6
+        assert m.params[3, 0] == "NA"
+
+    def test_expand(self, tmp_path):
+        fp = str(tmp_path / "model.csv")
+        save_layer_model(fp, self._rows())
+        m = read_layer_model(fp)
+        n, k, d, s = m.expand()
+        assert n.size == 1 + 2 * 30 + 2
+        np.testing.assert_allclose(d[1:5], [2.8, 4.1, 2.8, 4.1])
+        assert m.as_stack()[0] == (0.89, 0.017, 2.0, 0.2)
+
+    def test_empty_and_short(self, tmp_path):
+        fp = str(tmp_path / "empty.csv")
+        save_layer_model(fp, [])
+        m = read_layer_model(fp)
+        assert m.n_layers == 0 and m.blocks == [] and m.expand()[0].size == 0
+        save_layer_model(fp, [{"subroutine": "A", "loop_count": "x", "params": ["L", "0.9"]}])
+        m = read_layer_model(fp)
+        assert m.blocks == [("single", 0, 1, 1)] and np.isnan(m.roughness[0])
+
+
+class TestProject:
+    def _model(self):
+        return LayerModel.from_rows([
+            {"subroutine": "MoSi", "loop_count": "40", "params": ["Mo", "0.92", "0.006", "2.8", "10.2", "0.3"]},
+            {"subroutine": "MoSi", "loop_count": "40", "params": ["Si", "1.0", "0.002", "4.1", "2.33", "0.3"]},
+            {"subroutine": "Orphan", "loop_count": "", "params": ["Sub", "1.0", "0.0", "1e6", "2.33", ""]},
+        ])
+
+    def test_round_trip(self, tmp_path):
+        fp = str(tmp_path / "p.xrp")
+        m = self._model()
+        lam = np.linspace(10.0, 20.0, 50)
+        save_project(
+            fp, m, layer_nk=["mo.nk", "", ""],
+            nk={"mo.nk": {"lam_nm": lam, "n": 1 - lam * 1e-3, "k": lam * 1e-4}},
+            measurements={"scan": {"theta": np.linspace(0, 3, 100), "intensity": np.ones(100)}},
+            fit_history=[{"method": "PSO", "chi2": 0.012, "x": [2.8, 4.1]}],
+            meta={"sample": "A1"},
+        )
+        with open_project(fp) as pr:
+            assert pr.version == PROJECT_VERSION and pr.meta == {"sample": "A1"}
+            assert pr.nk_names == ["mo.nk"] and pr.measurement_names == ["scan"]
+            assert pr.fit_history[0]["chi2"] == 0.012
+            m2 = pr.layer_model()
+            assert m2.blocks == m.blocks and m2.block_names == m.block_names
+            assert list(m2.names) == ["Mo", "Si", "Sub"] and m2.params[2, 5] == ""
+            for f in ("n", "k", "thickness", "density", "roughness"):
+                np.testing.assert_array_equal(getattr(m2, f), getattr(m, f))
+            np.testing.assert_array_equal(pr.nk(pr.layer_nk[0])["lam_nm"], lam)
+            assert pr.measurement("scan")["theta"].shape == (100,)
+            with pytest.raises(KeyError):
+                pr.nk("missing")
+
+    def test_lazy_members(self, tmp_path):
+        fp = str(tmp_path / "p.xrp")
+        save_project(fp, self._model(), measurements={"big": {"y": np.arange(10.0)}})
+        with open_project(fp) as pr:
+            assert pr._model is None and pr._cache == {}
+            y = pr.measurement("big")["y"]
+            assert pr.measurement("big")["y"] is y  # cached after first read
+
+    def test_validation(self, tmp_path):
+        fp = str(tmp_path / "p.xrp")
+        with pytest.raises(ValueError):
+            save_project(fp, self._model(), layer_nk=["nope", "", ""])
+        assert not os.path.exists(fp)
+        save_layer_model(fp, [])  # a CSV is not a bundle
+        with pytest.raises(ValueError):
+            open_project(fp)
+        with zipfile.ZipFile(fp, "w") as zf:
+            zf.writestr("manifest.json", json.dumps({"format": "xross-project", "version": PROJECT_VERSION + 1}))
+        with pytest.raises(ValueError, match="version"):
+            open_project(fp)
+
+
 class TestSaveResultsCsv:
     def test_dataframe_saved(self, tmp_path):
         fp = str(tmp_path / "results.csv")
@@ -81,3 +187,56 @@ class TestLogMessage:
         content = (tmp_path / "log.txt").read_text()
         assert "first" in content
         assert "second" in content
+
+
+class TestAsyncLogger:
+    def test_threads_flush_and_jsonl(self, tmp_path):
+        lg = AsyncLogger(str(tmp_path), flush_interval=0.01)
+
+        def work(k):
+            for i in range(200):
+                lg.log(f"w{k} {i}", chi2=i / 10)
+
+        threads = [threading.Thread(target=work, args=(k,)) for k in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert lg.flush(timeout=5)
+        lines = (tmp_path / "log.txt").read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 800 and "/" in lines[0]
+        recs = [json.loads(x) for x in (tmp_path / "log.jsonl").read_text(encoding="utf-8").splitlines()]
+        assert {r["msg"] for r in recs} == {f"w{k} {i}" for k in range(4) for i in range(200)}
+        assert recs[0]["level"] == "INFO" and "chi2" in recs[0]
+        assert len(lg.drain()) == 800 and lg.drain() == []
+        lg.close()
+        lg.close()  # idempotent
+
+    def test_rotation(self, tmp_path):
+        lg = AsyncLogger(str(tmp_path), jsonl=None, max_bytes=2000, backup_count=2)
+        for i in range(300):
+            lg.log(f"message number {i:04d}")
+            if i % 50 == 49:
+                lg.flush()
+        lg.close()
+        names = sorted(os.listdir(tmp_path))
+        assert "log.txt.1" in names and "log.txt.2" in names and "log.txt.3" not in names
+        # a file overshoots max_bytes by at most one batch (50 lines here)
+        assert all(os.path.getsize(tmp_path / n) <= 2000 + 50 * 41 for n in names)
+
+    def test_drain_only(self):
+        lg = AsyncLogger(None)
+        line = lg.log("hello")
+        assert line.endswith("hello\n") and lg.drain() == [line]
+        lg.close()
+
+    def test_close_releases_atexit_hook(self):
+        import gc
+        import weakref
+
+        lg = AsyncLogger(None)
+        ref = weakref.ref(lg)
+        lg.close()
+        del lg
+        gc.collect()
+        assert ref() is None
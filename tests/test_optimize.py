@@ -1,14 +1,34 @@
-"""Tests for xross.optimize — NSGA-II, non-dominated sorting, crowding distance."""
+"""Tests for xross.optimize — NSGA-II, non-dominated sorting, crowding distance, PSO."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 import numpy as np
 import pytest
 
 from xross.optimize import (
+    EvaluationArchive,
+    NSGA2State,
     OptimizationProblem,
     crowding_distance,
     fast_nondominated_sort,
+    hypervolume,
     nsga2,
+    nsga2_steady_state,
+    nsga2_steps,
+    optuna_batch_search,
+    pso,
+    pso_islands,
+    rank_and_crowding,
+    reference_directions,
 )
+from xross.optimize import _evaluate_pop, _sbx_pm
+from xross.surrogate import IDWSurrogate
+
+
+def _rastrigin(X):
+    return 10 * X.shape[1] + np.sum(X ** 2 - 10 * np.cos(2 * np.pi * X), axis=1)
 
 
 class TestNonDominatedSort:
@@ -31,6 +51,23 @@ class TestNonDominatedSort:
         assert fronts[0] == [0]
         assert fronts[1] == [1]
 
+    @pytest.mark.parametrize("n_obj", [1, 2, 3, 4])
+    def test_matches_pairwise_reference(self, n_obj):
+        """Vectorised / sweep paths agree with a brute-force peel (ties included)."""
+        rng = np.random.default_rng(n_obj)
+        obj = rng.integers(0, 4, (60, n_obj)).astype(float)
+        ref, remaining = [], set(range(len(obj)))
+        while remaining:
+            front = sorted(
+                i for i in remaining
+                if not any(np.all(obj[j] <= obj[i]) and np.any(obj[j] < obj[i]) for j in remaining)
+            )
+            ref.append(front)
+            remaining -= set(front)
+        assert fast_nondominated_sort(obj) == ref
+        if n_obj > 2:
+            assert fast_nondominated_sort(obj, block_size=7) == ref
+
 
 class TestCrowdingDistance:
     def test_two_points_infinite(self):
@@ -44,6 +81,35 @@ class TestCrowdingDistance:
         assert np.isinf(cd[0]) and np.isinf(cd[2])
         assert np.isfinite(cd[1]) and cd[1] > 0
 
+    def test_all_fronts_match_per_front(self):
+        rng = np.random.default_rng(3)
+        obj = rng.random((80, 3))
+        fronts = fast_nondominated_sort(obj)
+        rank, crowd = rank_and_crowding(obj, fronts)
+        for fi, front in enumerate(fronts):
+            assert np.all(rank[front] == fi)
+            np.testing.assert_allclose(crowd[front], crowding_distance(obj, front))
+
+
+class TestVariation:
+    def test_bounds_fixed_genes_and_seed(self):
+        lo = np.array([0.0, -1.0, 2.0])
+        hi = np.array([1.0, 1.0, 2.0])  # last gene fixed
+        parents = np.random.default_rng(0).uniform(lo, hi, (41, 3))
+        c1 = _sbx_pm(parents, lo, hi, np.random.default_rng(5))
+        c2 = _sbx_pm(parents, lo, hi, np.random.default_rng(5))
+        np.testing.assert_array_equal(c1, c2)
+        assert c1.shape == parents.shape
+        assert np.all((c1 >= lo) & (c1 <= hi))
+        assert np.all(c1[:, 2] == 2.0)
+        assert not np.array_equal(c1, parents)
+
+    def test_mutation_rate(self):
+        lo, hi = np.zeros(50), np.ones(50)
+        parents = np.full((400, 50), 0.5)
+        c = _sbx_pm(parents, lo, hi, np.random.default_rng(1), p_cross=0.0, p_mut=0.2)
+        assert np.mean(c != 0.5) == pytest.approx(0.2, abs=0.01)
+
 
 class TestNSGA2:
     def test_single_objective_minimise(self):
@@ -96,3 +162,361 @@ class TestNSGA2:
         px, po = nsga2(prob, n_pop=30, n_gen=50, seed=0)
         best_x = px[np.argmax(po[:, 0]), 0]
         assert abs(best_x) < 1.0
+
+
+def _zdt1_problem(n_var=3):
+    def evaluate(pop):
+        f1 = pop[:, 0]
+        g = 1.0 + 9.0 * np.mean(pop[:, 1:], axis=1)
+        return np.column_stack([f1, g * (1.0 - np.sqrt(f1 / g))])
+
+    return OptimizationProblem(
+        n_var=n_var, n_obj=2,
+        lower_bounds=np.zeros(n_var), upper_bounds=np.ones(n_var),
+        directions=np.array([1.0, 1.0]), evaluate=evaluate,
+    )
+
+
+class TestParallelEvaluation:
+    def test_executor_matches_serial(self):
+        prob = _zdt1_problem()
+        px, po = nsga2(prob, n_pop=20, n_gen=10, seed=3)
+        with ThreadPoolExecutor(3) as ex:
+            px2, po2 = nsga2(prob, n_pop=20, n_gen=10, seed=3, executor=ex, chunk_size=7)
+        np.testing.assert_array_equal(px, px2)
+        np.testing.assert_array_equal(po, po2)
+
+    def test_one_dimensional_output(self):
+        pop = np.random.default_rng(0).random((10, 3))
+        with ThreadPoolExecutor(3) as ex:
+            obj = _evaluate_pop(lambda X: X.sum(axis=1), pop, ex, chunk_size=4)
+        assert obj.shape == (10, 1)
+        np.testing.assert_allclose(obj[:, 0], pop.sum(axis=1))
+
+    def test_steady_state(self):
+        prob = _zdt1_problem()
+        n_rows = []
+        inner = prob.evaluate
+
+        def evaluate(pop):
+            n_rows.append(pop.shape[0])
+            return inner(pop)
+
+        prob.evaluate = evaluate
+        seen = []
+        with ThreadPoolExecutor(4) as ex:
+            px, po = nsga2_steady_state(
+                prob, ex, n_pop=30, n_evals=1001, chunk_size=4, n_inflight=4, seed=0,
+                callback=lambda n, x, o: seen.append(n),
+            )
+        assert sum(n_rows) == 30 + 1001
+        assert seen[-1] == 1001
+        assert np.all((px >= 0) & (px <= 1))
+        # converged towards the ZDT1 front g = 1
+        assert np.mean(po[:, 1] - (1 - np.sqrt(po[:, 0]))) < 0.5
+
+
+class TestEvaluationArchive:
+    def test_dedup_and_lookup(self):
+        calls = []
+
+        def fn(X):
+            calls.append(X.shape[0])
+            return X.sum(axis=1, keepdims=True)
+
+        arch = EvaluationArchive(np.array([1.0]))
+        X = np.array([[0.0, 1.0], [2.0, 3.0], [0.0, 1.0]])
+        np.testing.assert_array_equal(arch.evaluate(fn, X)[:, 0], [1.0, 5.0, 1.0])
+        arch.evaluate(fn, X[:2])
+        assert calls == [2]
+        assert len(arch) == 2 and arch.n_hits == 3
+        _, found = arch.lookup(np.array([[2.0, 3.0], [9.0, 9.0]]))
+        assert found.tolist() == [True, False]
+
+    def test_quantised_key(self):
+        arch = EvaluationArchive(np.array([1.0]), resolution=0.1)
+        arch.add(np.array([[0.501]]), np.array([[1.0]]))
+        _, found = arch.lookup(np.array([[0.499], [0.56]]))
+        assert found.tolist() == [True, False]
+
+    def test_nsga2_archive_keeps_full_front(self):
+        prob = _zdt1_problem()
+        n_rows = []
+        inner = prob.evaluate
+        prob.evaluate = lambda pop: (n_rows.append(pop.shape[0]), inner(pop))[1]
+        arch = EvaluationArchive(prob.directions, resolution=1e-3)
+        px, po = nsga2(prob, n_pop=20, n_gen=30, seed=1, archive=arch)
+        assert sum(n_rows) == len(arch) < 20 * 31
+        ax, ao = arch.pareto()
+        assert len(ax) >= len(px)
+        # nothing in the final population dominates an archived Pareto point
+        dom = np.all(po[:, None] <= ao[None], axis=2) & np.any(po[:, None] < ao[None], axis=2)
+        assert not dom.any()
+
+
+class TestCheckpoint:
+    def test_resume_bit_for_bit(self, tmp_path):
+        prob = _zdt1_problem()
+        px, po = nsga2(prob, n_pop=16, n_gen=12, seed=9)
+
+        ckpt = str(tmp_path / "run.npz")
+        for st in nsga2_steps(prob, n_pop=16, n_gen=12, seed=9):
+            if st.gen == 5:
+                st.save(ckpt)
+                break
+        state = NSGA2State.load(ckpt)
+        assert state.gen == 5
+        px2, po2 = nsga2(prob, n_gen=12, state=state)
+        np.testing.assert_array_equal(px, px2)
+        np.testing.assert_array_equal(po, po2)
+
+    def test_generator_yields_initial_and_each_generation(self, tmp_path):
+        prob = _zdt1_problem()
+        gens = [st.gen for st in nsga2_steps(prob, n_pop=10, n_gen=4)]
+        assert gens == [0, 1, 2, 3, 4]
+        ckpt = tmp_path / "c.npz"
+        nsga2(prob, n_pop=10, n_gen=7, checkpoint_path=str(ckpt), checkpoint_every=3)
+        assert NSGA2State.load(str(ckpt)).gen == 7
+
+
+class TestHypervolume:
+    def test_2d_exact(self):
+        obj = np.array([[1.0, 3.0], [2.0, 2.0], [3.0, 1.0], [3.0, 3.0]])
+        # staircase: 3*1 + 2*1 + 1*1 below ref (4, 4)
+        assert hypervolume(obj, np.array([4.0, 4.0])) == pytest.approx(6.0)
+        assert hypervolume(obj, np.array([0.5, 0.5])) == 0.0
+
+    def test_3d_exact_matches_monte_carlo(self):
+        obj = np.random.default_rng(0).random((25, 3))
+        ref = np.full(3, 1.1)
+        exact = hypervolume(obj, ref)
+        u = np.random.default_rng(1).uniform(0, 1.1, (200_000, 3))
+        mc = np.mean(np.any(np.all(obj[None] <= u[:, None], axis=2), axis=1)) * 1.1 ** 3
+        assert exact == pytest.approx(mc, rel=0.01)
+        # single box
+        assert hypervolume(np.array([[0.5, 0.5, 0.5]]), np.ones(3)) == pytest.approx(0.125)
+
+    def test_monte_carlo_many_objectives(self):
+        obj = np.array([[0.5, 0.5, 0.5, 0.5]])
+        assert hypervolume(obj, np.ones(4), n_samples=20_000) == pytest.approx(0.0625)
+
+    def test_stagnation_stops_early(self):
+        prob = _zdt1_problem()
+        hist, hv = [], []
+        px, po = nsga2(prob, n_pop=20, n_gen=500, seed=0, stall_gen=10, stall_tol=1e-3,
+                       hv_history=hv, callback=lambda g, x, o: hist.append((g, len(hv))))
+        last_gen, n_hv = hist[-1]
+        assert n_hv == len(hv)
+        assert last_gen < 499
+        assert len(hv) == last_gen + 2  # initial population + each generation
+        assert hv[-1] >= hv[0]
+
+
+class TestReferenceNiching:
+    @staticmethod
+    def _dtlz2(m, k=5):
+        def evaluate(X):
+            g = np.sum((X[:, m - 1:] - 0.5) ** 2, axis=1)
+            th = X[:, :m - 1] * np.pi / 2
+            F = np.tile((1 + g)[:, None], (1, m))
+            for i in range(m):
+                F[:, i] *= np.prod(np.cos(th[:, :m - 1 - i]), axis=1)
+                if i > 0:
+                    F[:, i] *= np.sin(th[:, m - 1 - i])
+            return F
+
+        n = m - 1 + k
+        return OptimizationProblem(n, m, np.zeros(n), np.ones(n), np.ones(m), evaluate)
+
+    def test_reference_directions(self):
+        W = reference_directions(3, 4)
+        assert W.shape == (15, 3)
+        np.testing.assert_allclose(W.sum(axis=1), 1.0)
+        assert len({tuple(w) for w in W}) == 15
+
+    def test_many_objective_spread(self):
+        m = 5
+        W = reference_directions(m, 3)
+        U = W / np.linalg.norm(W, axis=1, keepdims=True)
+
+        def coverage(po):
+            P = po / np.linalg.norm(po, axis=1, keepdims=True)
+            return np.mean(np.arccos(np.clip((U @ P.T).max(axis=1), -1, 1)))
+
+        _, po2 = nsga2(self._dtlz2(m), n_pop=60, n_gen=80, seed=0)
+        _, po3 = nsga2(self._dtlz2(m), n_pop=60, n_gen=80, seed=0, niching="reference")
+        assert coverage(po3) < coverage(po2)
+        assert np.mean(np.linalg.norm(po3, axis=1)) < np.mean(np.linalg.norm(po2, axis=1))
+
+    def test_unknown_niching(self):
+        with pytest.raises(ValueError):
+            nsga2(_zdt1_problem(), n_pop=4, n_gen=1, niching="bogus")
+
+
+class TestSurrogatePrescreen:
+    def test_same_budget_better_front(self):
+        def problem():
+            prob = _zdt1_problem(6)
+            inner = prob.evaluate
+            prob.evaluate = lambda pop: (n_rows.append(pop.shape[0]), inner(pop))[1]
+            return prob
+
+        ref = np.array([1.1, 1.1])
+        n_rows = []
+        _, po = nsga2(problem(), n_pop=30, n_gen=30, seed=1)
+        plain_evals, n_rows = sum(n_rows), []
+        _, po_s = nsga2(problem(), n_pop=30, n_gen=30, seed=1,
+                        surrogate=partial(IDWSurrogate, trend=True), prescreen=5)
+        assert sum(n_rows) == plain_evals
+        assert hypervolume(po_s, ref) > hypervolume(po, ref)
+
+    def test_factory_without_update_is_rebuilt(self):
+        built = []
+
+        class Mean:
+            def __init__(self, X, F):
+                built.append(len(X))
+                self.m = F.mean(axis=0)
+
+            def predict(self, X):
+                return np.tile(self.m, (len(X), 1))
+
+        nsga2(_zdt1_problem(), n_pop=10, n_gen=3, surrogate=Mean)
+        assert built == [10, 20, 30, 40]
+
+
+class TestOptunaBatchSearch:
+    def test_batches_and_fixed_variable(self):
+        pytest.importorskip("optuna")
+        import optuna
+
+        sizes = []
+
+        def f(X):
+            sizes.append(X.shape[0])
+            return np.sum((X - 0.25) ** 2, axis=1)
+
+        study = optuna_batch_search(
+            f, np.array([0.0, 0.0, 0.7]), np.array([1.0, 1.0, 0.7]), ["minimize"],
+            n_trials=50, batch_size=16, names=["a", "b", "c"],
+            sampler=optuna.samplers.RandomSampler(seed=0),
+        )
+        assert sizes == [16, 16, 16, 2]
+        assert len(study.trials) == 50
+        assert set(study.best_params) == {"a", "b"}
+
+    def test_multi_objective(self):
+        pytest.importorskip("optuna")
+        import optuna
+
+        study = optuna_batch_search(
+            lambda X: np.column_stack([X[:, 0], 1 - X[:, 0]]), np.zeros(1), np.ones(1),
+            ["minimize", "maximize"], n_trials=20, batch_size=8,
+            sampler=optuna.samplers.RandomSampler(seed=0),
+        )
+        assert len(study.best_trials) == 1
+        assert study.best_trials[0].values[0] == min(t.values[0] for t in study.trials)
+
+    def test_threads_and_failed_trials(self):
+        pytest.importorskip("optuna")
+        import optuna
+
+        def f(X):
+            y = np.sum(X ** 2, axis=1)
+            y[X[:, 0] > 0.8] = np.nan
+            return y
+
+        study = optuna_batch_search(
+            f, np.zeros(2), np.ones(2), ["minimize"], n_trials=40, batch_size=10, n_jobs=3,
+            sampler=optuna.samplers.RandomSampler(seed=0),
+        )
+        states = [t.state for t in study.trials]
+        failed = [t for t in study.trials if t.state == optuna.trial.TrialState.FAIL]
+        assert len(states) == 40 and failed
+        assert all(t.params["x0"] > 0.8 for t in failed)
+        done = [t for t in study.trials if t.state == optuna.trial.TrialState.COMPLETE]
+        for t in done:
+            assert t.value == pytest.approx(t.params["x0"] ** 2 + t.params["x1"] ** 2)
+
+
+class TestPSO:
+    def test_sphere(self):
+        def f(X):
+            return np.sum((X - 0.25) ** 2, axis=1)
+
+        bx, bf = pso(f, -np.ones(4), np.ones(4), n_particles=40, n_iter=200, seed=0)
+        np.testing.assert_allclose(bx, 0.25, atol=1e-3)
+        assert bf < 1e-6
+
+    def test_fixed_variable_and_x0(self):
+        lo = np.array([0.0, 2.0])
+        hi = np.array([1.0, 2.0])
+        bx, _ = pso(lambda X: (X[:, 0] - 0.5) ** 2, lo, hi,
+                    n_particles=20, n_iter=50, x0=np.array([0.1, 2.0]), seed=1)
+        assert bx[1] == 2.0
+        assert bx[0] == pytest.approx(0.5, abs=1e-3)
+
+    def test_callback_stops(self):
+        seen = []
+
+        def cb(it, bx, bf, improved):
+            seen.append(it)
+            return it == 4
+
+        pso(lambda X: np.sum(X ** 2, axis=1), -np.ones(2), np.ones(2),
+            n_particles=10, n_iter=100, callback=cb)
+        assert seen == [0, 1, 2, 3, 4]
+
+    def test_stagnation_terminates_early(self):
+        calls = []
+
+        def flat(X):
+            calls.append(1)
+            return np.zeros(X.shape[0])
+
+        pso(flat, np.zeros(2), np.ones(2), n_particles=5, n_iter=1000,
+            stall_iter=10, max_restarts=2)
+        # initial eval + 2 shakes * 10 + 3 * 10 stalled iterations
+        assert len(calls) < 100
+
+
+class TestPSOIslands:
+    def test_deterministic_across_workers(self):
+        kw = dict(n_islands=3, n_particles=15, n_iter=40, migration_interval=10, seed=7)
+        lo, hi = -5.12 * np.ones(3), 5.12 * np.ones(3)
+        bx1, bf1 = pso_islands(_rastrigin, lo, hi, n_jobs=1, **kw)
+        bx2, bf2 = pso_islands(_rastrigin, lo, hi, n_jobs=2, **kw)
+        np.testing.assert_array_equal(bx1, bx2)
+        assert bf1 == bf2
+
+    def test_converges(self):
+        bx, bf = pso_islands(
+            lambda X: np.sum((X - 1.0) ** 2, axis=1), np.zeros(2), 2 * np.ones(2),
+            n_islands=2, n_particles=20, n_iter=100, n_jobs=1, seed=0,
+        )
+        np.testing.assert_allclose(bx, 1.0, atol=1e-3)
+
+    def test_callback_per_epoch(self):
+        seen = []
+        pso_islands(
+            lambda X: np.sum(X ** 2, axis=1), -np.ones(2), np.ones(2),
+            n_islands=2, n_particles=10, n_iter=50, migration_interval=10, n_jobs=1,
+            callback=lambda it, bx, bf, improved: seen.append((it, bf, improved)),
+        )
+        assert [it for it, _, _ in seen] == [10, 20, 30, 40, 50]
+        assert seen[0][2]
+        # improved exactly when the reported best dropped
+        assert all(imp == (bf < prev) for (_, prev, _), (_, bf, imp) in zip(seen, seen[1:]))
+
+    def test_stop_event_checked_every_iteration(self):
+        stop, calls = threading.Event(), []
+
+        def objective(X):
+            calls.append(1)
+            if len(calls) == 5:
+                stop.set()
+            return np.sum(X ** 2, axis=1)
+
+        pso_islands(objective, -np.ones(2), np.ones(2), n_islands=2, n_particles=5,
+                    n_iter=100, migration_interval=50, n_jobs=1, stop_event=stop)
+        assert len(calls) < 10  # not run to the end of the 50-iteration epoch
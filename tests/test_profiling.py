@@ -0,0 +1,79 @@
+"""Tests for xross.profiling — streaming statistics, histograms and caching."""
+
+import numpy as np
+import pandas as pd
+
+from xross.profiling import dataset_hash, profile_csv, profile_dataframe
+
+
+def _frame(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(n, 3)) * [1.0, 10.0, 100.0] + 1e4, columns=["a", "b", "c"])
+    df["b"] = 2 * df["a"] + rng.normal(size=n)
+    df.loc[rng.random(n) < 0.1, "c"] = np.nan
+    df["label"] = "x"
+    return df
+
+
+class TestProfileDataFrame:
+    def test_matches_pandas(self):
+        df = _frame()
+        p = profile_dataframe(df, chunk_size=700, use_cache=False)
+        num = df[["a", "b", "c"]]
+        ref = num.describe().T
+        assert p.columns == ["a", "b", "c"] and p.n_rows == len(df)
+        np.testing.assert_array_equal(p.missing, num.isnull().sum().to_numpy())
+        for col in ["mean", "std", "min", "max"]:
+            np.testing.assert_allclose(getattr(p, col), ref[col].to_numpy(), rtol=1e-10)
+        np.testing.assert_allclose(p.corr, num.corr().to_numpy(), atol=1e-10)
+
+    def test_histograms_exact(self):
+        df = _frame()
+        # chunk order puts the extremes late so the range has to grow
+        df = df.sort_values("a").iloc[np.r_[2000:3000, 0:2000, 3000:5000]]
+        p = profile_dataframe(df, chunk_size=500, bins=10, use_cache=False)
+        for j, col in enumerate(p.columns):
+            x = df[col].dropna().to_numpy()
+            counts, edges = p.hist_counts[j], p.hist_edges[j]
+            assert counts.sum() == x.size
+            assert edges[0] <= x.min() and edges[-1] >= x.max()
+            assert 10 <= counts.size < 20
+            # values on a bin edge may round into the neighbouring bin
+            assert np.abs(np.histogram(x, edges)[0] - counts).max() <= 1
+
+    def test_sample_and_constant_column(self):
+        df = pd.DataFrame({"k": np.full(300, 3.0), "v": np.arange(300.0)})
+        p = profile_dataframe(df, sample_size=50, chunk_size=64, use_cache=False)
+        assert p.sampled and len(p.sample) == 50
+        assert np.all(np.isin(p.sample["v"], df["v"]))
+        assert np.isnan(p.corr[0]).all() and p.corr[1, 1] == 1.0
+        assert p.hist_counts[0].sum() == 300
+        assert p.describe().loc["v", "count"] == 300
+
+    def test_cache_by_content(self):
+        df = _frame(500)
+        p = profile_dataframe(df)
+        assert profile_dataframe(df.copy()) is p
+        df2 = df.copy()
+        df2.iloc[0, 0] += 1.0
+        assert dataset_hash(df2) != dataset_hash(df)
+        assert profile_dataframe(df2) is not p
+
+
+class TestProfileCSV:
+    def test_streams_file(self, tmp_path):
+        df = _frame(1200)
+        path = str(tmp_path / "d.csv")
+        df.to_csv(path, index=False)
+        p = profile_csv(path, chunk_size=250)
+        ref = profile_dataframe(df, use_cache=False)
+        assert p.columns == ref.columns
+        np.testing.assert_allclose(p.mean, ref.mean, rtol=1e-12)
+        np.testing.assert_allclose(p.corr, ref.corr, atol=1e-10)
+        assert profile_csv(path, chunk_size=250) is p
+
+    def test_empty_file(self, tmp_path):
+        path = tmp_path / "e.csv"
+        path.write_text("a,b\n")
+        p = profile_csv(str(path))
+        assert p.n_rows == 0
@@ -0,0 +1,277 @@
+"""Tests for xross.surrogate — IDW / GP surrogates and batch recommendation."""
+
+import numpy as np
+import pytest
+
+import xross.surrogate as surrogate
+from xross.surrogate import (
+    GPSurrogate, IDWSurrogate, permutation_importance, predict_csv, recommend_batch,
+)
+
+
+class TestIDWSurrogate:
+    def test_interpolates_training_points(self):
+        rng = np.random.default_rng(0)
+        X = rng.random((30, 3)) * [1.0, 10.0, 100.0]
+        Y = np.column_stack([X.sum(axis=1), X[:, 0] ** 2])
+        model = IDWSurrogate(X, Y)
+        np.testing.assert_allclose(model.predict(X), Y, rtol=1e-8)
+        assert model.predict(X[0]).shape == (1, 2)
+
+    def test_base_is_abstract(self):
+        class Partial(surrogate._Surrogate):
+            def predict(self, xnew):
+                return xnew
+
+        with pytest.raises(TypeError):
+            Partial()
+
+    def test_update_appends(self):
+        X = np.array([[0.0], [1.0]])
+        model = IDWSurrogate(X, np.array([0.0, 1.0]))
+        model.update(np.array([[2.0]]), np.array([[4.0]]))
+        assert model.X.shape == (3, 1)
+        assert model.predict(np.array([[2.0]]))[0, 0] == pytest.approx(4.0)
+
+    def test_update_matches_direct_fit(self):
+        rng = np.random.default_rng(2)
+        X = rng.random((60, 3))
+        X[:2] = [[0.0, 0.0, 0.0], [1.0, 1.0, 1.0]]  # fix the input range
+        Y = np.column_stack([X @ [1.0, 2.0, 3.0], np.sin(X[:, 0])])
+        Q = rng.random((20, 3))
+        for trend in (False, True):
+            direct = IDWSurrogate(X, Y, trend=trend)
+            inc = IDWSurrogate(X[:30], Y[:30], trend=trend).update(X[30:45], Y[30:45]).update(X[45:], Y[45:])
+            np.testing.assert_allclose(inc.predict(Q), direct.predict(Q), rtol=1e-9, atol=1e-12)
+
+    def test_trend_extrapolates(self):
+        X = np.linspace(0, 1, 11)[:, None]
+        Y = 3 * X + 1
+        plain = IDWSurrogate(X, Y).predict([[2.0]])[0, 0]
+        trend = IDWSurrogate(X, Y, trend=True).predict([[2.0]])[0, 0]
+        assert plain <= 4.0
+        assert trend == pytest.approx(7.0)
+
+    def test_chunked_matches_single_block(self):
+        rng = np.random.default_rng(1)
+        X, Y, Q = rng.random((200, 4)), rng.random((200, 2)), rng.random((57, 4))
+        full = IDWSurrogate(X, Y).predict(Q)
+        chunked = IDWSurrogate(X, Y, max_block=1000).predict(Q)
+        np.testing.assert_allclose(chunked, full, rtol=1e-10)
+        ref = np.empty_like(full)
+        for i, q in enumerate(Q):  # per-row reference
+            w = 1.0 / np.sum(((X - q) / np.ptp(X, axis=0)) ** 2, axis=1)
+            ref[i] = w @ Y / w.sum()
+        np.testing.assert_allclose(full, ref, rtol=1e-8)
+
+    @pytest.mark.parametrize("use_tree", [True, False])
+    def test_knn_mode(self, use_tree, monkeypatch):
+        if use_tree:
+            pytest.importorskip("sklearn")
+        else:
+            monkeypatch.setattr(surrogate, "KDTree", None)
+        rng = np.random.default_rng(2)
+        X, Y, Q = rng.random((300, 3)), rng.random((300, 1)), rng.random((40, 3))
+        knn = IDWSurrogate(X, Y, k=8).predict(Q)
+        ref = np.empty_like(knn)
+        for i, q in enumerate(Q):
+            d2 = np.sum(((X - q) / np.ptp(X, axis=0)) ** 2, axis=1)
+            near = np.argsort(d2)[:8]
+            ref[i] = (1.0 / d2[near]) @ Y[near] / np.sum(1.0 / d2[near])
+        np.testing.assert_allclose(knn, ref, rtol=1e-8)
+        # k >= n_samples falls back to plain IDW
+        np.testing.assert_allclose(IDWSurrogate(X, Y, k=1000).predict(Q), IDWSurrogate(X, Y).predict(Q))
+
+
+class TestCrossValidation:
+    def test_loo_matches_refit(self):
+        rng = np.random.default_rng(3)
+        X = rng.random((40, 2))
+        Y = np.column_stack([np.sin(4 * X[:, 0]), X[:, 1]])
+        model = IDWSurrogate(X, Y)
+        cv = model.cross_validate()
+        for i in range(40):
+            keep = np.arange(40) != i
+            w = 1.0 / np.sum((model.Xn[keep] - model.Xn[i]) ** 2, axis=1)
+            np.testing.assert_allclose(cv.pred[i], w @ Y[keep] / w.sum(), rtol=1e-8)
+        assert cv.n_folds == 40
+        assert np.all(cv.r2 < 1.0)
+        assert "LOO-R²" in model.score_text(["a", "b"])
+
+    def test_kfold_and_knn(self):
+        rng = np.random.default_rng(4)
+        X = rng.random((60, 3))
+        Y = X @ np.array([1.0, -2.0, 0.5])
+        cv = IDWSurrogate(X, Y, k=5).cross_validate(n_folds=5)
+        assert cv.n_folds == 5 and cv.pred.shape == (60, 1)
+        assert 0.0 < cv.r2[0] < 1.0
+        # a linear response is recovered exactly by the trend term
+        cv_t = IDWSurrogate(X, Y, trend=True).cross_validate()
+        assert cv_t.r2[0] == pytest.approx(1.0)
+        cv_t5 = IDWSurrogate(X, Y, trend=True).cross_validate(n_folds=5)
+        assert cv_t5.rmse[0] == pytest.approx(0.0, abs=1e-10)
+
+
+class TestGPSurrogate:
+    def _data(self, n=60):
+        X = np.random.default_rng(5).random((n, 2))
+        return X, np.column_stack([np.sin(3 * X[:, 0]) + X[:, 1], X[:, 0] * X[:, 1]])
+
+    def test_update_matches_direct_solve(self):
+        X, Y = self._data()
+        gp = GPSurrogate(X[:40], Y[:40]).update(X[40:50], Y[40:50]).update(X[50:], Y[50:])
+        Q = np.random.default_rng(6).random((15, 2))
+        Xn = (X - gp.xmin) / gp.xrng
+        K = gp._kernel(Xn, Xn) + gp.noise * np.eye(60)
+        Ks = gp._kernel((Q - gp.xmin) / gp.xrng, Xn)
+        mean, var = gp.predict_mean_var(Q)
+        np.testing.assert_allclose(
+            mean, Ks @ np.linalg.solve(K, (Y - gp.ymean) / gp.ystd) * gp.ystd + gp.ymean, atol=1e-8)
+        v_ref = 1 - np.sum(Ks * np.linalg.solve(K, Ks.T).T, axis=1)
+        np.testing.assert_allclose(var, np.maximum(v_ref, 0)[:, None] * gp.ystd ** 2, atol=1e-8)
+        np.testing.assert_allclose(gp.predict(Q), mean)
+
+    def test_uncertainty_grows_away_from_data(self):
+        X, Y = self._data()
+        gp = GPSurrogate(X, Y)
+        _, v_in = gp.predict_mean_var(X[:5])
+        _, v_out = gp.predict_mean_var(np.full((1, 2), 3.0))
+        assert np.all(v_in < 1e-3 * v_out)
+
+    def test_cross_validation_closed_form(self):
+        X, Y = self._data(30)
+        gp = GPSurrogate(X, Y, length_scale=0.5, noise=1e-4)
+        Xn = (X - gp.xmin) / gp.xrng
+        K = gp._kernel(Xn, Xn) + 1e-4 * np.eye(30)
+        Yn = (Y - gp.ymean) / gp.ystd
+        cv = gp.cross_validate()
+        for i in (0, 7, 29):
+            k = np.arange(30) != i
+            ref = K[i, k] @ np.linalg.solve(K[np.ix_(k, k)], Yn[k]) * gp.ystd + gp.ymean
+            np.testing.assert_allclose(cv.pred[i], ref, atol=1e-8)
+        cv3 = gp.cross_validate(3)
+        assert cv3.n_folds == 3 and np.all(cv3.r2 > 0.5)
+        assert "LOO-R²" in gp.score_text()
+
+
+class TestPermutationImportance:
+    class _Linear:
+        def predict(self, X):
+            return np.column_stack([3 * X[:, 0], X[:, 1] + X[:, 2]])
+
+    def test_ranks_and_intervals(self):
+        X = np.random.default_rng(0).random((200, 4))
+        Y = self._Linear().predict(X)
+        res = permutation_importance(self._Linear(), X, Y, n_repeats=8)
+        assert res.importances.shape == (8, 2, 4)
+        assert np.argmax(res.mean[0]) == 0
+        np.testing.assert_allclose(res.mean[0, 1:], 0.0)
+        np.testing.assert_allclose(res.mean[1, [0, 3]], 0.0)
+        assert np.all(res.ci_low <= res.mean) and np.all(res.mean <= res.ci_high)
+        assert res.ci_low[0, 0] > 0
+        np.testing.assert_allclose(res.normalised().sum(axis=1), 1.0)
+
+    def test_parallel_matches_serial(self):
+        X = np.random.default_rng(1).random((50, 5))
+        model = IDWSurrogate(X, X[:, :2] ** 2)
+        a = permutation_importance(model, X, model.Y, n_repeats=3, n_jobs=1)
+        b = permutation_importance(model, X, model.Y, n_repeats=3, n_jobs=3)
+        np.testing.assert_allclose(a.importances, b.importances)
+        assert model.importance.shape == (2, 5)
+
+    def test_memory_bound(self):
+        X = np.random.default_rng(2).random((40, 4))
+        rows = []
+
+        class Model(self._Linear):
+            def predict(self, X):
+                rows.append(X.shape[0])
+                return super().predict(X)
+
+        ref = permutation_importance(self._Linear(), X, X[:, :2], n_repeats=6)
+        res = permutation_importance(Model(), X, X[:, :2], n_repeats=6, max_block=40 * 4 * 4)
+        assert max(rows) * 4 <= 40 * 4 * 4
+        np.testing.assert_allclose(res.importances, ref.importances)
+        # the bound is shared by all workers
+        rows.clear()
+        res = permutation_importance(Model(), X, X[:, :2], n_repeats=6, n_jobs=2, max_block=40 * 4 * 4)
+        assert max(rows) * 4 * 2 <= 40 * 4 * 4
+        np.testing.assert_allclose(res.importances, ref.importances)
+
+
+class TestRecommendBatch:
+    def _data(self, f):
+        X = np.random.default_rng(0).uniform(0.0, 1.0, (40, 2))
+        return X, f(X)
+
+    def test_ei_batch_is_diverse(self):
+        X, Y = self._data(lambda X: ((X - 0.7) ** 2).sum(axis=1, keepdims=True))
+        Xr, acq, mu, sd = recommend_batch(GPSurrogate(X, Y), np.zeros(2), np.ones(2), q=4, min_distance=0.05)
+        assert Xr.shape == (4, 2) and mu.shape == sd.shape == (4, 1)
+        assert np.all((Xr >= 0) & (Xr <= 1))
+        assert np.linalg.norm(Xr[0] - 0.7) < 0.15  # first pick goes to the optimum
+        d = np.linalg.norm(Xr[:, None] - Xr[None], axis=2)[np.triu_indices(4, 1)]
+        assert d.min() >= 0.05 * np.sqrt(2) - 1e-12
+
+    def test_maximize_flips_target(self):
+        X, Y = self._data(lambda X: -((X - 0.2) ** 2).sum(axis=1, keepdims=True))
+        Xr, *_ = recommend_batch(GPSurrogate(X, Y), np.zeros(2), np.ones(2), q=1, directions=["maximize"])
+        assert np.linalg.norm(Xr[0] - 0.2) < 0.15
+
+    def test_ehvi_multi_objective(self):
+        X, Y = self._data(lambda X: np.column_stack([X[:, 0], 1 - np.sqrt(X[:, 0]) + X[:, 1]]))
+        model = GPSurrogate(X, Y)
+        n = len(model.X)
+        Xr, acq, mu, sd = recommend_batch(model, np.zeros(2), np.ones(2), q=3, n_candidates=400, seed=1)
+        assert Xr.shape == (3, 2) and np.all(acq > 0)
+        assert np.all(Xr[:, 1] < 0.2)  # picks lie near the Pareto set (x1 = 0)
+        assert len(model.X) == n  # fantasies do not touch the caller's model
+
+    def test_requires_variance(self):
+        X, Y = self._data(lambda X: X[:, :1])
+        with pytest.raises(TypeError):
+            recommend_batch(IDWSurrogate(X, Y), np.zeros(2), np.ones(2))
+
+
+class TestPredictCSV:
+    def test_chunks_match_full_predict(self, tmp_path):
+        import pandas as pd
+
+        rng = np.random.default_rng(0)
+        model = IDWSurrogate(rng.random((20, 2)), rng.random((20, 2)))
+        df = pd.DataFrame(rng.random((1003, 3)), columns=["a", "b", "id"])
+        src, dst = str(tmp_path / "in.csv"), str(tmp_path / "out.csv")
+        df.to_csv(src, index=False)
+        seen = []
+        n = predict_csv(model, src, dst, ["b", "a"], ["p", "q"], chunk_size=100, progress=seen.append)
+        out = pd.read_csv(dst)
+        assert n == 1003 and seen[-1] == 1003 and len(seen) == 11
+        assert list(out.columns) == ["a", "b", "id", "p(pred)", "q(pred)"]
+        np.testing.assert_allclose(out[["p(pred)", "q(pred)"]].to_numpy(),
+                                   model.predict(df[["b", "a"]].to_numpy()), rtol=1e-12)
+
+    def test_stop_event_abandons_output(self, tmp_path):
+        import threading
+
+        import pandas as pd
+
+        model = IDWSurrogate(np.array([[0.0], [1.0]]), np.array([0.0, 1.0]))
+        src, dst = str(tmp_path / "in.csv"), str(tmp_path / "out.csv")
+        pd.DataFrame({"a": np.linspace(0, 1, 500)}).to_csv(src, index=False)
+        stop, seen = threading.Event(), []
+
+        def progress(n):
+            seen.append(n)
+            stop.set()
+
+        assert predict_csv(model, src, dst, ["a"], chunk_size=100, progress=progress, stop_event=stop) == 0
+        assert seen == [100]
+        assert not any(tmp_path.glob("out.csv*"))
+
+    def test_missing_column(self, tmp_path):
+        src = tmp_path / "in.csv"
+        src.write_text("a\n1\n")
+        model = IDWSurrogate(np.zeros((2, 2)) + [[0], [1]], np.ones((2, 1)))
+        with pytest.raises(KeyError):
+            predict_csv(model, str(src), str(tmp_path / "out.csv"), ["a", "b"])
+        assert not (tmp_path / "out.csv").exists()
@@ -4,9 +4,15 @@ import numpy as np
 import pytest
 
 from xross.xrr import (
+    XRRObjective,
+    create_warm_start_study,
     expand_stack,
+    expand_stack_batch,
+    fidelity_subsets,
     fit_xrr_residual,
+    fit_xrr_residual_batch,
     normalize_periodicity,
+    optuna_warm_start,
     peak_preserving_downsample,
 )
 from xross.core import parratt
@@ -42,6 +48,19 @@ class TestExpandStack:
         assert n[0] == 1.0  # vacuum
         assert n[-1] == pytest.approx(0.999)  # substrate
 
+    def test_batch_matches_single(self):
+        base_n = np.array([[0.92, 1.0], [0.93, 0.99]])
+        base_k = np.zeros((2, 2))
+        base_t = np.array([[2.8, 4.1], [3.0, 4.0]])
+        base_s = np.full((2, 2), 0.3)
+        blocks = [("single", 0, 1, 1), ("repeat", 0, 2, 3)]
+        sub = {"n": 0.999, "k": 0.0, "s": 0.1}
+        full = expand_stack_batch(base_n, base_k, base_t, base_s, blocks, sub)
+        for p in range(2):
+            ref = expand_stack(base_n[p], base_k[p], base_t[p], base_s[p], blocks, sub)
+            for a, b in zip(full, ref):
+                np.testing.assert_allclose(a[p], b)
+
 
 class TestNormalizePeriodicity:
     def test_rescaling(self):
@@ -65,3 +84,159 @@ class TestFitXrrResidual:
             theta, y_sim, n_arr, k_arr, d_arr, s_arr, 0.15418
         )
         assert chi2 < 1e-10
+
+    def test_batch_matches_single(self):
+        theta = np.linspace(0.2, 3.0, 150)
+        n_arr = np.array([1.0, 1.0 - 1e-5, 1.0 - 7.6e-6])
+        k_arr = np.array([0.0, 1e-7, 1.7e-7])
+        s_arr = np.array([0.0, 0.3, 0.0])
+        y_exp = parratt(theta, n_arr, k_arr, [0.0, 15.0, 0.0], s_arr, 0.15418)
+        d_pop = np.array([[0.0, 15.0, 0.0], [0.0, 12.0, 0.0]])
+        chi2, y_calc = fit_xrr_residual_batch(
+            theta, y_exp, np.tile(n_arr, (2, 1)), np.tile(k_arr, (2, 1)),
+            d_pop, np.tile(s_arr, (2, 1)), 0.15418,
+        )
+        assert chi2.shape == (2,)
+        for p in range(2):
+            ref, yc = fit_xrr_residual(theta, y_exp, n_arr, k_arr, d_pop[p], s_arr, 0.15418)
+            assert chi2[p] == pytest.approx(ref, abs=1e-12)
+            np.testing.assert_allclose(y_calc[p], yc, rtol=1e-10)
+
+
+class TestXRRObjective:
+    def _setup(self):
+        theta = np.linspace(0.2, 3.0, 120)
+        blocks = [("single", 0, 1, 1), ("repeat", 1, 3, 4)]
+        sub = {"n": 1 - 2.7e-6 * 2.33, "k": 0.0, "s": 0.2}
+        t = np.array([2.0, 2.8, 4.1])
+        s = np.array([0.3, 0.3, 0.3])
+        rho = np.array([2.2, 10.2, 2.33])
+        n, k, d, sig = expand_stack(1 - 2.7e-6 * rho, np.zeros(3), t, s, blocks, sub)
+        y = parratt(theta, n, k, d, sig, 0.15418)
+        return theta, y, blocks, sub, np.concatenate([t, s, rho])
+
+    def test_density_mode_matches_residual(self):
+        import pickle
+
+        theta, y, blocks, sub, x = self._setup()
+        obj = pickle.loads(pickle.dumps(XRRObjective(theta, y, None, blocks, sub, 0.15418)))
+        X = np.vstack([x, x * 1.05])
+        chi2 = obj(X)
+        assert chi2[0] < 1e-10
+        assert chi2[1] > chi2[0]
+        sub_obj = obj.subset(np.arange(0, 120, 2))
+        assert sub_obj.theta.size == 60
+
+    def test_period_projection(self):
+        theta, y, blocks, sub, x = self._setup()
+        obj = XRRObjective(theta, y, None, blocks, sub, 0.15418,
+                           d_targets=[6.9], fixed_t=np.zeros(3, bool))
+        X = obj.project(np.vstack([x, x]) * 1.2)
+        np.testing.assert_allclose(X[:, 1] + X[:, 2], 6.9)
+
+
+class TestOptunaWarmStart:
+    def test_batched_ask_tell(self):
+        pytest.importorskip("optuna")
+        calls = []
+
+        def evaluate_batch(X):
+            calls.append(X.shape[0])
+            return np.sum((X - 0.3) ** 2, axis=1)
+
+        lo = np.array([0.0, 0.0, 0.5])
+        hi = np.array([1.0, 1.0, 0.5])  # last variable fixed
+        bx, bv, study = optuna_warm_start(
+            evaluate_batch, lo, hi, n_trials=20, batch_size=8, n_jobs=2,
+        )
+        assert len(study.trials) == 20
+        assert sum(calls) == 20
+        assert bx[2] == 0.5
+        assert bv == pytest.approx(min(t.value for t in study.trials))
+
+    def test_multi_fidelity_pruning(self):
+        pytest.importorskip("optuna")
+        import optuna
+
+        full_calls = []
+
+        def coarse(X):
+            return np.sum((X - 0.3) ** 2, axis=1)
+
+        def full(X):
+            full_calls.append(X.shape[0])
+            return np.sum((X - 0.3) ** 2, axis=1)
+
+        study = optuna.create_study(
+            direction="minimize",
+            sampler=optuna.samplers.RandomSampler(seed=0),
+            pruner=optuna.pruners.MedianPruner(n_startup_trials=4),
+        )
+        bx, bv, study = optuna_warm_start(
+            [coarse, full], np.zeros(2), np.ones(2),
+            n_trials=40, batch_size=4, study=study,
+        )
+        states = [t.state for t in study.trials]
+        n_pruned = states.count(optuna.trial.TrialState.PRUNED)
+        assert n_pruned > 0
+        assert sum(full_calls) == 40 - n_pruned
+        assert np.isfinite(bv)
+
+    def test_snapshot_arrays(self, tmp_path):
+        pytest.importorskip("optuna")
+        snap = str(tmp_path / "warm.npz")
+        bx, bv, study = optuna_warm_start(
+            lambda X: np.sum(X ** 2, axis=1), np.zeros(3), np.ones(3),
+            n_trials=12, batch_size=4, names=["a", "b", "c"],
+            snapshot_path=snap, snapshot_every=2,
+        )
+        data = np.load(snap)
+        assert data["x"].shape == (12, 3)
+        assert data["y"].shape == (12,)
+        assert list(data["names"]) == ["a", "b", "c"]
+        assert data["y"].min() == pytest.approx(bv)
+
+    def test_snapshot_skips_failed_trials(self, tmp_path):
+        optuna = pytest.importorskip("optuna")
+        snap = str(tmp_path / "warm.npz")
+
+        def evaluate_batch(X):
+            y = np.sum(X ** 2, axis=1)
+            y[X[:, 0] > 0.5] = np.inf
+            return y
+
+        optuna_warm_start(evaluate_batch, np.zeros(2), np.ones(2),
+                          n_trials=16, batch_size=4, snapshot_path=snap,
+                          sampler=optuna.samplers.RandomSampler(seed=0))
+        data = np.load(snap)
+        assert np.all(np.isfinite(data["y"])) and np.all(data["x"][:, 0] <= 0.5)
+        assert data["x"].shape[0] == data["y"].shape[0] < 16
+
+
+class TestCreateWarmStartStudy:
+    def test_memory_unique_names(self):
+        pytest.importorskip("optuna")
+        s1 = create_warm_start_study()
+        s2 = create_warm_start_study()
+        assert s1.study_name != s2.study_name
+
+    def test_journal_file(self, tmp_path):
+        pytest.importorskip("optuna")
+        study = create_warm_start_study("journal", directory=str(tmp_path), study_name="run1")
+        optuna_warm_start(lambda X: X[:, 0], np.zeros(1), np.ones(1),
+                          n_trials=4, batch_size=2, study=study)
+        assert (tmp_path / "run1.journal").exists()
+        assert len(study.trials) == 4
+
+    def test_unknown_mode(self):
+        pytest.importorskip("optuna")
+        with pytest.raises(ValueError):
+            create_warm_start_study("sqlite")
+
+
+class TestFidelitySubsets:
+    def test_nested_coarse_to_full(self):
+        subs = fidelity_subsets(600, n_stages=3)
+        assert len(subs) == 3
+        assert subs[0].size < subs[1].size < subs[2].size == 600
+        assert set(subs[0]) <= set(subs[1])
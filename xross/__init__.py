@@ -12,7 +12,11 @@ core
 xrr
     XRR fitting pipeline and .xrdml loader.
 optimize
-    NSGA-II multi-objective optimisation.
+    NSGA-II multi-objective optimisation and particle-swarm fitting.
+surrogate
+    Cheap regression surrogates (IDW, Gaussian process) for expensive objectives.
+profiling
+    Streaming summary statistics, correlation and histograms for datasets.
 fileio
     CSV I/O for layer models and results.
 gui
@@ -31,7 +35,7 @@ from xross.core import (
     reflectivity_matrix,
 )
 from xross.xrr import load_xrdml
-from xross.optimize import nsga2, OptimizationProblem
+from xross.optimize import nsga2, pso, OptimizationProblem
 
 __all__ = [
     "Layer",
@@ -42,5 +46,6 @@ __all__ = [
     "reflectivity_matrix",
     "load_xrdml",
     "nsga2",
+    "pso",
     "OptimizationProblem",
 ]
@@ -1,4 +1,5 @@
 """Entry point for ``python -m xross`` or the ``xross`` console script."""
+import multiprocessing
 import sys, os
 
 if getattr(sys, '_MEIPASS', None):
@@ -14,4 +15,6 @@ def main():
     run()
 
 if __name__ == "__main__":
+    # Island-model PSO uses a process pool; required for frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     main()
@@ -17,6 +17,7 @@ import numpy as np
 __all__ = [
     "reflectivity_matrix",
     "parratt",
+    "parratt_batch",
     "parse_nk_file",
     "interp_nk",
     "Layer",
@@ -225,6 +226,56 @@ def parratt(
     return (np.abs(r) ** 2).astype(float)
 
 
+def parratt_batch(
+    theta_deg: np.ndarray,
+    n_arr: np.ndarray,
+    k_arr: np.ndarray,
+    d_nm: np.ndarray,
+    sigma_nm: np.ndarray,
+    wavelength_nm: float,
+) -> np.ndarray:
+    """Population-batched Parratt recursion.
+
+    Evaluates many stacks with the same number of layers in one pass;
+    row *p* of the result equals ``parratt(theta_deg, n_arr[p], ...)``.
+
+    Parameters
+    ----------
+    theta_deg : 1-D array
+        Incidence angles in degrees.
+    n_arr, k_arr, d_nm, sigma_nm : 2-D arrays  (n_pop, N_layers)
+        Per-candidate layer parameters, top to bottom.
+    wavelength_nm : float
+        X-ray wavelength in nm.
+
+    Returns
+    -------
+    reflectivity : 2-D array  (n_pop, n_angles)
+    """
+    theta = np.asarray(theta_deg, dtype=float)
+    cos_t = np.cos(np.radians(theta))
+    k0 = 2.0 * np.pi / float(wavelength_nm)
+
+    m = (np.atleast_2d(np.asarray(n_arr, float))
+         - 1j * np.atleast_2d(np.asarray(k_arr, float))).astype(np.complex128)
+    d = np.atleast_2d(np.asarray(d_nm, float))
+    s = np.atleast_2d(np.asarray(sigma_nm, float))
+
+    # (n_pop, N_layers, n_angles)
+    kz = k0 * np.sqrt(m[:, :, None] ** 2 - cos_t[None, None, :] ** 2)
+
+    r = np.zeros((m.shape[0], cos_t.size), dtype=np.complex128)
+    for j in range(m.shape[1] - 2, -1, -1):
+        kj, kj1 = kz[:, j], kz[:, j + 1]
+        rj = (kj - kj1) / (kj + kj1)
+        sig = 0.5 * (s[:, j] + s[:, j + 1])
+        rj = rj * np.exp(-2.0 * kj * kj1 * (sig ** 2)[:, None])
+        phase = np.exp(2j * kj1 * d[:, j + 1, None])
+        r = (rj + r * phase) / (1.0 + rj * r * phase)
+
+    return (np.abs(r) ** 2).astype(float)
+
+
 # -----------------------------------------------------------------------
 #  nk file parser
 # -----------------------------------------------------------------------
@@ -2,24 +2,44 @@
 xross.fileio — File I/O for XROSS layer models and results.
 
 Handles serialisation of layer stacks to/from CSV and provides
-logging utilities.
+logging utilities.  :func:`read_layer_model` compiles a layer-model CSV
+into typed arrays and repeat blocks for the physics kernels, and
+:func:`save_project` / :func:`open_project` store a model together with
+nk tables, measurements and fit history in a versioned binary bundle.
+:class:`AsyncLogger` moves log-file writes off the calling thread.
 """
 
 from __future__ import annotations
 
+import atexit
 import csv
 import datetime
+import json
 import os
+import queue
+import threading
+import time
+import zipfile
+from collections import deque
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
 __all__ = [
     "save_layer_model",
     "load_layer_model",
+    "LayerModel",
+    "read_layer_model",
+    "PROJECT_VERSION",
+    "Project",
+    "save_project",
+    "open_project",
     "save_results_csv",
     "log_message",
+    "AsyncLogger",
 ]
 
 
@@ -37,6 +57,14 @@ def save_layer_model(
         Each dict has ``"subroutine"``, ``"loop_count"``, and
         ``"params"`` (list of str).
     """
+    header, fixed = _table(rows)
+    with open(filepath, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(header)
+        w.writerows(fixed)
+
+
+def _table(rows: List[Dict[str, Any]]) -> Tuple[List[str], List[List[str]]]:
     max_param = max((len(r.get("params", [])) for r in rows), default=0)
     header = ["Subroutine", "Loop Count"] + [f"Param{i+1}" for i in range(max_param)]
     fixed = []
@@ -45,10 +73,7 @@ def save_layer_model(
         row += r.get("params", [])
         row += [""] * (len(header) - len(row))
         fixed.append(row[: len(header)])
-    with open(filepath, "w", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        w.writerow(header)
-        w.writerows(fixed)
+    return header, fixed
 
 
 def load_layer_model(filepath: str) -> List[Dict[str, Any]]:
@@ -60,17 +85,338 @@ def load_layer_model(filepath: str) -> List[Dict[str, Any]]:
         Each dict has ``"subroutine"`` (str), ``"loop_count"`` (str),
         ``"params"`` (list of str).
     """
-    df = pd.read_csv(filepath, dtype=str).fillna("")
-    result = []
-    for _, row in df.iterrows():
-        result.append(
-            {
-                "subroutine": row["Subroutine"],
-                "loop_count": row["Loop Count"],
-                "params": [v for v in row.iloc[2:].values],
-            }
-        )
-    return result
+    df = _read_geo(filepath)
+    params = df.iloc[:, 2:].to_numpy(dtype=object).tolist()
+    return [
+        {"subroutine": s, "loop_count": lc, "params": p}
+        for s, lc, p in zip(df["Subroutine"].tolist(), df["Loop Count"].tolist(), params)
+    ]
+
+
+def _read_geo(filepath: str) -> pd.DataFrame:
+    # every cell as text; blanks stay "" and names such as "NA" are kept verbatim
+    return pd.read_csv(filepath, dtype=str, keep_default_na=False)
+
+
+# -----------------------------------------------------------------------
+#  Compiled layer model
+# -----------------------------------------------------------------------
+
+# Param1..Param6 as written by the main window
+_PARAM_FIELDS = ("names", "n", "k", "thickness", "density", "roughness")
+
+
+@dataclass
+class LayerModel:
+    """Layer model compiled into per-layer arrays and repeat blocks.
+
+    Layers are grouped the way the main window groups them: all rows of a
+    subroutine form one contiguous block (in order of first appearance)
+    and every ``Orphan`` row is a block of its own.
+
+    Attributes
+    ----------
+    names : 1-D object array (n_layers,)
+        Layer names (Param1).
+    n, k, thickness, density, roughness : 1-D float arrays (n_layers,)
+        Param2–Param6; NaN where blank or not a number.
+    params : 2-D object array (n_layers, n_params)
+        Raw parameter text, for round-tripping into editors.
+    blocks : list of (kind, start, end, repeat)
+        ``kind`` is ``"repeat"`` or ``"single"``; layers ``start:end`` are
+        stacked ``repeat`` times (the format used by :mod:`xross.xrr`).
+    block_names : list of str
+        Subroutine name of each block (``"Orphan"`` for lone layers).
+    loop_counts : 1-D int array (n_blocks,)
+        Loop count as written (1 when blank or invalid).
+    file_row : 1-D int array (n_layers,)
+        CSV data row each layer came from.
+    """
+
+    names: np.ndarray
+    n: np.ndarray
+    k: np.ndarray
+    thickness: np.ndarray
+    density: np.ndarray
+    roughness: np.ndarray
+    params: np.ndarray
+    blocks: List[Tuple[str, int, int, int]]
+    block_names: List[str]
+    loop_counts: np.ndarray
+    file_row: np.ndarray
+
+    @property
+    def n_layers(self) -> int:
+        return len(self.names)
+
+    def layer_index(self) -> np.ndarray:
+        """Base-layer index of every layer of the expanded stack, top to bottom."""
+        parts = [np.tile(np.arange(i0, i1), rep) for _, i0, i1, rep in self.blocks]
+        return np.concatenate(parts) if parts else np.zeros(0, np.int64)
+
+    def expand(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Expanded ``(n, k, d, σ)`` arrays with repeats applied (no ambient/substrate)."""
+        idx = self.layer_index()
+        return self.n[idx], self.k[idx], self.thickness[idx], self.roughness[idx]
+
+    def as_stack(self) -> List[Tuple[float, float, float, float]]:
+        """Expanded stack as ``(n, k, d, σ)`` tuples for :func:`xross.core.reflectivity_matrix`."""
+        return list(zip(*(a.tolist() for a in self.expand())))
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]]) -> "LayerModel":
+        """Compile rows in the :func:`save_layer_model` format."""
+        header, fixed = _table(rows)
+        return _compile(pd.DataFrame(fixed, columns=header, dtype=object))
+
+
+def read_layer_model(filepath: str) -> LayerModel:
+    """Read a layer-model CSV into a :class:`LayerModel`.
+
+    The file is parsed once into text columns; numbers are converted per
+    column and blocks are found by factorising the subroutine names, so
+    no per-row Python work is done.
+    """
+    return _compile(_read_geo(filepath))
+
+
+def _compile(df: pd.DataFrame) -> LayerModel:
+    sub = df["Subroutine"].to_numpy(dtype=object)
+    nrow = len(df)
+    orphan = sub == "Orphan"
+    sub_codes, _ = pd.factorize(sub)
+    codes, _ = pd.factorize(np.where(orphan, -1 - np.arange(nrow), sub_codes))  # each orphan its own block
+    order = np.argsort(codes, kind="stable")
+    counts = np.bincount(codes)
+    ends = np.cumsum(counts)
+    starts = ends - counts
+
+    lc = pd.to_numeric(df["Loop Count"], errors="coerce").to_numpy(float)
+    lc = np.where(np.isfinite(lc) & (lc == np.round(lc)), lc, 1).astype(np.int64)
+    last = order[ends - 1]  # the last row of a subroutine sets its loop count
+    loop_counts = np.where(orphan[last], 1, lc[last])
+
+    params = df.iloc[:, 2:].to_numpy(dtype=object)[order]
+    cols = {}
+    for j, f in enumerate(_PARAM_FIELDS):
+        if j >= params.shape[1]:
+            cols[f] = np.full(nrow, np.nan) if f != "names" else np.full(nrow, "", dtype=object)
+        elif f == "names":
+            cols[f] = params[:, j]
+        else:
+            cols[f] = pd.to_numeric(pd.Series(params[:, j]), errors="coerce").to_numpy(float)
+
+    reps = np.maximum(loop_counts, 1)
+    blocks = [("repeat" if r > 1 else "single", int(a), int(b), int(r))
+              for a, b, r in zip(starts, ends, reps)]
+    return LayerModel(
+        params=params,
+        blocks=blocks,
+        block_names=[str(s) for s in sub[last]],
+        loop_counts=loop_counts,
+        file_row=order,
+        **cols,
+    )
+
+
+# -----------------------------------------------------------------------
+#  Project bundles
+# -----------------------------------------------------------------------
+
+PROJECT_VERSION = 1
+
+_LAYER_ARRAYS = ("names", "n", "k", "thickness", "density", "roughness",
+                 "params", "loop_counts", "file_row")
+
+
+def _put(zf: zipfile.ZipFile, name: str, arr: np.ndarray) -> None:
+    arr = np.asarray(arr)
+    if arr.dtype == object:
+        arr = arr.astype(str)  # fixed-width unicode: no pickle needed to read back
+    with zf.open(name, "w", force_zip64=True) as f:
+        np.lib.format.write_array(f, arr, allow_pickle=False)
+
+
+def save_project(
+    filepath: str,
+    model: LayerModel,
+    *,
+    layer_nk: Optional[List[str]] = None,
+    nk: Optional[Dict[str, Dict[str, np.ndarray]]] = None,
+    measurements: Optional[Dict[str, Dict[str, np.ndarray]]] = None,
+    fit_history: Optional[List[Dict[str, Any]]] = None,
+    meta: Optional[Dict[str, Any]] = None,
+    compress: bool = True,
+) -> None:
+    """Save a project bundle (zip of a JSON manifest and ``.npy`` arrays).
+
+    Parameters
+    ----------
+    filepath : str
+        Destination, conventionally ``*.xrp``.  Written to a temporary file
+        and moved into place, so a failed save leaves the old file intact.
+    model : LayerModel
+        Layer arrays and repeat blocks.
+    layer_nk : list of str or None
+        Per layer (model order) key into *nk*, ``""`` for none.
+    nk : dict of name -> dict of arrays or None
+        Attached nk tables, e.g. ``{"Mo.nk": {"lam_nm": ..., "n": ..., "k": ...}}``.
+    measurements : dict of name -> dict of arrays or None
+        Measurement data, e.g. ``{"scan1": {"theta": ..., "intensity": ...}}``.
+    fit_history : list of dict or None
+        JSON-serialisable fit records (method, chi², parameters, ...).
+    meta : dict or None
+        Free-form JSON-serialisable metadata.
+    compress : bool
+        Deflate array members.
+    """
+    nk = nk or {}
+    measurements = measurements or {}
+    layer_nk = list(layer_nk) if layer_nk is not None else [""] * model.n_layers
+    if len(layer_nk) != model.n_layers:
+        raise ValueError(f"layer_nk has {len(layer_nk)} entries for {model.n_layers} layers")
+    missing = sorted({r for r in layer_nk if r} - set(nk))
+    if missing:
+        raise ValueError(f"layer_nk refers to unknown nk tables: {missing}")
+
+    def _members(prefix: str, groups: Dict[str, Dict[str, np.ndarray]]) -> List[Dict[str, Any]]:
+        return [{"name": g, "prefix": f"{prefix}/{i}/", "arrays": sorted(arrs)}
+                for i, (g, arrs) in enumerate(groups.items())]
+
+    manifest = {
+        "format": "xross-project",
+        "version": PROJECT_VERSION,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "meta": meta or {},
+        "blocks": [list(b) for b in model.blocks],
+        "block_names": list(model.block_names),
+        "layer_nk": layer_nk,
+        "nk": _members("nk", nk),
+        "measurements": _members("data", measurements),
+        "fit_history": fit_history or [],
+    }
+    tmp = filepath + ".tmp"
+    method = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+    try:
+        with zipfile.ZipFile(tmp, "w", compression=method) as zf:
+            zf.writestr("manifest.json", json.dumps(manifest, indent=1))
+            for f in _LAYER_ARRAYS:
+                _put(zf, f"layers/{f}.npy", getattr(model, f))
+            for groups, entries in ((nk, manifest["nk"]), (measurements, manifest["measurements"])):
+                for e in entries:
+                    for a in e["arrays"]:
+                        _put(zf, f"{e['prefix']}{a}.npy", groups[e["name"]][a])
+        os.replace(tmp, filepath)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+class Project:
+    """Lazily loaded project bundle; see :func:`open_project`.
+
+    Only the manifest is read on opening.  Layer arrays, nk tables and
+    measurements are read from the archive on first access and cached.
+    Use as a context manager or call :meth:`close`.
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        try:
+            self._zf = zipfile.ZipFile(filepath, "r")
+        except zipfile.BadZipFile:
+            raise ValueError(f"{filepath} is not an XROSS project (not a zip archive)")
+        try:
+            m = json.loads(self._zf.read("manifest.json"))
+        except KeyError:
+            self._zf.close()
+            raise ValueError(f"{filepath} is not an XROSS project (no manifest)")
+        if m.get("format") != "xross-project" or int(m.get("version", 0)) > PROJECT_VERSION:
+            self._zf.close()
+            raise ValueError(f"Unsupported project format/version in {filepath}: "
+                             f"{m.get('format')} v{m.get('version')}")
+        self.manifest = m
+        self._model: Optional[LayerModel] = None
+        self._cache: Dict[str, Dict[str, np.ndarray]] = {}
+
+    def __enter__(self) -> "Project":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._zf.close()
+
+    @property
+    def version(self) -> int:
+        return int(self.manifest["version"])
+
+    @property
+    def meta(self) -> Dict[str, Any]:
+        return self.manifest["meta"]
+
+    @property
+    def fit_history(self) -> List[Dict[str, Any]]:
+        return self.manifest["fit_history"]
+
+    @property
+    def layer_nk(self) -> List[str]:
+        return self.manifest["layer_nk"]
+
+    @property
+    def nk_names(self) -> List[str]:
+        return [e["name"] for e in self.manifest["nk"]]
+
+    @property
+    def measurement_names(self) -> List[str]:
+        return [e["name"] for e in self.manifest["measurements"]]
+
+    def _get(self, member: str) -> np.ndarray:
+        with self._zf.open(member) as f:
+            return np.lib.format.read_array(f, allow_pickle=False)
+
+    def _group(self, section: str, name: str) -> Dict[str, np.ndarray]:
+        key = f"{section}:{name}"
+        if key not in self._cache:
+            e = next((e for e in self.manifest[section] if e["name"] == name), None)
+            if e is None:
+                raise KeyError(name)
+            self._cache[key] = {a: self._get(f"{e['prefix']}{a}.npy") for a in e["arrays"]}
+        return self._cache[key]
+
+    def layer_model(self) -> LayerModel:
+        """The :class:`LayerModel` (read on first call)."""
+        if self._model is None:
+            arr = {f: self._get(f"layers/{f}.npy") for f in _LAYER_ARRAYS}
+            arr["names"] = arr["names"].astype(object)
+            arr["params"] = arr["params"].astype(object)
+            self._model = LayerModel(
+                blocks=[(str(k), int(a), int(b), int(r)) for k, a, b, r in self.manifest["blocks"]],
+                block_names=list(self.manifest["block_names"]),
+                **arr,
+            )
+        return self._model
+
+    def nk(self, name: str) -> Dict[str, np.ndarray]:
+        """Arrays of the nk table *name*."""
+        return self._group("nk", name)
+
+    def measurement(self, name: str) -> Dict[str, np.ndarray]:
+        """Arrays of the measurement *name*."""
+        return self._group("measurements", name)
+
+
+def open_project(filepath: str) -> Project:
+    """Open a project bundle written by :func:`save_project`.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a project or was written by a newer format
+        version.
+    """
+    return Project(filepath)
 
 
 def save_results_csv(
@@ -86,10 +432,179 @@ def log_message(message: str, log_dir: Optional[str] = None) -> str:
 
     Returns the formatted string.
     """
-    ts = datetime.datetime.now().strftime("%Y/%m/%d %H:%M:%S")
-    line = f"{ts} {message}\n"
+    line = _format_line(datetime.datetime.now(), message)
     if log_dir:
         log_path = os.path.join(log_dir, "log.txt")
         with open(log_path, "a", encoding="utf-8") as f:
             f.write(line)
     return line
+
+
+def _format_line(now: datetime.datetime, message: str) -> str:
+    return f"{now.strftime('%Y/%m/%d %H:%M:%S')} {message}\n"
+
+
+# -----------------------------------------------------------------------
+#  Buffered asynchronous logging
+# -----------------------------------------------------------------------
+
+class AsyncLogger:
+    """Queued logger that writes from a background thread.
+
+    :meth:`log` only formats the line and enqueues it, so callers (fitting
+    workers included) never wait on the file system.  A daemon thread
+    drains the queue in batches every *flush_interval* seconds, appending
+    plain lines to ``<log_dir>/<filename>`` (same format as
+    :func:`log_message`) and, if *jsonl* is set, one JSON record per line
+    to ``<log_dir>/<jsonl>``.  Each file is rotated to ``.1``, ``.2``, ...
+    once it exceeds *max_bytes*, keeping *backup_count* old files.
+
+    Lines are also kept for a GUI: any thread may call :meth:`log`, and the
+    UI thread collects the pending lines with :meth:`drain` (e.g. from a
+    Tk ``after`` loop) so widgets are only touched on that thread.
+
+    Parameters
+    ----------
+    log_dir : str or None
+        Directory of the log files; ``None`` keeps lines for :meth:`drain`
+        only.
+    filename : str
+        Plain-text log file name.
+    jsonl : str or None
+        Structured log file name, or ``None`` to disable.
+    max_bytes : int
+        Rotation threshold per file (0 disables rotation).
+    backup_count : int
+        Rotated files kept.
+    flush_interval : float
+        Longest time (s) a record waits in the queue.
+    max_pending : int
+        Lines kept for :meth:`drain` (oldest dropped first).
+    """
+
+    _BATCH = 10_000
+
+    def __init__(
+        self,
+        log_dir: Optional[str],
+        *,
+        filename: str = "log.txt",
+        jsonl: Optional[str] = "log.jsonl",
+        max_bytes: int = 5_000_000,
+        backup_count: int = 3,
+        flush_interval: float = 0.5,
+        max_pending: int = 10_000,
+    ):
+        self.log_dir = log_dir
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self._paths = []
+        if log_dir:
+            self._paths.append(os.path.join(log_dir, filename))
+            if jsonl:
+                self._paths.append(os.path.join(log_dir, jsonl))
+        self._q: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._pending: deque = deque(maxlen=max_pending)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="xross-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, message: str, level: str = "INFO", **fields: Any) -> str:
+        """Enqueue *message* (with optional JSON *fields*) and return its text line."""
+        now = datetime.datetime.now()
+        line = _format_line(now, message)
+        self._pending.append(line)
+        if not self._closed:
+            self._q.put((now, level, message, fields, line))
+        return line
+
+    def drain(self) -> List[str]:
+        """Pop the lines logged since the last call (for the GUI thread)."""
+        out = []
+        while True:
+            try:
+                out.append(self._pending.popleft())
+            except IndexError:
+                return out
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything logged so far is on disk; False on timeout."""
+        if self._closed or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self._q.put(done)
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        """Flush and stop the writer thread (idempotent; also run at exit)."""
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        self._q.put(None)
+        self._thread.join()
+
+    # -- writer thread --------------------------------------------------
+    def _run(self) -> None:
+        files = [None] * len(self._paths)
+        stop = False
+        try:
+            while not stop:
+                item = self._q.get()
+                deadline = time.monotonic() + self.flush_interval
+                batch, events = [], []
+                while True:  # gather a batch for at most flush_interval
+                    if item is None:
+                        stop = True
+                    elif isinstance(item, threading.Event):
+                        events.append(item)
+                    else:
+                        batch.append(item)
+                    if len(batch) >= self._BATCH:
+                        break
+                    wait = 0.0 if (stop or events) else deadline - time.monotonic()
+                    try:
+                        item = self._q.get(timeout=wait) if wait > 0 else self._q.get_nowait()
+                    except queue.Empty:
+                        break
+                if batch and self._paths:
+                    self._write(files, batch)
+                for e in events:
+                    e.set()
+        finally:
+            for f in files:
+                if f is not None:
+                    f.close()
+
+    def _write(self, files: List[Any], batch: List[Any]) -> None:
+        text = "".join(line for *_, line in batch)
+        chunks = [text]
+        if len(self._paths) > 1:
+            chunks.append("".join(
+                json.dumps({"ts": now.isoformat(timespec="milliseconds"), "level": level,
+                            "msg": msg, **fields}, default=str, ensure_ascii=False) + "\n"
+                for now, level, msg, fields, _ in batch
+            ))
+        for i, (path, data) in enumerate(zip(self._paths, chunks)):
+            try:
+                if files[i] is None:
+                    files[i] = open(path, "a", encoding="utf-8")
+                files[i].write(data)
+                files[i].flush()
+                if self.max_bytes and files[i].tell() > self.max_bytes:
+                    files[i].close()
+                    files[i] = None
+                    self._rotate(path)
+            except OSError:
+                files[i] = None  # unwritable log must never break the caller
+
+    def _rotate(self, path: str) -> None:
+        if self.backup_count <= 0:
+            os.remove(path)
+            return
+        for i in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f"{path}.{i}"):
+                os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+        os.replace(path, f"{path}.1")
@@ -11,9 +11,9 @@ from matplotlib import pyplot as plt
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from xross import __version__
-from xross.fileio import log_message
+from xross.fileio import AsyncLogger, LayerModel, log_message, open_project, read_layer_model, save_project
 
-_root=None; _icon_path=""; _current_dir=""; _console=None; _log_window=None
+_root=None; _icon_path=""; _current_dir=""; _console=None; _log_window=None; _logger=None
 subroutines=[]; orphan_layers=[]
 current_subroutine=None; current_layer=None
 current_file_path=None; is_modified=False
@@ -44,8 +44,13 @@ def _update_title():
     if is_modified: t+=" *"
     _root.title(t)
 def _log(msg):
-    line=log_message(msg,_current_dir)
-    if _console and _console.winfo_exists(): _console.insert(tk.END,line); _console.see(tk.END)
+    # safe from worker threads: only enqueues; _pump_log moves lines to the console on the Tk thread
+    if _logger is None: log_message(msg,_current_dir)
+    else: _logger.log(msg)
+def _pump_log():
+    lines=_logger.drain()
+    if lines and _console and _console.winfo_exists(): _console.insert(tk.END,"".join(lines)); _console.see(tk.END)
+    _root.after(100,_pump_log)
 
 def _find_icon():
     """Search favicon.ico in multiple locations."""
@@ -244,48 +249,59 @@ def all_clear():
 
 # === File ops ===
 def _save_state(fp):
-    rows,mp=[],0
+    rows,mp,cells=[],0,[]
     for o in subroutines:
         if isinstance(o,Subroutine):
-            for c in o.cells: p=[e.get() for e in c.entries]; rows.append([o.name,str(o.loop_count)]+p); mp=max(mp,len(p))
-        elif isinstance(o,Cell): p=[e.get() for e in o.entries]; rows.append(["Orphan",""]+p); mp=max(mp,len(p))
+            for c in o.cells: p=[e.get() for e in c.entries]; rows.append([o.name,str(o.loop_count)]+p); mp=max(mp,len(p)); cells.append(c)
+        elif isinstance(o,Cell): p=[e.get() for e in o.entries]; rows.append(["Orphan",""]+p); mp=max(mp,len(p)); cells.append(o)
+    if fp.lower().endswith(".xrp"):
+        # binary project: typed arrays + attached nk tables (keyed by source path)
+        m=LayerModel.from_rows([{"subroutine":r[0],"loop_count":r[1],"params":r[2:]} for r in rows])
+        nk={c.nk_path:c.nk_data for c in cells if c.nk_data is not None}
+        lnk=[cells[i].nk_path if cells[i].nk_data is not None else "" for i in m.file_row.tolist()]
+        save_project(fp,m,layer_nk=lnk,nk=nk,meta={"version":__version__,"columns":COLUMN_HEADERS[1:]})
+        _log(f"Saved {fp}"); mark_as_unmodified(); return
     hdr=["Subroutine","Loop Count"]+[f"Param{i+1}" for i in range(mp)]
     fx=[(r+[""]*(len(hdr)-len(r)))[:len(hdr)] for r in rows]
     with open(fp,"w",newline="",encoding="utf-8") as f: w=csv.writer(f); w.writerow(hdr); w.writerows(fx)
     _log(f"Saved {fp}"); mark_as_unmodified()
 def _load_state(fp):
-    df=pd.read_csv(fp,dtype=str).fillna(""); clear_current_state()
-    for _,row in df.iterrows():
-        nm,lp,params=row["Subroutine"],row["Loop Count"],list(row.iloc[2:].values)
-        if nm=="Orphan":
-            c=Cell(param_frame)
-            for e,v in zip_longest(c.entries,params,fillvalue=""): e.delete(0,tk.END); e.insert(0,v)
-            orphan_layers.append(c); subroutines.append(c); continue
-        sub=next((s for s in subroutines if isinstance(s,Subroutine) and s.name==nm),None)
-        if sub is None: sub=Subroutine(nm,param_frame); subroutines.append(sub)
-        try: sub.loop_count=int(lp) if str(lp).strip() else 1
-        except: sub.loop_count=1
-        sub.label.config(text=f"{sub.name}({sub.loop_count})")
-        c=Cell(sub.cells_frame)
-        for e,v in zip_longest(c.entries,params,fillvalue=""): e.delete(0,tk.END); e.insert(0,v)
-        sub.cells.append(c)
+    pr=open_project(fp) if fp.lower().endswith(".xrp") else None
+    try:
+        m=pr.layer_model() if pr else read_layer_model(fp)  # one columnar parse, rows already grouped into blocks
+        clear_current_state()
+        def _fill(c,i):
+            for e,v in zip_longest(c.entries,m.params[i].tolist(),fillvalue=""): e.delete(0,tk.END); e.insert(0,v)
+            ref=pr.layer_nk[i] if pr else ""
+            if ref:
+                c.nk_data=pr.nk(ref); c.nk_path=ref
+                c.nk_entry.config(state="normal"); c.nk_var.set(os.path.basename(ref)); c.nk_entry.config(state="disabled")
+        for (_,i0,i1,_),nm,lc in zip(m.blocks,m.block_names,m.loop_counts.tolist()):
+            if nm=="Orphan":
+                c=Cell(param_frame); _fill(c,i0); orphan_layers.append(c); subroutines.append(c); continue
+            sub=Subroutine(nm,param_frame); subroutines.append(sub); sub.loop_count=lc
+            sub.label.config(text=f"{sub.name}({sub.loop_count})")
+            for i in range(i0,i1): c=Cell(sub.cells_frame); _fill(c,i); sub.cells.append(c)
+    finally:
+        if pr: pr.close()
     mark_as_unmodified()
 def open_file():
     global current_file_path
-    fp=filedialog.askopenfilename(initialdir=os.path.join(_current_dir,"geo"),filetypes=[("CSV","*.csv")])
+    fp=filedialog.askopenfilename(initialdir=os.path.join(_current_dir,"geo"),filetypes=[("Layer model","*.csv *.xrp"),("CSV","*.csv"),("XROSS project","*.xrp")])
     if fp: _load_state(fp); current_file_path=fp; _update_title()
 def save_file():
     if current_file_path: _save_state(current_file_path)
     else: save_as_file()
 def save_as_file():
     global current_file_path
-    fp=filedialog.asksaveasfilename(initialdir=os.path.join(_current_dir,"geo"),defaultextension=".csv",filetypes=[("CSV","*.csv")])
+    fp=filedialog.asksaveasfilename(initialdir=os.path.join(_current_dir,"geo"),defaultextension=".csv",filetypes=[("CSV","*.csv"),("XROSS project","*.xrp")])
     if fp: _save_state(fp); current_file_path=fp; _update_title()
 def on_exit():
     if is_modified:
         r=messagebox.askyesnocancel("Save?","Save changes?")
         if r is None: return
         if r: save_file()
+    if _logger: _logger.close()
     _root.destroy()
 
 # === Edit menu functions ===
@@ -416,9 +432,10 @@ def open_web_manual():
 
 # === run() ===
 def run():
-    global _root,_icon_path,_current_dir,label_frame,param_frame,button_frame
+    global _root,_icon_path,_current_dir,label_frame,param_frame,button_frame,_logger
     _root=tk.Tk(); _root.geometry("620x420")
     _current_dir=os.path.dirname(os.path.abspath(sys.argv[0])) if sys.argv[0] else os.getcwd()
+    _logger=AsyncLogger(_current_dir)
     _icon_path=_find_icon()
     _set_icon(_root)
     if platform.system()=="Windows":
@@ -465,7 +482,7 @@ def run():
     for c,w in enumerate(_px): label_frame.grid_columnconfigure(c,weight=(1 if c==cn else 0),minsize=w)
     _root.bind("<Control-o>",lambda e:open_file()); _root.bind("<Control-s>",lambda e:save_file()); _root.bind("<Control-Alt-s>",lambda e:save_as_file()); _root.bind("<Control-e>",lambda e:on_exit())
     _root.bind("<F1>",lambda e:_open_euv()); _root.bind("<F2>",lambda e:_open_xrr()); _root.bind("<F3>",lambda e:_open_opt()); _root.bind("<F4>",lambda e:_open_image())
-    _root.protocol("WM_DELETE_WINDOW",on_exit); create_log_window(); _log_window.withdraw()
+    _root.protocol("WM_DELETE_WINDOW",on_exit); create_log_window(); _log_window.withdraw(); _pump_log()
     # Default substrate (Si, bottom layer)
     # Layer order: top = surface (first row), bottom = substrate (last row)
     _sub_cell=Cell(param_frame)
@@ -4,12 +4,13 @@ xross.gui.opt_window — Optimization (Optuna-based, Multi-Sigma style).
 Workflow:
   1. Load CSV
   2. Assign X (explanatory) / Y (objective) variables
-  3. Train surrogate model (IDW interpolation from data)
+  3. Train surrogate model (IDW interpolation or Gaussian process)
   4. Set direction (minimize/maximize) & constraints (bounds)
   5. Optimize via Optuna (TPE / NSGA-II / CMA-ES)
   6. View Pareto front / optimization history
-  7. Predict (single point or batch CSV)
-  8. Profiling (statistics, correlation, histograms)
+  7. Recommend the next batch of experiments (GP expected improvement)
+  8. Predict (single point or batch CSV)
+  9. Profiling (statistics, correlation, histograms; streamed and cached)
 """
 from __future__ import annotations
 import datetime, os, threading
@@ -18,61 +19,15 @@ from tkinter import filedialog, messagebox, ttk
 import numpy as np, pandas as pd
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+from xross.optimize import OptimizationProblem, nsga2, optuna_batch_search
+from xross.profiling import profile_dataframe
+from xross.surrogate import GPSurrogate, IDWSurrogate, predict_csv, recommend_batch
 
+GP_MAX_ROWS = 2000  # the GP fit is O(n^3); larger data is randomly subsampled
 
-def open_opt_window(root, icon_path, current_dir, log_fn, place_near_root):
 
-    # --- Surrogate: Inverse Distance Weighting ---
-    class IDWSurrogate:
-        """Simple IDW surrogate model (no sklearn needed)."""
-        def __init__(self, X, Y):
-            self.X = np.asarray(X, float)
-            self.Y = np.asarray(Y, float)
-            self.xmin = self.X.min(0); self.xmax = self.X.max(0)
-            self.xrng = np.where(self.xmax - self.xmin < 1e-12, 1.0, self.xmax - self.xmin)
-            self.Xn = (self.X - self.xmin) / self.xrng
-            # Importance: variance-based
-            self.importance = self._calc_importance()
-
-        def predict(self, xnew):
-            xnew = np.atleast_2d(xnew)
-            out = np.zeros((xnew.shape[0], self.Y.shape[1]))
-            for i in range(xnew.shape[0]):
-                xn = (xnew[i] - self.xmin) / self.xrng
-                d = np.sqrt(np.sum((self.Xn - xn) ** 2, axis=1))
-                d = np.clip(d, 1e-12, None)
-                w = 1.0 / d ** 2; w /= w.sum()
-                out[i] = (w[:, None] * self.Y).sum(0)
-            return out
-
-        def _calc_importance(self):
-            """Estimate variable importance via leave-one-variable-out variance."""
-            n_x = self.X.shape[1]; n_y = self.Y.shape[1]
-            imp = np.zeros((n_y, n_x))
-            base_pred = self.predict(self.X)
-            base_mse = np.mean((base_pred - self.Y) ** 2, axis=0)
-            for j in range(n_x):
-                Xp = self.X.copy()
-                np.random.seed(42); Xp[:, j] = np.random.permutation(Xp[:, j])
-                perm_pred = self.predict(Xp)
-                perm_mse = np.mean((perm_pred - self.Y) ** 2, axis=0)
-                imp[:, j] = perm_mse - base_mse
-            imp = np.clip(imp, 0, None)
-            row_sum = imp.sum(1, keepdims=True)
-            row_sum = np.where(row_sum < 1e-12, 1.0, row_sum)
-            return imp / row_sum
-
-        def score_text(self):
-            pred = self.predict(self.X)
-            lines = []
-            for j in range(self.Y.shape[1]):
-                ss_res = np.sum((self.Y[:, j] - pred[:, j]) ** 2)
-                ss_tot = np.sum((self.Y[:, j] - self.Y[:, j].mean()) ** 2)
-                r2 = 1.0 - ss_res / max(ss_tot, 1e-12)
-                lines.append(f"  LOO-R² ≈ {r2:.4f}")
-            return "\n".join(lines)
-
-    state = {"df": None, "x_cols": [], "y_cols": [], "model": None, "study": None}
+def open_opt_window(root, icon_path, current_dir, log_fn, place_near_root):
+    state = {"df": None, "x_cols": [], "y_cols": [], "model": None, "study": None, "profile": None}
 
     win = tk.Toplevel(root)
     if icon_path and os.path.exists(icon_path):
@@ -122,6 +77,11 @@ def open_opt_window(root, icon_path, current_dir, log_fn, place_near_root):
     tk.Label(sf, text="Sampler:").grid(row=0, column=2, sticky="e")
     scb = ttk.Combobox(sf, values=["TPE", "NSGA-II", "CMA-ES"], state="readonly", width=10)
     scb.set("TPE"); scb.grid(row=0, column=3, padx=4)
+    tk.Label(sf, text="Model:").grid(row=0, column=4, sticky="e")
+    mcb = ttk.Combobox(sf, values=["IDW", "GP"], state="readonly", width=6)
+    mcb.set("IDW"); mcb.grid(row=0, column=5, padx=4)
+    tk.Label(sf, text="Batch q:").grid(row=0, column=6, sticky="e")
+    qv = tk.IntVar(value=4); tk.Entry(sf, textvariable=qv, width=5).grid(row=0, column=7, padx=4)
 
     # 4. Direction
     df_ = tk.LabelFrame(win, text="4. Direction", padx=6, pady=4); df_.pack(fill="x", padx=8, pady=2)
@@ -159,6 +119,7 @@ def open_opt_window(root, icon_path, current_dir, log_fn, place_near_root):
     tk.Button(af, text="Importance", width=12, command=lambda: _imp()).grid(row=0, column=3, padx=4)
     tk.Button(af, text="Optimize", width=12, bg="#337ab7", fg="white", command=lambda: _opt()).grid(row=0, column=4, padx=4)
     tk.Button(af, text="Predict", width=12, command=lambda: _pred()).grid(row=0, column=5, padx=4)
+    tk.Button(af, text="Recommend", width=12, command=lambda: _rec()).grid(row=0, column=6, padx=4)
 
     nb = ttk.Notebook(win); nb.pack(fill="both", expand=True, padx=8, pady=(0, 8))
     rt = tk.Text(nb, wrap="word", height=12); nb.add(rt, text="Log / Results")
@@ -170,7 +131,7 @@ def open_opt_window(root, icon_path, current_dir, log_fn, place_near_root):
         if not fp: return
         df = pd.read_csv(fp).select_dtypes(include=[np.number])
         if df.shape[1] < 2: messagebox.showerror("Error", "Need >= 2 numeric columns."); return
-        state["df"] = df; state["model"] = None; state["study"] = None
+        state["df"] = df; state["model"] = None; state["study"] = None; state["profile"] = None
         pv.set(fp); iv.set(f"{df.shape[0]} rows x {df.shape[1]} cols ({os.path.basename(fp)})")
         _rst(); log_fn(f"Opt CSV: {fp}")
         rt.delete("1.0", tk.END)
@@ -183,40 +144,76 @@ def open_opt_window(root, icon_path, current_dir, log_fn, place_near_root):
         _syn(); xc, yc = state["x_cols"], state["y_cols"]
         if not xc or not yc: messagebox.showerror("", "Assign X and Y variables."); return
         _rd(); _rc()
-        X = df[xc].values; Y = df[yc].values
-        model = IDWSurrogate(X, Y)
-        state["model"] = model
-        rt.delete("1.0", tk.END)
-        rt.insert(tk.END, f"=== Surrogate Model Trained ===\n\n")
-        rt.insert(tk.END, f"Method: IDW (Inverse Distance Weighting)\n")
-        rt.insert(tk.END, f"Data: {X.shape[0]} samples, {X.shape[1]} X-vars, {Y.shape[1]} Y-vars\n\n")
-        rt.insert(tk.END, f"Training fit:\n{model.score_text()}\n\n")
-        rt.insert(tk.END, "Ready to Optimize or Predict.\n")
-        log_fn("Surrogate trained (IDW)")
+        X = df[xc].values; Y = df[yc].values; kind = mcb.get()
+        log_fn(f"Training surrogate ({kind})...")
+        def _run():
+            try:
+                if kind == "GP":
+                    Xg, Yg = X, Y
+                    if len(X) > GP_MAX_ROWS: i = np.random.default_rng(0).choice(len(X), GP_MAX_ROWS, replace=False); Xg, Yg = X[i], Y[i]
+                    model = GPSurrogate(Xg, Yg)
+                    meth = f"GP (squared-exponential, length scale {model.length_scale[0]:.3g}, noise {model.noise:.1e})"
+                    if len(Xg) < len(X): meth += f", fit on a {len(Xg)}-row random subset"
+                else:
+                    knn = 64 if X.shape[0] > 20000 else None  # large sets: KD-tree k-NN
+                    model = IDWSurrogate(X, Y, k=knn)
+                    meth = f"IDW (Inverse Distance Weighting){f', {knn}-NN' if knn else ''}"
+                score = model.score_text(list(yc))
+            except Exception as e: msg = str(e); win.after(0, lambda: messagebox.showerror("Error", msg)); return
+            win.after(0, lambda: _show(model, meth, score))
+        def _show(model, meth, score):
+            state["model"] = model
+            rt.delete("1.0", tk.END)
+            rt.insert(tk.END, f"=== Surrogate Model Trained ===\n\n")
+            rt.insert(tk.END, f"Method: {meth}\n")
+            rt.insert(tk.END, f"Data: {X.shape[0]} samples, {X.shape[1]} X-vars, {Y.shape[1]} Y-vars\n\n")
+            rt.insert(tk.END, f"Cross-validation (held-out predictions):\n{score}\n\n")
+            rt.insert(tk.END, "Ready to Optimize or Predict.\n")
+            log_fn(f"Surrogate trained ({kind})")
+        threading.Thread(target=_run, daemon=True).start()
 
     def _imp():
         model = state["model"]
         if model is None: messagebox.showwarning("", "Train first."); return
         xc, yc = state["x_cols"], state["y_cols"]
-        iw = tk.Toplevel(win); iw.title("Variable Importance"); iw.geometry("700x500"); place_near_root(iw)
-        nc = len(yc); fig = Figure(figsize=(5 * nc, 4), dpi=100)
-        for j, yn in enumerate(yc):
-            ax = fig.add_subplot(1, nc, j + 1)
-            imp = model.importance[j]
-            idx = np.argsort(imp)
-            ax.barh([xc[k] for k in idx], imp[idx], color="#5cb85c")
-            ax.set_xlabel("Importance"); ax.set_title(yn, fontsize=10)
-        fig.tight_layout()
-        cvs = FigureCanvasTkAgg(fig, master=iw); cvs.draw(); cvs.get_tk_widget().pack(fill="both", expand=True)
-        NavigationToolbar2Tk(cvs, iw)
-        log_fn("Importance computed.")
+        log_fn("Computing importance (5 repeats)...")
+        def _run():
+            try: pi = model.permutation_importance(n_jobs=None)
+            except Exception as e: msg = str(e); win.after(0, lambda: messagebox.showerror("Error", msg)); return
+            win.after(0, lambda: _show(pi))
+        def _show(pi):
+            iw = tk.Toplevel(win); iw.title("Variable Importance"); iw.geometry("700x500"); place_near_root(iw)
+            nc = len(yc); fig = Figure(figsize=(5 * nc, 4), dpi=100)
+            # normalise mean and CI by the same row sum so error bars stay comparable
+            scale = np.clip(pi.mean, 0, None).sum(1); scale = np.where(scale < 1e-12, 1.0, scale)
+            for j, yn in enumerate(yc):
+                ax = fig.add_subplot(1, nc, j + 1)
+                imp = np.clip(pi.mean[j], 0, None) / scale[j]; err = (pi.ci_high[j] - pi.mean[j]) / scale[j]
+                idx = np.argsort(imp)
+                ax.barh([xc[k] for k in idx], imp[idx], xerr=err[idx], color="#5cb85c", ecolor="#333", capsize=2)
+                ax.set_xlabel("Importance (95% CI)"); ax.set_title(yn, fontsize=10)
+            fig.tight_layout()
+            cvs = FigureCanvasTkAgg(fig, master=iw); cvs.draw(); cvs.get_tk_widget().pack(fill="both", expand=True)
+            NavigationToolbar2Tk(cvs, iw)
+            log_fn("Importance computed.")
+        threading.Thread(target=_run, daemon=True).start()
+
+    def _bounds(xc):
+        lo = np.array([float(cvars[c][0].get()) if c in cvars else float(state["df"][c].min()) for c in xc])
+        hi = np.array([float(cvars[c][1].get()) if c in cvars else float(state["df"][c].max()) for c in xc])
+        return lo, hi
+
+    def _save(pdf, tag):
+        sd = os.path.join(current_dir, "save"); os.makedirs(sd, exist_ok=True)
+        ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        out = os.path.join(sd, f"{ts}_{tag}.csv"); pdf.to_csv(out, index=False); return out
 
     def _opt():
         model = state["model"]
         if model is None: messagebox.showwarning("", "Train first."); return
         try:
             import optuna
-            from optuna.samplers import TPESampler, NSGAIISampler, CmaEsSampler
+            from optuna.samplers import TPESampler, CmaEsSampler
             optuna.logging.set_verbosity(optuna.logging.WARNING)
         except Exception as e:
             messagebox.showerror("Error", f"optuna import failed:\n{e}"); return
@@ -224,65 +221,96 @@ def open_opt_window(root, icon_path, current_dir, log_fn, place_near_root):
         xc, yc = state["x_cols"], state["y_cols"]
         dirs = [dvs.get(c, tk.StringVar(value="minimize")).get() for c in yc]
         n_trials = max(10, tv.get())
-        lo = np.array([float(cvars[c][0].get()) if c in cvars else float(state["df"][c].min()) for c in xc])
-        hi = np.array([float(cvars[c][1].get()) if c in cvars else float(state["df"][c].max()) for c in xc])
-
-        def surrogate_eval(xnew):
-            return model.predict(np.atleast_2d(xnew))[0]
+        lo, hi = _bounds(xc)
 
+        # NSGA-II runs the built-in vectorised nsga2 on multi-objective problems; CMA-ES is
+        # single-objective only, so (as NSGA-II for one objective) it falls back to TPE
+        is_multi = len(yc) > 1; sname = scb.get()
+        algo = "NSGA-II" if is_multi and sname == "NSGA-II" else "CMA-ES" if not is_multi and sname == "CMA-ES" else "TPE"
         rt.delete("1.0", tk.END)
-        rt.insert(tk.END, f"Optuna: {n_trials} trials, sampler={scb.get()}\n")
+        if algo == "NSGA-II": rt.insert(tk.END, f"NSGA-II (built-in): {n_trials} evaluations\n")
+        else: rt.insert(tk.END, f"Optuna: {n_trials} trials, sampler={algo}{'' if algo == sname else f' ({sname} n/a)'}\n")
         rt.insert(tk.END, f"X: {xc}\nY: {yc}\nDirections: {dirs}\n\n")
         win.update_idletasks()
 
         def _run():
-            is_multi = len(yc) > 1
-            sname = scb.get()
-
-            if is_multi:
-                sampler = NSGAIISampler(seed=42) if sname == "NSGA-II" else TPESampler(seed=42)
-                study = optuna.create_study(directions=dirs, sampler=sampler)
-                def objective(trial):
-                    xv = [trial.suggest_float(c, float(lo[i]), float(hi[i])) for i, c in enumerate(xc)]
-                    return tuple(surrogate_eval(xv))
-                study.optimize(objective, n_trials=n_trials, show_progress_bar=False)
+            cols = list(xc) + [f"{c}(pred)" for c in yc]
+
+            if algo == "NSGA-II":
+                # whole populations through one predict call per generation (Optuna's
+                # per-trial overhead dominates multi-objective searches of 1000s of trials)
+                sg = np.array([1.0 if d == "minimize" else -1.0 for d in dirs])
+                prob = OptimizationProblem(len(xc), len(yc), lo, hi, sg, model.predict)
+                n_pop = int(min(100, max(20, n_trials // 20))); n_gen = max(1, -(-n_trials // n_pop) - 1)
+                px, po = nsga2(prob, n_pop=n_pop, n_gen=n_gen, seed=42)
+                order = np.argsort(po[:, 0] * sg[0])
+                pdf = pd.DataFrame(np.hstack([px, po])[order], columns=cols)
+                state["study"] = None; out = _save(pdf, "pareto")
+                def _sh():
+                    rt.insert(tk.END, f"\nNSGA-II ({n_pop} x {n_gen + 1} evaluations)\n")
+                    rt.insert(tk.END, f"Pareto front: {len(pdf)} solutions\nSaved: {out}\n\n")
+                    rt.insert(tk.END, pdf.head(30).to_string(index=False) + "\n")
+                    log_fn(f"NSGA-II -> {out}"); _plot_pareto(pdf, yc)
+                win.after(0, _sh)
+            elif is_multi:
+                # batched ask/tell: one predict call per 64 trials, all objectives at once
+                study = optuna_batch_search(model.predict, lo, hi, dirs, n_trials=n_trials, names=list(xc),
+                                            sampler=TPESampler(seed=42, constant_liar=True))
                 state["study"] = study
-                pareto = study.best_trials
-                rows = [[t.params[c] for c in xc] + list(t.values) for t in pareto]
-                cols = list(xc) + [f"{c}(pred)" for c in yc]
-                pdf = pd.DataFrame(rows, columns=cols)
-                sd = os.path.join(current_dir, "save"); os.makedirs(sd, exist_ok=True)
-                ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                out = os.path.join(sd, f"{ts}_pareto.csv"); pdf.to_csv(out, index=False)
+                rows = [[t.params.get(c, lo[i]) for i, c in enumerate(xc)] + list(t.values) for t in study.best_trials]
+                pdf = pd.DataFrame(rows, columns=cols); out = _save(pdf, "pareto")
                 def _sh():
                     rt.insert(tk.END, f"\nPareto front: {len(pdf)} solutions\nSaved: {out}\n\n")
                     rt.insert(tk.END, pdf.head(30).to_string(index=False) + "\n")
-                    log_fn(f"NSGA-II -> {out}"); _plot_pareto(pdf, yc)
+                    log_fn(f"TPE -> {out}"); _plot_pareto(pdf, yc)
                 win.after(0, _sh)
             else:
-                sampler = CmaEsSampler(seed=42) if sname == "CMA-ES" else TPESampler(seed=42)
-                study = optuna.create_study(direction=dirs[0], sampler=sampler)
-                def objective(trial):
-                    xv = [trial.suggest_float(c, float(lo[i]), float(hi[i])) for i, c in enumerate(xc)]
-                    return float(surrogate_eval(xv)[0])
-                study.optimize(objective, n_trials=n_trials, show_progress_bar=False)
+                sampler = CmaEsSampler(seed=42) if algo == "CMA-ES" else TPESampler(seed=42, constant_liar=True)
+                # batched ask/tell: one predict call per 64 trials
+                study = optuna_batch_search(lambda X: model.predict(X)[:, 0], lo, hi, dirs,
+                                            n_trials=n_trials, names=list(xc), sampler=sampler)
                 state["study"] = study
                 bp = study.best_params; bv = study.best_value
-                rows = [[t.params.get(c, 0) for c in xc] + [t.value] for t in study.trials if t.value is not None]
-                cols = list(xc) + [f"{yc[0]}(pred)"]
-                pdf = pd.DataFrame(rows, columns=cols)
-                sd = os.path.join(current_dir, "save"); os.makedirs(sd, exist_ok=True)
-                ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                out = os.path.join(sd, f"{ts}_optuna.csv"); pdf.to_csv(out, index=False)
+                rows = [[t.params.get(c, lo[i]) for i, c in enumerate(xc)] + [t.value] for t in study.trials if t.value is not None]
+                pdf = pd.DataFrame(rows, columns=cols); out = _save(pdf, "optuna")
                 def _sh():
                     rt.insert(tk.END, f"\nBest {yc[0]}: {bv:.6g}\n")
-                    for c in xc: rt.insert(tk.END, f"  {c} = {bp[c]:.6g}\n")
+                    for i, c in enumerate(xc): rt.insert(tk.END, f"  {c} = {bp.get(c, lo[i]):.6g}\n")
                     rt.insert(tk.END, f"\nSaved: {out}\n")
-                    log_fn(f"TPE -> {out}"); _plot_history(study, yc[0])
+                    log_fn(f"{algo} -> {out}"); _plot_history(study, yc[0])
                 win.after(0, _sh)
 
         threading.Thread(target=_run, daemon=True).start()
 
+    def _rec():
+        model = state["model"]
+        if model is None: messagebox.showwarning("", "Train first."); return
+        xc, yc = state["x_cols"], state["y_cols"]
+        dirs = [dvs.get(c, tk.StringVar(value="minimize")).get() for c in yc]
+        q = max(1, qv.get()); lo, hi = _bounds(xc)
+        log_fn(f"Recommending {q} experiments...")
+        def _run():
+            try:
+                gp = model
+                if not isinstance(gp, GPSurrogate):
+                    # EI needs predictive variance: fit a GP on at most GP_MAX_ROWS rows
+                    X, Y = model.X, model.Y
+                    if len(X) > GP_MAX_ROWS: i = np.random.default_rng(0).choice(len(X), GP_MAX_ROWS, replace=False); X, Y = X[i], Y[i]
+                    gp = GPSurrogate(X, Y)
+                Xr, acq, mu, sd = recommend_batch(gp, lo, hi, q, dirs)
+            except Exception as e: msg = str(e); win.after(0, lambda: messagebox.showerror("Error", msg)); return
+            crit = "EI" if len(yc) == 1 else "EHVI"
+            pdf = pd.DataFrame(np.hstack([Xr, mu, sd, acq[:, None]]),
+                               columns=list(xc) + [f"{c}(pred)" for c in yc] + [f"{c}(std)" for c in yc] + [crit])
+            out = _save(pdf, "recommend")
+            def _sh():
+                rt.delete("1.0", tk.END)
+                rt.insert(tk.END, f"=== Recommended batch (q={len(pdf)}, {crit}, kriging believer) ===\n\n")
+                rt.insert(tk.END, pdf.to_string(index=False) + f"\n\nSaved: {out}\n")
+                log_fn(f"Recommend -> {out}")
+            win.after(0, _sh)
+        threading.Thread(target=_run, daemon=True).start()
+
     def _plot_pareto(pdf, yc):
         for w in gf.winfo_children(): w.destroy()
         ypc = [f"{c}(pred)" for c in yc]
@@ -328,6 +356,14 @@ def open_opt_window(root, icon_path, current_dir, log_fn, place_near_root):
             try: pw.iconbitmap(icon_path)
             except: pass
         pw.title("Prediction"); pw.geometry("500x420"); place_near_root(pw)
+        closed = threading.Event()  # stops a running CSV stream when the window goes away
+        def _close(): closed.set(); pw.destroy()
+        pw.protocol("WM_DELETE_WINDOW", _close)
+        def _ui(fn):
+            """Schedule *fn* on the Tk thread unless the window has been closed."""
+            if closed.is_set(): return
+            try: pw.after(0, lambda: pw.winfo_exists() and fn())
+            except tk.TclError: closed.set()
         tk.Label(pw, text="Enter X values:", font=("Arial", 10)).pack(pady=4)
         ifr = tk.Frame(pw); ifr.pack(fill="x", padx=10)
         xes = {}
@@ -346,19 +382,24 @@ def open_opt_window(root, icon_path, current_dir, log_fn, place_near_root):
         def _do_batch():
             fp = filedialog.askopenfilename(filetypes=[("CSV", "*.csv")])
             if not fp: return
-            try:
-                dn = pd.read_csv(fp); miss = [c for c in xc if c not in dn.columns]
-                if miss: messagebox.showerror("Error", f"Missing cols: {miss}"); return
-                Xb = dn[xc].values.astype(float); Yp = model.predict(Xb)
-                res = dn.copy()
-                for j, yn in enumerate(yc): res[f"{yn}(pred)"] = Yp[:, j]
-                sd = os.path.join(current_dir, "save"); os.makedirs(sd, exist_ok=True)
-                ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                out = os.path.join(sd, f"{ts}_prediction.csv"); res.to_csv(out, index=False)
-                ot.delete("1.0", tk.END); ot.insert(tk.END, f"Batch: {len(Xb)} rows\nSaved: {out}\n\n")
-                ot.insert(tk.END, res.head(20).to_string(index=False) + "\n")
-                log_fn(f"Batch prediction -> {out}")
-            except Exception as e: messagebox.showerror("Error", str(e))
+            sd = os.path.join(current_dir, "save"); os.makedirs(sd, exist_ok=True)
+            ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            out = os.path.join(sd, f"{ts}_prediction.csv")
+            ot.delete("1.0", tk.END); ot.insert(tk.END, f"Predicting {os.path.basename(fp)} ...\n")
+            def _tick(n): _ui(lambda: (ot.delete("1.0", tk.END), ot.insert(tk.END, f"{n} rows predicted ...\n")))
+            def _run():
+                # chunked read -> predict -> append keeps memory flat for multi-million-row grids
+                try:
+                    n = predict_csv(model, fp, out, xc, yc, progress=_tick, stop_event=closed)
+                    if closed.is_set(): win.after(0, lambda: log_fn("Batch prediction cancelled.")); return
+                    head = pd.read_csv(out, nrows=20)
+                except Exception as e: msg = str(e); _ui(lambda: messagebox.showerror("Error", msg)); return
+                def _sh():
+                    ot.delete("1.0", tk.END); ot.insert(tk.END, f"Batch: {n} rows\nSaved: {out}\n\n")
+                    ot.insert(tk.END, head.to_string(index=False) + "\n")
+                    log_fn(f"Batch prediction -> {out}")
+                _ui(_sh)
+            threading.Thread(target=_run, daemon=True).start()
 
         bf = tk.Frame(pw); bf.pack(pady=4)
         tk.Button(bf, text="Predict (single)", width=16, command=_do_single).pack(side="left", padx=4)
@@ -369,27 +410,38 @@ def open_opt_window(root, icon_path, current_dir, log_fn, place_near_root):
         if df is None: messagebox.showwarning("", "Load CSV first."); return
         pw = tk.Toplevel(win); pw.title("Profiling"); pw.geometry("800x600"); place_near_root(pw)
         pn = ttk.Notebook(pw); pn.pack(fill="both", expand=True)
-        # Statistics
         st = tk.Text(pn, wrap="none"); pn.add(st, text="Statistics")
-        desc = df.describe().T; desc["missing"] = df.isnull().sum(); st.insert(tk.END, desc.to_string())
-        # Correlation
         cf2 = tk.Frame(pn); pn.add(cf2, text="Correlation")
-        corr = df.corr(); fig = Figure(figsize=(6, 5), dpi=100); ax = fig.add_subplot(111)
-        im = ax.imshow(corr.values, cmap="RdBu_r", vmin=-1, vmax=1)
-        ax.set_xticks(range(len(corr.columns))); ax.set_yticks(range(len(corr.columns)))
-        ax.set_xticklabels(corr.columns, rotation=45, ha="right", fontsize=7)
-        ax.set_yticklabels(corr.columns, fontsize=7); fig.colorbar(im, ax=ax); fig.tight_layout()
-        FigureCanvasTkAgg(fig, master=cf2).get_tk_widget().pack(fill="both", expand=True)
-        # Histograms
         hf = tk.Frame(pn); pn.add(hf, text="Histograms")
-        nc2 = min(4, len(df.columns)); nr2 = (len(df.columns) + nc2 - 1) // nc2
-        fig2 = Figure(figsize=(3 * nc2, 2.5 * nr2), dpi=90)
-        for idx, c in enumerate(df.columns):
-            ax2 = fig2.add_subplot(nr2, nc2, idx + 1)
-            ax2.hist(df[c].dropna(), bins=20, alpha=0.8, edgecolor="black"); ax2.set_title(c, fontsize=8); ax2.tick_params(labelsize=6)
-        fig2.tight_layout()
-        cvs2 = FigureCanvasTkAgg(fig2, master=hf); cvs2.draw(); cvs2.get_tk_widget().pack(fill="both", expand=True)
-        NavigationToolbar2Tk(cvs2, hf)
-        log_fn("Profiling opened.")
+        def _show(p):
+            if not pw.winfo_exists(): return
+            # Statistics
+            st.delete("1.0", tk.END); st.insert(tk.END, p.describe().to_string())
+            if p.sampled: st.insert(tk.END, f"\n\nQuartiles estimated from a {len(p.sample)}-row sample of {p.n_rows} rows.")
+            # Correlation
+            fig = Figure(figsize=(6, 5), dpi=100); ax = fig.add_subplot(111)
+            im = ax.imshow(p.corr, cmap="RdBu_r", vmin=-1, vmax=1)
+            ax.set_xticks(range(len(p.columns))); ax.set_yticks(range(len(p.columns)))
+            ax.set_xticklabels(p.columns, rotation=45, ha="right", fontsize=7)
+            ax.set_yticklabels(p.columns, fontsize=7); fig.colorbar(im, ax=ax); fig.tight_layout()
+            FigureCanvasTkAgg(fig, master=cf2).get_tk_widget().pack(fill="both", expand=True)
+            # Histograms (pre-binned counts, so plotting cost is independent of row count)
+            nc2 = min(4, len(p.columns)); nr2 = (len(p.columns) + nc2 - 1) // nc2
+            fig2 = Figure(figsize=(3 * nc2, 2.5 * nr2), dpi=90)
+            for idx, c in enumerate(p.columns):
+                ax2 = fig2.add_subplot(nr2, nc2, idx + 1); e = p.hist_edges[idx]
+                ax2.bar(e[:-1], p.hist_counts[idx], width=np.diff(e), align="edge", alpha=0.8, edgecolor="black")
+                ax2.set_title(c, fontsize=8); ax2.tick_params(labelsize=6)
+            fig2.tight_layout()
+            cvs2 = FigureCanvasTkAgg(fig2, master=hf); cvs2.draw(); cvs2.get_tk_widget().pack(fill="both", expand=True)
+            NavigationToolbar2Tk(cvs2, hf)
+            log_fn("Profiling opened.")
+        if state.get("profile") is not None: _show(state["profile"]); return
+        st.insert(tk.END, f"Profiling {len(df)} rows ...")
+        def _run():
+            try: p = profile_dataframe(df)  # one chunked pass, cached by content hash
+            except Exception as e: msg = str(e); win.after(0, lambda: messagebox.showerror("Error", msg)); return
+            state["profile"] = p; win.after(0, lambda: _show(p))
+        threading.Thread(target=_run, daemon=True).start()
 
     log_fn("Optimization Window opened.")
@@ -11,6 +11,8 @@ from tkinter import filedialog, messagebox, ttk
 import numpy as np
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+from xross.xrr import XRRObjective, create_warm_start_study, fidelity_subsets, optuna_warm_start
+from xross.optimize import pso, pso_islands
 
 
 def open_xrr_window(root, icon_path, current_dir, subroutines, orphan_layers,
@@ -19,7 +21,6 @@ def open_xrr_window(root, icon_path, current_dir, subroutines, orphan_layers,
         import optuna
         from optuna.samplers import TPESampler
         from optuna.pruners import MedianPruner
-        from optuna.exceptions import TrialPruned
         optuna.logging.set_verbosity(optuna.logging.WARNING)
         HAS_OPTUNA = True
     except Exception:
@@ -267,6 +268,8 @@ def open_xrr_window(root, icon_path, current_dir, subroutines, orphan_layers,
     wl_entry = tk.Entry(r1, textvariable=wl_var, width=8); wl_entry.pack(side="left", padx=3)
     tk.Label(r1, text="chi²").pack(side="left", padx=(10, 0))
     chi_var = tk.StringVar(value="-"); tk.Label(r1, textvariable=chi_var, width=12, relief="sunken").pack(side="left", padx=3)
+    isl_var = tk.BooleanVar(value=False)  # opt-in: island PSO across worker processes
+    tk.Checkbutton(r1, text="Parallel islands", variable=isl_var).pack(side="left", padx=(10, 0))
     def _on_mode(e=None):
         if mode_var.get() == "XRR": wl_var.set(0.15418); wl_entry.config(state="disabled")
         else: wl_entry.config(state="normal")
@@ -332,6 +335,15 @@ def open_xrr_window(root, icon_path, current_dir, subroutines, orphan_layers,
         stop_btn.config(state="normal" if r else "disabled")
     stop_btn.config(command=lambda: (stop_ev.set(), log_fn("Stop.")))
     def _ma(y, w): k = np.ones(max(5, int(w)))/max(5, int(w)); return np.convolve(y, k, mode="same")
+    def _swarm(obj, lo, hi, x0, cb, prj, pop, iters):
+        """Single PSO swarm, or island-model swarms across processes when 'Parallel islands' is ticked."""
+        nis = min(8, max(1, (os.cpu_count() or 1)//2)) if isl_var.get() else 1
+        if nis > 1:
+            log_fn(f"PSO: {nis} islands x pop={pop}, iter={iters}")
+            return pso_islands(obj, lo, hi, n_islands=nis, n_particles=pop, n_iter=iters, migration_interval=10,
+                               x0=x0, seed=None, project=prj, callback=cb, stop_event=stop_ev)
+        log_fn(f"PSO: pop={pop}, iter={iters}")
+        return pso(obj, lo, hi, n_particles=pop, n_iter=iters, x0=x0, seed=None, project=prj, callback=cb, stop_event=stop_ev)
 
     # ========== XRR Mode ==========
     def _run_xrr():
@@ -374,8 +386,8 @@ def open_xrr_window(root, icon_path, current_dir, subroutines, orphan_layers,
         ids = _ppds(theta, yexp, 600); thds, yds = theta[ids], yexp[ids]
         ymds = _ma(yds, max(7, len(yds)//50))
         wds = np.where(yds >= 3*ymds, np.maximum(yds/ymds, 1), 1) if per else np.ones_like(yds)
-        def _evf(tb, rb, sb): return _ev(tb, rb, sb, thds, yds, wds)[0]
-        rng = np.random.default_rng(); pop = min(200, max(80, 20+4*NL))
+        xo = XRRObjective(thds, yds, wds, blks, sub, lam, "density", d_targets=dtgt or None, fixed_t=ft)
+        pop = min(200, max(80, 20+4*NL))
         GE = [np.inf]; GT = [bt0.copy()]; GS = [bs0.copy()]; GD = [brho.copy()]; GC = [np.zeros_like(theta)]
         def _wg(bt, bd, bs):
             for i, it in enumerate(bc):
@@ -384,43 +396,36 @@ def open_xrr_window(root, icon_path, current_dir, subroutines, orphan_layers,
                 if not fd[i]: c.entries[IDX_DEN].delete(0, tk.END); c.entries[IDX_DEN].insert(0, f"{bd[i]:.6g}")
                 if not fs[i]: c.entries[IDX_ROU].delete(0, tk.END); c.entries[IDX_ROU].insert(0, f"{bs[i]:.6g}")
             mark_modified()
-        Xt = rng.uniform(lot, hit, (pop, NL)); Xt[0] = bt0
-        Xs = rng.uniform(los, his, (pop, NL)); Xs[0] = bs0
-        Xd = rng.uniform(lod, hid, (pop, NL)); Xd[0] = brho
-        Vmt = np.maximum(.3*(hit-lot), 1e-12); Vms = np.maximum(.3*(his-los), 1e-12); Vmd = np.maximum(.3*(hid-lod), 1e-12)
-        Vt = rng.uniform(-Vmt, Vmt, (pop, NL)); Vs = rng.uniform(-Vms, Vms, (pop, NL)); Vd = rng.uniform(-Vmd, Vmd, (pop, NL))
-        PbT, PbS, PbD = Xt.copy(), Xs.copy(), Xd.copy(); PbE = np.full(pop, np.inf)
-        def _pso():
-            Ef = np.array([_evf(Xt[i], Xd[i], Xs[i]) for i in range(pop)])
-            kk = max(5, pop//8); top = np.argpartition(Ef, kk)[:kk]; imp = False
-            for i in top:
-                Ei, yc = _ev(Xt[i], Xd[i], Xs[i], theta, yexp, wp)
-                if Ei < PbE[i]: PbE[i] = Ei; PbT[i] = Xt[i].copy(); PbS[i] = Xs[i].copy(); PbD[i] = Xd[i].copy()
-                if Ei < GE[0]: GE[0] = Ei; GT[0] = Xt[i].copy(); GS[0] = Xs[i].copy(); GD[0] = Xd[i].copy(); GC[0] = yc; imp = True
-            for i in np.setdiff1d(np.arange(pop), top):
-                if Ef[i] < PbE[i]: PbE[i] = Ef[i]; PbT[i] = Xt[i].copy(); PbS[i] = Xs[i].copy(); PbD[i] = Xd[i].copy()
-            return imp
+        def _cb(it, bx, bf, imp):
+            # Swarm runs on the downsampled curve; re-score improvements on the full range for display
+            if imp:
+                E, c = _ev(bx[:NL], bx[2*NL:], bx[NL:2*NL], theta, yexp, wp)
+                if E < GE[0]: GE[0] = E; GT[0] = bx[:NL].copy(); GS[0] = bx[NL:2*NL].copy(); GD[0] = bx[2*NL:].copy(); GC[0] = c
+            if imp or it%5 == 0 or it == iters-1:
+                def _up(c=GC[0].copy(), e=GE[0]): fl.set_data(theta, c); chi_var.set(f"{e:.4g}"); _refresh()
+                root.after(0, _up); root.after(0, lambda g=(GT[0], GD[0], GS[0]): _wg(*g))
         def worker():
             try:
                 nw = int(min(60, max(16, 3*NL)))
                 if HAS_OPTUNA:
                     try:
-                        smp = TPESampler(seed=0, multivariate=True, group=True)
+                        smp = TPESampler(seed=0, multivariate=True, group=True, constant_liar=True)
                         pru = MedianPruner(n_startup_trials=max(5, nw//4))
                         sd = os.path.join(current_dir, "save"); os.makedirs(sd, exist_ok=True)
-                        try: study = optuna.create_study(direction="minimize", sampler=smp, pruner=pru, storage=f"sqlite:///{os.path.join(sd,'optuna_xrr.db')}", study_name="xrr", load_if_exists=True)
-                        except: study = optuna.create_study(direction="minimize", sampler=smp, pruner=pru)
-                        def obj(trial):
-                            if stop_ev.is_set(): raise TrialPruned()
-                            ts = np.array([bt0[i] if ft[i] else trial.suggest_float(f"t{i}", float(lot[i]), float(hit[i])) for i in range(NL)])
-                            ss = np.array([bs0[i] if fs[i] else trial.suggest_float(f"s{i}", float(los[i]), float(his[i])) for i in range(NL)])
-                            ds = np.array([brho[i] if fd[i] else trial.suggest_float(f"d{i}", float(lod[i]), float(hid[i])) for i in range(NL)])
-                            trial.set_user_attr("t", ts.tolist()); trial.set_user_attr("s", ss.tolist()); trial.set_user_attr("d", ds.tolist())
-                            return _evf(ts, ds, ss)
-                        study.optimize(obj, n_trials=nw, gc_after_trial=True)
-                        btt = np.array(study.best_trial.user_attrs["t"]); bss = np.array(study.best_trial.user_attrs["s"]); bdd = np.array(study.best_trial.user_attrs["d"])
+                        rid = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+                        study = create_warm_start_study("memory", study_name=f"xrr_{rid}", sampler=smp, pruner=pru)
+                        nms = [f"t{i}" for i in range(NL)] + [f"s{i}" for i in range(NL)] + [f"d{i}" for i in range(NL)]
+                        # Coarse-to-full chi² stages so the MedianPruner can drop hopeless trials early
+                        stg = [xo.subset(ix) for ix in fidelity_subsets(len(thds), 3)]
+                        bx, bv, study = optuna_warm_start(stg,
+                                                         np.concatenate([lot, los, lod]), np.concatenate([hit, his, hid]),
+                                                         n_trials=nw, batch_size=max(4, nw//6), n_jobs=min(4, os.cpu_count() or 1),
+                                                         names=nms, study=study, stop_event=stop_ev,
+                                                         snapshot_path=os.path.join(sd, "xrr_warmstart.npz"))  # latest fit only
+                        if not np.isfinite(bv): raise RuntimeError("no completed trials")
+                        btt, bss, bdd = bx[:NL], bx[NL:2*NL], bx[2*NL:]
                         E0, c0 = _ev(btt, bdd, bss, theta, yexp, wp)
-                        GE[0] = E0; GT[0] = btt; GS[0] = bss; GD[0] = bdd; GC[0] = c0; Xt[0] = btt; Xs[0] = bss; Xd[0] = bdd
+                        GE[0] = E0; GT[0] = btt; GS[0] = bss; GD[0] = bdd; GC[0] = c0
                         root.after(0, lambda: (fl.set_data(theta, c0), chi_var.set(f"{E0:.4g}"), _refresh()))
                         root.after(0, lambda: _wg(btt, bdd, bss)); log_fn(f"Optuna: chi²={E0:.4g}")
                     except Exception as ex: log_fn(f"Optuna skip: {ex}")
@@ -428,31 +433,8 @@ def open_xrr_window(root, icon_path, current_dir, subroutines, orphan_layers,
                     E0, c0 = _ev(bt0, brho, bs0, theta, yexp, wp)
                     GE[0] = E0; GT[0] = bt0.copy(); GS[0] = bs0.copy(); GD[0] = brho.copy(); GC[0] = c0
                     root.after(0, lambda: (fl.set_data(theta, c0), chi_var.set(f"{E0:.4g}"), _refresh()))
-                _pso(); jam = 0; bl = GE[0]; shk = 0
-                log_fn(f"PSO: pop={pop}, iter={iters}")
-                for it in range(iters):
-                    if stop_ev.is_set(): break
-                    r1, r2 = rng.random((pop, NL)), rng.random((pop, NL))
-                    Vt[:] = np.clip(.72*Vt+1.49*r1*(PbT-Xt)+1.49*r2*(GT[0]-Xt), -Vmt, Vmt)
-                    Vs[:] = np.clip(.72*Vs+1.49*r1*(PbS-Xs)+1.49*r2*(GS[0]-Xs), -Vms, Vms)
-                    Vd[:] = np.clip(.72*Vd+1.49*r1*(PbD-Xd)+1.49*r2*(GD[0]-Xd), -Vmd, Vmd)
-                    Xt[:] = np.clip(Xt+Vt, lot, hit); Xs[:] = np.clip(Xs+Vs, los, his); Xd[:] = np.clip(Xd+Vd, lod, hid)
-                    if dtgt:
-                        for i in range(pop): Xt[i] = _norm_per(Xt[i], blks, dtgt, fm=ft)
-                    imp = _pso()
-                    if imp or it%5 == 0 or it == iters-1:
-                        def _up(c=GC[0].copy(), e=GE[0]): fl.set_data(theta, c); chi_var.set(f"{e:.4g}"); _refresh()
-                        root.after(0, _up); root.after(0, lambda: _wg(GT[0], GD[0], GS[0]))
-                    if GE[0] < bl-1e-6: bl = GE[0]; jam = 0
-                    else:
-                        jam += 1; JT = max(30, iters//4)
-                        if jam >= JT and shk < 5:
-                            Xt[:] = np.clip(GT[0]+rng.uniform(-.3*(hit-lot), .3*(hit-lot), (pop, NL)), lot, hit)
-                            Xs[:] = np.clip(GS[0]+rng.uniform(-.3*(his-los), .3*(his-los), (pop, NL)), los, his)
-                            Xd[:] = np.clip(GD[0]+rng.uniform(-.3*(hid-lod), .3*(hid-lod), (pop, NL)), lod, hid)
-                            Vt[:] = rng.uniform(-Vmt, Vmt, (pop, NL)); Vs[:] = rng.uniform(-Vms, Vms, (pop, NL)); Vd[:] = rng.uniform(-Vmd, Vmd, (pop, NL))
-                            jam = 0; shk += 1
-                        elif jam >= 3*JT: break
+                _swarm(xo, np.concatenate([lot, los, lod]), np.concatenate([hit, his, hid]),
+                       np.concatenate([GT[0], GS[0], GD[0]]), _cb, xo.project if dtgt else None, pop, iters)
                 root.after(0, lambda: (fl.set_data(theta, GC[0]), chi_var.set(f"{GE[0]:.4g}"), _refresh()))
                 log_fn(f"XRR done. chi²={GE[0]:.4g}")
             except Exception as e:
@@ -508,8 +490,8 @@ def open_xrr_window(root, icon_path, current_dir, subroutines, orphan_layers,
         ids = _ppds(theta, yexp, 600); thds, yds = theta[ids], yexp[ids]
         ymds = _ma(yds, max(7, len(yds)//50))
         wds = np.where(yds >= 3*ymds, np.maximum(yds/ymds, 1), 1) if per else np.ones_like(yds)
-        def _evf_nk(nv, kv): return _ev_nk(nv, kv, thds, yds, wds)[0]
-        rng = np.random.default_rng(); pop = min(200, max(80, 20+4*NL))
+        xo = XRRObjective(thds, yds, wds, blks, sub, lam, "nk", base_t=bt0, base_s=bs0)
+        pop = min(200, max(80, 20+4*NL))
         GE = [np.inf]; GN = [bn.copy()]; GK = [bk.copy()]; GC = [np.zeros_like(theta)]
         def _wg_nk(gn, gk):
             for i, it in enumerate(bc):
@@ -517,47 +499,21 @@ def open_xrr_window(root, icon_path, current_dir, subroutines, orphan_layers,
                 c.entries[IDX_N].delete(0, tk.END); c.entries[IDX_N].insert(0, f"{gn[i]:.8g}")
                 c.entries[IDX_K].delete(0, tk.END); c.entries[IDX_K].insert(0, f"{gk[i]:.8g}")
             mark_modified()
-        Xn = rng.uniform(lo_n, hi_n, (pop, NL)); Xn[0] = bn
-        Xk = rng.uniform(lo_k, hi_k, (pop, NL)); Xk[0] = bk
-        Vmn = np.maximum(.3*(hi_n-lo_n), 1e-12); Vmk = np.maximum(.3*(hi_k-lo_k), 1e-12)
-        Vn = rng.uniform(-Vmn, Vmn, (pop, NL)); Vk = rng.uniform(-Vmk, Vmk, (pop, NL))
-        PbN, PbK = Xn.copy(), Xk.copy(); PbE = np.full(pop, np.inf)
-        def _pso_nk():
-            Ef = np.array([_evf_nk(Xn[i], Xk[i]) for i in range(pop)])
-            kk = max(5, pop//8); top = np.argpartition(Ef, kk)[:kk]; imp = False
-            for i in top:
-                Ei, yc = _ev_nk(Xn[i], Xk[i], theta, yexp, wp)
-                if Ei < PbE[i]: PbE[i] = Ei; PbN[i] = Xn[i].copy(); PbK[i] = Xk[i].copy()
-                if Ei < GE[0]: GE[0] = Ei; GN[0] = Xn[i].copy(); GK[0] = Xk[i].copy(); GC[0] = yc; imp = True
-            for i in np.setdiff1d(np.arange(pop), top):
-                if Ef[i] < PbE[i]: PbE[i] = Ef[i]; PbN[i] = Xn[i].copy(); PbK[i] = Xk[i].copy()
-            return imp
+        def _cb_nk(it, bx, bf, imp):
+            if imp:
+                E, c = _ev_nk(bx[:NL], bx[NL:], theta, yexp, wp)
+                if E < GE[0]: GE[0] = E; GN[0] = bx[:NL].copy(); GK[0] = bx[NL:].copy(); GC[0] = c
+            if imp or it%5 == 0 or it == iters-1:
+                def _up(c=GC[0].copy(), e=GE[0]): fl.set_data(theta, c); chi_var.set(f"{e:.4g}"); _refresh()
+                root.after(0, _up); root.after(0, lambda g=(GN[0], GK[0]): _wg_nk(*g))
         def worker_nk():
             try:
                 E0, c0 = _ev_nk(bn, bk, theta, yexp, wp)
                 GE[0] = E0; GN[0] = bn.copy(); GK[0] = bk.copy(); GC[0] = c0
                 root.after(0, lambda: (fl.set_data(theta, c0), chi_var.set(f"{E0:.4g}"), _refresh()))
-                _pso_nk(); jam = 0; bl = GE[0]; shk = 0
-                log_fn(f"NewSUBARU: pop={pop}, iter={iters}, λ={lam}nm")
-                for it in range(iters):
-                    if stop_ev.is_set(): break
-                    r1, r2 = rng.random((pop, NL)), rng.random((pop, NL))
-                    Vn[:] = np.clip(.72*Vn+1.49*r1*(PbN-Xn)+1.49*r2*(GN[0]-Xn), -Vmn, Vmn)
-                    Vk[:] = np.clip(.72*Vk+1.49*r1*(PbK-Xk)+1.49*r2*(GK[0]-Xk), -Vmk, Vmk)
-                    Xn[:] = np.clip(Xn+Vn, lo_n, hi_n); Xk[:] = np.clip(Xk+Vk, lo_k, hi_k)
-                    imp = _pso_nk()
-                    if imp or it%5 == 0 or it == iters-1:
-                        def _up(c=GC[0].copy(), e=GE[0]): fl.set_data(theta, c); chi_var.set(f"{e:.4g}"); _refresh()
-                        root.after(0, _up); root.after(0, lambda: _wg_nk(GN[0], GK[0]))
-                    if GE[0] < bl-1e-6: bl = GE[0]; jam = 0
-                    else:
-                        jam += 1; JT = max(30, iters//4)
-                        if jam >= JT and shk < 5:
-                            Xn[:] = np.clip(GN[0]+rng.uniform(-.3*(hi_n-lo_n), .3*(hi_n-lo_n), (pop, NL)), lo_n, hi_n)
-                            Xk[:] = np.clip(GK[0]+rng.uniform(-.3*(hi_k-lo_k), .3*(hi_k-lo_k), (pop, NL)), lo_k, hi_k)
-                            Vn[:] = rng.uniform(-Vmn, Vmn, (pop, NL)); Vk[:] = rng.uniform(-Vmk, Vmk, (pop, NL))
-                            jam = 0; shk += 1
-                        elif jam >= 3*JT: break
+                log_fn(f"NewSUBARU: λ={lam}nm")
+                _swarm(xo, np.concatenate([lo_n, lo_k]), np.concatenate([hi_n, hi_k]),
+                       np.concatenate([bn, bk]), _cb_nk, None, pop, iters)
                 root.after(0, lambda: (fl.set_data(theta, GC[0]), chi_var.set(f"{GE[0]:.4g}"), _refresh()))
                 log_fn(f"NewSUBARU done. chi²={GE[0]:.4g}")
             except Exception as e:
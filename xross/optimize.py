@@ -2,22 +2,51 @@
 xross.optimize — Multi-objective optimisation engine.
 
 Provides NSGA-II genetic algorithm for multi-parameter, multi-objective
-optimisation of thin-film process conditions.  Designed to work with
+optimisation of thin-film process conditions, with an NSGA-III
+reference-direction niching mode for many (4+) objectives.  Designed to work with
 arbitrary CSV data (any number of explanatory / objective variables).
+
+:func:`optuna_batch_search` drives an Optuna study (single or
+multi-objective) through batched ask/tell against a vectorised objective
+such as a surrogate's ``predict``.
+
+Objective evaluation can be farmed out to a thread / process pool, either
+generation-by-generation or as an asynchronous steady-state loop.
+
+Also provides a bounded particle-swarm optimiser (PSO) for single-objective
+fits such as XRR / NewSUBARU curve fitting, with an island-model variant
+that runs several swarms in parallel processes.
 """
 
 from __future__ import annotations
 
+import json
+import multiprocessing
+import os
+from concurrent.futures import (
+    FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait,
+)
 from dataclasses import dataclass, field
-from typing import Callable, Dict, List, Optional, Tuple
+from itertools import combinations
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 import numpy as np
 
 __all__ = [
     "OptimizationProblem",
+    "EvaluationArchive",
     "nsga2",
+    "nsga2_steps",
+    "NSGA2State",
+    "nsga2_steady_state",
+    "optuna_batch_search",
     "fast_nondominated_sort",
     "crowding_distance",
+    "rank_and_crowding",
+    "hypervolume",
+    "reference_directions",
+    "pso",
+    "pso_islands",
 ]
 
 
@@ -52,37 +81,243 @@ class OptimizationProblem:
     evaluate: Callable[[np.ndarray], np.ndarray]
 
 
+# -----------------------------------------------------------------------
+#  Evaluation archive
+# -----------------------------------------------------------------------
+
+class EvaluationArchive:
+    """Record of every evaluated point, with de-duplication and a Pareto archive.
+
+    Pass an instance to :func:`nsga2` / :func:`nsga2_steady_state`; points
+    already in the archive are not re-evaluated, and after the run the
+    full history (:attr:`x`, :attr:`obj`) and the unbounded non-dominated
+    set (:meth:`pareto`) remain available.
+
+    Parameters
+    ----------
+    directions : 1-D array of shape (n_obj,)
+        ``+1`` for minimise, ``-1`` for maximise (as in
+        :class:`OptimizationProblem`).
+    resolution : float, 1-D array or None
+        Grid step used to build the de-duplication key.  ``None`` (default)
+        keys on the exact float64 bytes; otherwise two points that round to
+        the same grid cell are treated as the same evaluation.
+    """
+
+    def __init__(self, directions: np.ndarray, resolution: Any = None):
+        self.directions = np.asarray(directions, float)
+        self.resolution = None if resolution is None else np.asarray(resolution, float)
+        self.n_hits = 0
+        self._index: Dict[bytes, int] = {}
+        self._x: List[np.ndarray] = []
+        self._obj: List[np.ndarray] = []
+        self._pareto = np.empty(0, int)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _compact(self) -> None:
+        if len(self._x) > 1:
+            self._x, self._obj = [np.vstack(self._x)], [np.vstack(self._obj)]
+
+    def _keys(self, X: np.ndarray) -> List[bytes]:
+        X = np.ascontiguousarray(X, float)
+        if self.resolution is not None:
+            X = np.ascontiguousarray(np.round(X / self.resolution).astype(np.int64))
+        return [row.tobytes() for row in X]
+
+    @property
+    def x(self) -> np.ndarray:
+        """All distinct evaluated decision vectors, in evaluation order."""
+        self._compact()
+        return self._x[0] if self._x else np.empty((0, 0))
+
+    @property
+    def obj(self) -> np.ndarray:
+        """Raw objective values matching :attr:`x`."""
+        self._compact()
+        return self._obj[0] if self._obj else np.empty((0, self.directions.size))
+
+    def lookup(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(obj_raw, found)``; rows not in the archive are NaN."""
+        out = np.full((X.shape[0], self.directions.size), np.nan)
+        found = np.zeros(X.shape[0], bool)
+        if self._index:
+            F = self.obj
+            for i, k in enumerate(self._keys(X)):
+                j = self._index.get(k)
+                if j is not None:
+                    out[i], found[i] = F[j], True
+        return out, found
+
+    def add(self, X: np.ndarray, obj_raw: np.ndarray) -> None:
+        """Insert evaluated rows (duplicates of existing keys are ignored)."""
+        X = np.asarray(X, float)
+        obj_raw = np.asarray(obj_raw, float).reshape(X.shape[0], -1)
+        new = []
+        for i, k in enumerate(self._keys(X)):
+            if k not in self._index:
+                self._index[k] = len(self._index)
+                new.append(i)
+        if not new:
+            return
+        self._x.append(X[new])
+        self._obj.append(obj_raw[new])
+        # Pareto archive: previous front + new points, re-peeled
+        cand = np.concatenate([self._pareto, np.arange(len(self) - len(new), len(self))])
+        F = self.obj[cand] * self.directions[None, :]
+        ok = np.all(np.isfinite(F), axis=1)
+        cand, F = cand[ok], F[ok]
+        self._pareto = cand[fast_nondominated_sort(F)[0]] if cand.size else cand
+
+    def evaluate(
+        self, fn: Callable[[np.ndarray], np.ndarray], X: np.ndarray
+    ) -> np.ndarray:
+        """Evaluate only the rows of *X* not yet archived (each key once)."""
+        out, found = self.lookup(X)
+        self.n_hits += int(found.sum())
+        miss = np.flatnonzero(~found)
+        if miss.size:
+            first: Dict[bytes, int] = {}
+            inv = np.array([first.setdefault(k, len(first)) for k in self._keys(X[miss])])
+            uniq = miss[np.unique(inv, return_index=True)[1]]
+            self.n_hits += miss.size - uniq.size
+            vals = np.asarray(fn(X[uniq]), float).reshape(uniq.size, -1)
+            self.add(X[uniq], vals)
+            out[miss] = vals[inv]
+        return out
+
+    def pareto(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Non-dominated subset of everything evaluated: ``(x, obj_raw)``."""
+        return self.x[self._pareto], self.obj[self._pareto]
+
+
 # -----------------------------------------------------------------------
 #  NSGA-II components
 # -----------------------------------------------------------------------
 
-def fast_nondominated_sort(obj: np.ndarray) -> List[List[int]]:
-    """Return successive Pareto fronts (indices) for a *minimisation* problem."""
+def _dominates_block(obj: np.ndarray, rows: slice) -> np.ndarray:
+    """Boolean matrix ``D[i, j]`` = row *i* (of *rows*) dominates *j*."""
+    a = obj[rows, None, :]
+    b = obj[None, :, :]
+    return np.all(a <= b, axis=2) & np.any(a < b, axis=2)
+
+
+def _nds_matrix(obj: np.ndarray, block_size: Optional[int] = None) -> List[List[int]]:
+    """Front peeling on a broadcast domination matrix (built in row blocks)."""
+    n, m = obj.shape
+    if block_size is None:
+        block_size = max(1, int(2 ** 24 // max(1, n * m)))
+    dom = np.empty((n, n), dtype=bool)
+    for i0 in range(0, n, block_size):
+        dom[i0:i0 + block_size] = _dominates_block(obj, slice(i0, i0 + block_size))
+    count = dom.sum(axis=0)
+    remaining = np.ones(n, dtype=bool)
+    fronts: List[List[int]] = []
+    while remaining.any():
+        front = np.flatnonzero(remaining & (count == 0))
+        fronts.append(front.tolist())
+        remaining[front] = False
+        count = count - dom[front].sum(axis=0)
+    return fronts
+
+
+def _nds_2d(obj: np.ndarray) -> List[List[int]]:
+    """O(N log N) sweep for two objectives.
+
+    Points are visited in lexicographic order; each goes to the first
+    front whose most recent member does not dominate it (binary search).
+    """
+    order = np.lexsort((obj[:, 1], obj[:, 0]))
+    f1 = obj[order, 0].tolist()
+    f2 = obj[order, 1].tolist()
+    last1: List[float] = []
+    last2: List[float] = []
+    fronts: List[List[int]] = []
+    for p, (a, b) in enumerate(zip(f1, f2)):
+        lo, hi = 0, len(fronts)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if last2[mid] < b or (last2[mid] == b and last1[mid] < a):
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == len(fronts):
+            fronts.append([])
+            last1.append(a)
+            last2.append(b)
+        fronts[lo].append(int(order[p]))
+        last1[lo], last2[lo] = a, b
+    return [sorted(f) for f in fronts]
+
+
+def fast_nondominated_sort(
+    obj: np.ndarray, *, block_size: Optional[int] = None,
+) -> List[List[int]]:
+    """Return successive Pareto fronts (indices) for a *minimisation* problem.
+
+    One objective is ranked by value, two objectives use an
+    O(N log N) sweep, and more objectives use a vectorised domination
+    matrix built in row blocks of *block_size* (chosen automatically to
+    bound temporary memory when ``None``).
+    """
+    obj = np.asarray(obj, float)
     n = obj.shape[0]
-    domination_count = np.zeros(n, dtype=int)
-    dominated_set: List[List[int]] = [[] for _ in range(n)]
-    fronts: List[List[int]] = [[]]
-    for i in range(n):
-        for j in range(i + 1, n):
-            if np.all(obj[i] <= obj[j]) and np.any(obj[i] < obj[j]):
-                dominated_set[i].append(j)
-                domination_count[j] += 1
-            elif np.all(obj[j] <= obj[i]) and np.any(obj[j] < obj[i]):
-                dominated_set[j].append(i)
-                domination_count[i] += 1
-        if domination_count[i] == 0:
-            fronts[0].append(i)
-    k = 0
-    while fronts[k]:
-        nxt: List[int] = []
-        for i in fronts[k]:
-            for j in dominated_set[i]:
-                domination_count[j] -= 1
-                if domination_count[j] == 0:
-                    nxt.append(j)
-        k += 1
-        fronts.append(nxt)
-    return [f for f in fronts if f]
+    if n == 0:
+        return []
+    if obj.ndim == 1 or obj.shape[1] == 1:
+        _, inv = np.unique(obj.reshape(n), return_inverse=True)
+        inv = inv.reshape(n)
+        return [np.flatnonzero(inv == r).tolist() for r in range(inv.max() + 1)]
+    if obj.shape[1] == 2:
+        return _nds_2d(obj)
+    return _nds_matrix(obj, block_size)
+
+
+def rank_and_crowding(
+    obj: np.ndarray, fronts: Optional[List[List[int]]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Front rank and crowding distance of every individual, all fronts at once.
+
+    Parameters
+    ----------
+    obj : 2-D array (n, n_obj)
+        Objective values (minimisation).
+    fronts : list of index lists or None
+        Output of :func:`fast_nondominated_sort`; computed if omitted.
+
+    Returns
+    -------
+    rank : 1-D int array (n,)
+    crowd : 1-D float array (n,)
+        Boundary points and members of fronts with <= 2 points are ``inf``.
+    """
+    obj = np.asarray(obj, float)
+    n, m = obj.shape
+    if fronts is None:
+        fronts = fast_nondominated_sort(obj)
+    sizes = np.array([len(f) for f in fronts], dtype=int)
+    rank = np.empty(n, dtype=int)
+    rank[np.concatenate(fronts).astype(int)] = np.repeat(np.arange(len(fronts)), sizes)
+
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    ends = starts + sizes - 1
+    edge = np.zeros(n, dtype=bool)
+    edge[starts] = True
+    edge[ends] = True
+    crowd = np.zeros(n)
+    for j in range(m):
+        order = np.lexsort((obj[:, j], rank))
+        v = obj[order, j]
+        span = (v[ends] - v[starts])[rank[order]]
+        gap = np.zeros(n)
+        gap[1:-1] = v[2:] - v[:-2]
+        contrib = np.where(edge, np.inf, 0.0)
+        ok = ~edge & (span >= 1e-12)
+        contrib[ok] = gap[ok] / span[ok]
+        crowd[order] += contrib
+    crowd[sizes[rank] <= 2] = np.inf
+    return rank, crowd
 
 
 def crowding_distance(obj: np.ndarray, front: List[int]) -> np.ndarray:
@@ -90,24 +325,409 @@ def crowding_distance(obj: np.ndarray, front: List[int]) -> np.ndarray:
     n = len(front)
     if n <= 2:
         return np.full(n, np.inf)
-    dist = np.zeros(n)
-    for m in range(obj.shape[1]):
-        vals = obj[front, m]
-        order = np.argsort(vals)
-        dist[order[0]] = np.inf
-        dist[order[-1]] = np.inf
-        rng = vals[order[-1]] - vals[order[0]]
-        if rng < 1e-12:
+    return rank_and_crowding(np.asarray(obj)[front], [list(range(n))])[1]
+
+
+def _tournament(rank: np.ndarray, crowd: np.ndarray, rng: np.random.Generator, n: int) -> np.ndarray:
+    """Binary tournaments on (rank, -crowding); returns winner indices."""
+    a, b = rng.integers(0, rank.size, (n, 2)).T
+    a_wins = (rank[a] < rank[b]) | ((rank[a] == rank[b]) & (crowd[a] > crowd[b]))
+    return np.where(a_wins, a, b)
+
+
+def _survivors(obj: np.ndarray, n_keep: int) -> np.ndarray:
+    """Indices of the *n_keep* best individuals by (rank, -crowding)."""
+    rank, crowd = rank_and_crowding(obj)
+    return np.lexsort((-crowd, rank))[:n_keep]
+
+
+def _sbx_pm(
+    parents: np.ndarray,
+    lo: np.ndarray,
+    hi: np.ndarray,
+    rng: np.random.Generator,
+    *,
+    eta_c: float = 20,
+    eta_m: float = 20,
+    p_cross: float = 0.9,
+    p_mut: float = 0.2,
+) -> np.ndarray:
+    """Simulated binary crossover + polynomial mutation, as masked array ops.
+
+    Consecutive rows ``(0, 1), (2, 3), ...`` are paired; each pair is
+    crossed with probability *p_cross* and each gene is mutated with
+    probability *p_mut*.  All random numbers are drawn in bulk.
+
+    Returns
+    -------
+    children : 2-D array, same shape as *parents*, clipped to ``[lo, hi]``.
+    """
+    n, d = parents.shape
+    children = parents.copy()
+
+    n_pairs = n // 2
+    if n_pairs:
+        p1 = parents[0:2 * n_pairs:2]
+        p2 = parents[1:2 * n_pairs:2]
+        cross = rng.random(n_pairs) < p_cross
+        u = rng.random((n_pairs, d))
+        beta = np.where(
+            u <= 0.5,
+            (2 * u) ** (1.0 / (eta_c + 1)),
+            (1.0 / (2 * (1 - u))) ** (1.0 / (eta_c + 1)),
+        )
+        c1 = np.clip(0.5 * ((1 + beta) * p1 + (1 - beta) * p2), lo, hi)
+        c2 = np.clip(0.5 * ((1 - beta) * p1 + (1 + beta) * p2), lo, hi)
+        children[0:2 * n_pairs:2] = np.where(cross[:, None], c1, p1)
+        children[1:2 * n_pairs:2] = np.where(cross[:, None], c2, p2)
+
+    delta = hi - lo
+    mutate = (rng.random((n, d)) < p_mut) & (delta >= 1e-15)[None, :]
+    u = rng.random((n, d))
+    dq = np.where(
+        u < 0.5,
+        (2 * u) ** (1.0 / (eta_m + 1)) - 1,
+        1 - (2 * (1 - u)) ** (1.0 / (eta_m + 1)),
+    )
+    return np.where(mutate, np.clip(children + dq * delta, lo, hi), children)
+
+
+def _evaluate_pop(
+    evaluate: Callable[[np.ndarray], np.ndarray],
+    pop: np.ndarray,
+    executor: Optional[Executor],
+    chunk_size: Optional[int],
+) -> np.ndarray:
+    """Evaluate *pop* directly or in row chunks on *executor* (order kept).
+
+    Always returns a ``(n, n_obj)`` array; 1-D *evaluate* output (one
+    objective) is reshaped per chunk before stacking.
+    """
+    if executor is None or pop.shape[0] < 2:
+        return np.asarray(evaluate(pop), float).reshape(pop.shape[0], -1)
+    if chunk_size is None:
+        chunk_size = -(-pop.shape[0] // (os.cpu_count() or 1))
+    chunks = [pop[i:i + chunk_size] for i in range(0, pop.shape[0], max(1, chunk_size))]
+    return np.vstack([np.asarray(r, float).reshape(len(c), -1)
+                      for c, r in zip(chunks, executor.map(evaluate, chunks))])
+
+
+# -----------------------------------------------------------------------
+#  NSGA-III reference-direction niching
+# -----------------------------------------------------------------------
+
+def reference_directions(n_obj: int, n_partitions: int) -> np.ndarray:
+    """Das–Dennis simplex-lattice reference directions.
+
+    Returns all ``comb(n_partitions + n_obj - 1, n_obj - 1)`` points with
+    non-negative coordinates in steps of ``1 / n_partitions`` summing to 1.
+    """
+    if n_obj == 1:
+        return np.ones((1, 1))
+    # stars and bars: choose the n_obj - 1 bar positions among p + m - 1 slots
+    slots = n_partitions + n_obj - 1
+    bars = np.array(list(combinations(range(slots), n_obj - 1)))
+    edges = np.hstack([np.full((bars.shape[0], 1), -1), bars,
+                       np.full((bars.shape[0], 1), slots)])
+    return (np.diff(edges, axis=1) - 1) / n_partitions
+
+
+def _default_reference_directions(n_obj: int, n_pop: int) -> np.ndarray:
+    """Largest lattice with no more directions than *n_pop* (at least p = 1)."""
+    p = 1
+    while len(reference_directions(n_obj, p + 1)) <= n_pop:
+        p += 1
+    return reference_directions(n_obj, p)
+
+
+def _niching_survivors(
+    obj: np.ndarray, n_keep: int, ref_dirs: np.ndarray, rng: np.random.Generator
+) -> np.ndarray:
+    """NSGA-III environmental selection (Deb & Jain 2014) of *n_keep* rows."""
+    fronts = fast_nondominated_sort(obj)
+    chosen: List[int] = []
+    last: List[int] = []
+    for front in fronts:
+        if len(chosen) + len(front) <= n_keep:
+            chosen.extend(front)
+            if len(chosen) == n_keep:
+                return np.asarray(chosen)
+        else:
+            last = front
+            break
+
+    # normalise the candidate set S = chosen + last front
+    S = np.asarray(chosen + last)
+    f = obj[S] - obj[S].min(axis=0)
+    m = f.shape[1]
+    w = np.full((m, m), 1e-6) + np.eye(m) * (1 - 1e-6)
+    asf = np.max(f[None, :, :] / w[:, None, :], axis=2)  # (m, |S|)
+    extreme = f[np.argmin(asf, axis=1)]
+    try:
+        with np.errstate(divide="ignore"):
+            intercept = 1.0 / np.linalg.solve(extreme, np.ones(m))
+        if not np.all(np.isfinite(intercept)) or np.any(intercept <= 1e-6):
+            raise np.linalg.LinAlgError
+    except np.linalg.LinAlgError:
+        intercept = f.max(axis=0)
+    fn = f / np.maximum(intercept, 1e-12)
+
+    # associate with the closest reference line
+    unit = ref_dirs / np.linalg.norm(ref_dirs, axis=1, keepdims=True)
+    proj = fn @ unit.T
+    d2 = np.maximum(np.sum(fn ** 2, axis=1, keepdims=True) - proj ** 2, 0.0)
+    niche = np.argmin(d2, axis=1)
+    dist = d2[np.arange(S.size), niche]
+
+    n_sel = len(chosen)
+    count = np.bincount(niche[:n_sel], minlength=len(ref_dirs))
+    cand = np.arange(n_sel, S.size)
+    open_ = np.zeros(len(ref_dirs), bool)
+    open_[niche[cand]] = True
+    picked: List[int] = []
+    while len(picked) < n_keep - n_sel:
+        c = np.where(open_, count, np.iinfo(count.dtype).max)
+        j = rng.choice(np.flatnonzero(c == c.min()))
+        members = cand[niche[cand] == j]
+        if members.size == 0:
+            open_[j] = False
             continue
-        for i in range(1, n - 1):
-            dist[order[i]] += (vals[order[i + 1]] - vals[order[i - 1]]) / rng
-    return dist
+        k = members[np.argmin(dist[members])] if count[j] == 0 else rng.choice(members)
+        picked.append(int(k))
+        cand = cand[cand != k]
+        count[j] += 1
+    return S[np.r_[np.arange(n_sel), np.asarray(picked, int)]]
+
+
+# -----------------------------------------------------------------------
+#  Hypervolume indicator
+# -----------------------------------------------------------------------
+
+def _hv2d(pts: np.ndarray, ref: np.ndarray) -> float:
+    """Exact 2-D hypervolume of points (all strictly better than *ref*)."""
+    pts = pts[np.lexsort((pts[:, 1], pts[:, 0]))]
+    front = pts[pts[:, 1] < np.minimum.accumulate(np.r_[np.inf, pts[:-1, 1]])]
+    widths = np.diff(np.r_[front[:, 0], ref[0]])
+    return float(np.sum(widths * (ref[1] - front[:, 1])))
+
+
+def hypervolume(
+    obj: np.ndarray,
+    ref: np.ndarray,
+    *,
+    n_samples: int = 100_000,
+    seed: int = 0,
+) -> float:
+    """Hypervolume dominated by *obj* (minimisation) and bounded by *ref*.
+
+    Exact for two objectives (sweep) and three objectives (slicing along
+    the third axis); a Monte-Carlo estimate with *n_samples* uniform
+    samples otherwise.  The fixed *seed* makes successive estimates use
+    common random numbers, so differences between generations are not
+    swamped by sampling noise.
+
+    Parameters
+    ----------
+    obj : 2-D array (n, n_obj)
+        Objective vectors, already sign-adjusted so smaller is better.
+    ref : 1-D array (n_obj,)
+        Reference (nadir) point; points not strictly better in every
+        objective contribute nothing.
+
+    Returns
+    -------
+    float
+    """
+    obj = np.asarray(obj, float)
+    ref = np.asarray(ref, float)
+    pts = obj[np.all(obj < ref[None, :], axis=1)]
+    if pts.shape[0] == 0:
+        return 0.0
+    pts = pts[fast_nondominated_sort(pts)[0]]
+    m = pts.shape[1]
+    if m == 1:
+        return float(ref[0] - pts[:, 0].min())
+    if m == 2:
+        return _hv2d(pts, ref)
+    if m == 3:
+        pts = pts[np.argsort(pts[:, 2], kind="stable")]
+        depth = np.diff(np.r_[pts[:, 2], ref[2]])
+        return float(sum(
+            depth[i] * _hv2d(pts[: i + 1, :2], ref[:2])
+            for i in range(pts.shape[0]) if depth[i] > 0
+        ))
+
+    rng = np.random.default_rng(seed)
+    lower = pts.min(axis=0)
+    box = float(np.prod(ref - lower))
+    chunk = max(1, 2_000_000 // (pts.shape[0] * m))
+    hit = 0
+    for start in range(0, n_samples, chunk):
+        u = rng.uniform(lower, ref, (min(chunk, n_samples - start), m))
+        hit += int(np.any(np.all(pts[None, :, :] <= u[:, None, :], axis=2), axis=1).sum())
+    return box * hit / n_samples
 
 
 # -----------------------------------------------------------------------
 #  NSGA-II main loop
 # -----------------------------------------------------------------------
 
+@dataclass
+class NSGA2State:
+    """Snapshot of an NSGA-II run after generation :attr:`gen`.
+
+    Yielded by :func:`nsga2_steps`; pass it back as ``state=`` to continue
+    the run exactly where it stopped.
+
+    Attributes
+    ----------
+    gen : int
+        Number of completed generations.
+    pop : 2-D array (n_pop, n_var)
+    obj : 2-D array (n_pop, n_obj)
+        Raw objective values (before sign flip).
+    rng_state : dict
+        ``Generator.bit_generator.state`` at the end of generation *gen*.
+    """
+
+    gen: int
+    pop: np.ndarray
+    obj: np.ndarray
+    rng_state: Dict[str, Any] = field(repr=False)
+
+    def pareto(self, directions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """First non-dominated front of the population: ``(x, obj_raw)``."""
+        bf = fast_nondominated_sort(self.obj * np.asarray(directions)[None, :])[0]
+        return self.pop[bf], self.obj[bf]
+
+    def save(self, path: str) -> None:
+        """Write the state to an ``.npz`` checkpoint (atomic replace)."""
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, gen=self.gen, pop=self.pop, obj=self.obj,
+                 rng_state=json.dumps(self.rng_state))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "NSGA2State":
+        """Read a checkpoint written by :meth:`save`."""
+        with np.load(path) as d:
+            return cls(int(d["gen"]), d["pop"], d["obj"], json.loads(str(d["rng_state"])))
+
+
+def nsga2_steps(
+    problem: OptimizationProblem,
+    *,
+    n_pop: int = 100,
+    n_gen: int = 200,
+    seed: int = 42,
+    state: Optional[NSGA2State] = None,
+    executor: Optional[Executor] = None,
+    chunk_size: Optional[int] = None,
+    archive: Optional[EvaluationArchive] = None,
+    niching: str = "crowding",
+    ref_dirs: Optional[np.ndarray] = None,
+    surrogate: Optional[Callable[[np.ndarray, np.ndarray], Any]] = None,
+    prescreen: int = 4,
+) -> Iterator[NSGA2State]:
+    """Generator form of :func:`nsga2`: yields an :class:`NSGA2State` per generation.
+
+    A fresh run first yields the evaluated initial population (``gen=0``).
+
+    The caller owns the loop, so a run is stopped simply by no longer
+    iterating and can be checkpointed with :meth:`NSGA2State.save`.
+    Resuming from a saved state with the same *problem* and *n_pop*
+    reproduces the uninterrupted run bit-for-bit.
+
+    Parameters
+    ----------
+    problem, n_pop, seed, executor, chunk_size, archive, niching, ref_dirs,
+    surrogate, prescreen
+        As for :func:`nsga2`.  *seed* is ignored when *state* is given.
+        With a *surrogate*, resuming rebuilds the model from *archive* (or
+        the saved population), so it is not bit-for-bit.
+    n_gen : int
+        Total number of generations (including those already in *state*).
+    state : NSGA2State or None
+        Resume from this snapshot instead of a fresh random population.
+    """
+    lo, hi = problem.lower_bounds, problem.upper_bounds
+    dirs = problem.directions  # +1 min, -1 max
+
+    def _eval(X: np.ndarray) -> np.ndarray:
+        return _evaluate_pop(problem.evaluate, X, executor, chunk_size)
+
+    evaluate = _eval if archive is None else (lambda X: archive.evaluate(_eval, X))
+
+    if niching not in ("crowding", "reference"):
+        raise ValueError(f"unknown niching {niching!r}; use 'crowding' or 'reference'")
+
+    rng = np.random.default_rng(seed)
+    if state is None:
+        start = 0
+        pop = rng.uniform(lo, hi, size=(n_pop, problem.n_var))
+        obj = evaluate(pop) * dirs[None, :]  # internal: always minimise
+        yield NSGA2State(0, pop, obj * dirs[None, :], rng.bit_generator.state)
+    else:
+        start = state.gen
+        rng.bit_generator.state = state.rng_state
+        pop = np.array(state.pop, float)
+        obj = np.asarray(state.obj, float) * dirs[None, :]
+        n_pop = pop.shape[0]
+
+    if niching == "reference" and ref_dirs is None:
+        ref_dirs = _default_reference_directions(dirs.size, n_pop)
+
+    eta_c, eta_m, p_mut = 20, 20, 0.2
+
+    model = None
+    if surrogate is not None:
+        if archive is not None and len(archive):
+            train_x, train_f = archive.x, archive.obj * dirs[None, :]
+        else:
+            train_x, train_f = pop, obj
+        ok = np.all(np.isfinite(train_f), axis=1)
+        train_x, train_f = train_x[ok], train_f[ok]
+        model = surrogate(train_x, train_f)
+
+    for gen in range(start, n_gen):
+        rank, crowd = rank_and_crowding(obj)
+        if niching == "reference":
+            crowd = np.zeros_like(crowd)  # NSGA-III: tournaments on rank only
+
+        if model is None:
+            sel = pop[_tournament(rank, crowd, rng, n_pop)]
+            children = _sbx_pm(sel, lo, hi, rng, eta_c=eta_c, eta_m=eta_m, p_mut=p_mut)
+        else:
+            # breed prescreen x more, keep the children ranked best on predictions
+            sel = pop[_tournament(rank, crowd, rng, max(1, prescreen) * n_pop)]
+            cand = _sbx_pm(sel, lo, hi, rng, eta_c=eta_c, eta_m=eta_m, p_mut=p_mut)
+            r, c = rank_and_crowding(np.vstack([obj, model.predict(cand)]))
+            r, c = r[len(obj):], c[len(obj):]
+            children = cand[np.lexsort((-c, r))[:n_pop]]
+
+        obj_ch = evaluate(children) * dirs[None, :]
+
+        if model is not None:
+            ok = np.all(np.isfinite(obj_ch), axis=1)
+            if hasattr(model, "update"):
+                model.update(children[ok], obj_ch[ok])
+            else:
+                train_x = np.vstack([train_x, children[ok]])
+                train_f = np.vstack([train_f, obj_ch[ok]])
+                model = surrogate(train_x, train_f)
+
+        combined_pop = np.vstack([pop, children])
+        combined_obj = np.vstack([obj, obj_ch])
+        if niching == "reference":
+            keep = _niching_survivors(combined_obj, n_pop, ref_dirs, rng)
+        else:
+            keep = _survivors(combined_obj, n_pop)
+        pop = combined_pop[keep]
+        obj = combined_obj[keep]
+
+        yield NSGA2State(gen + 1, pop, obj * dirs[None, :], rng.bit_generator.state)
+
+
 def nsga2(
     problem: OptimizationProblem,
     *,
@@ -115,6 +735,20 @@ def nsga2(
     n_gen: int = 200,
     seed: int = 42,
     callback: Optional[Callable[[int, np.ndarray, np.ndarray], None]] = None,
+    executor: Optional[Executor] = None,
+    chunk_size: Optional[int] = None,
+    archive: Optional[EvaluationArchive] = None,
+    state: Optional[NSGA2State] = None,
+    checkpoint_path: Optional[str] = None,
+    checkpoint_every: int = 10,
+    hv_ref: Optional[np.ndarray] = None,
+    stall_gen: Optional[int] = None,
+    stall_tol: float = 1e-4,
+    hv_history: Optional[List[float]] = None,
+    niching: str = "crowding",
+    ref_dirs: Optional[np.ndarray] = None,
+    surrogate: Optional[Callable[[np.ndarray, np.ndarray], Any]] = None,
+    prescreen: int = 4,
 ) -> Tuple[np.ndarray, np.ndarray]:
     """Run NSGA-II and return the Pareto-optimal decision vectors and objectives.
 
@@ -127,6 +761,54 @@ def nsga2(
         Random seed.
     callback : callable or None
         ``callback(gen, pareto_x, pareto_obj_raw)`` called periodically.
+    executor : concurrent.futures.Executor or None
+        If given, each population is split into row chunks that are
+        evaluated concurrently on this pool (a ``ProcessPoolExecutor``
+        needs a picklable ``problem.evaluate``).  Results are identical to
+        serial evaluation for the same seed.
+    chunk_size : int or None
+        Rows per submitted chunk; default splits evenly over the CPUs.
+    archive : EvaluationArchive or None
+        If given, every evaluation is recorded there and children that
+        duplicate an archived point reuse its objectives instead of being
+        re-evaluated.  Retrieve the history / full Pareto set from it after
+        the run.
+    state : NSGA2State or None
+        Resume from a checkpoint (see :func:`nsga2_steps`).
+    checkpoint_path : str or None
+        If given, the run state is saved there every *checkpoint_every*
+        generations and after the last one.
+    hv_ref : 1-D array (n_obj,) or None
+        Hypervolume reference point in raw objective units.  Defaults to
+        the worst initial value of each objective pushed out by 10 % of
+        its range.
+    stall_gen : int or None
+        Stop early once the hypervolume of the first front has improved
+        by less than *stall_tol* (relative) over the last *stall_gen*
+        generations.  ``None`` runs all *n_gen* generations.
+    hv_history : list or None
+        If given, the hypervolume of the initial population and of every
+        generation is appended to this list as the run progresses (it can
+        be read from *callback*).  Passing a list turns tracking on.
+    niching : {"crowding", "reference"}
+        Survivor diversity measure.  ``"crowding"`` is classic NSGA-II;
+        ``"reference"`` is NSGA-III niching around *ref_dirs*, which keeps
+        fronts well spread for 4+ objectives.
+    ref_dirs : 2-D array (n_dirs, n_obj) or None
+        Reference directions for ``niching="reference"``; default is the
+        densest :func:`reference_directions` lattice with at most *n_pop*
+        points.
+    surrogate : callable (X, F) -> model, or None
+        Enables surrogate pre-screening: a model with ``predict(X)`` is
+        built from every true evaluation (``F`` is sign-adjusted so smaller
+        is better), *prescreen* x *n_pop* offspring are bred each
+        generation and only the *n_pop* ranked best on the predictions are
+        passed to ``problem.evaluate``.  Models with ``update(X, F)`` are
+        refit incrementally, others are rebuilt by calling *surrogate*
+        again.  ``functools.partial(xross.surrogate.IDWSurrogate,
+        trend=True)`` is a cheap, incrementally updated choice.
+    prescreen : int
+        Oversampling factor for pre-screening.
 
     Returns
     -------
@@ -134,98 +816,642 @@ def nsga2(
     pareto_obj : 2-D array (n_pareto, n_obj)
         Raw objective values (before sign flip).
     """
+    dirs = problem.directions
+    track_hv = hv_ref is not None or stall_gen is not None or hv_history is not None
+    ref = None if hv_ref is None else np.asarray(hv_ref, float) * dirs
+    if hv_history is None:
+        hv_history = []
+    last = state
+    for last in nsga2_steps(problem, n_pop=n_pop, n_gen=n_gen, seed=seed, state=state,
+                            executor=executor, chunk_size=chunk_size, archive=archive,
+                            niching=niching, ref_dirs=ref_dirs,
+                            surrogate=surrogate, prescreen=prescreen):
+        if track_hv:
+            obj = last.obj * dirs[None, :]
+            if ref is None:
+                span = np.ptp(obj, axis=0)
+                ref = obj.max(axis=0) + 0.1 * np.where(span > 0, span, 1.0)
+            hv_history.append(hypervolume(obj, ref))
+
+        gen = last.gen - 1
+        if gen < 0:
+            continue
+        stalled = (
+            stall_gen is not None and len(hv_history) > stall_gen
+            and hv_history[-1] - hv_history[-1 - stall_gen]
+            <= stall_tol * max(abs(hv_history[-1]), 1e-300)
+        )
+        final = stalled or gen == n_gen - 1
+        if checkpoint_path and (last.gen % max(1, checkpoint_every) == 0 or final):
+            last.save(checkpoint_path)
+        if callback and (gen % max(1, n_gen // 10) == 0 or final):
+            callback(gen, *last.pareto(dirs))
+        if stalled:
+            break
+    return last.pareto(dirs)
+
+
+def nsga2_steady_state(
+    problem: OptimizationProblem,
+    executor: Executor,
+    *,
+    n_pop: int = 100,
+    n_evals: int = 20000,
+    chunk_size: int = 2,
+    n_inflight: Optional[int] = None,
+    seed: int = 42,
+    callback: Optional[Callable[[int, np.ndarray, np.ndarray], None]] = None,
+    archive: Optional[EvaluationArchive] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Asynchronous steady-state NSGA-II.
+
+    Keeps *n_inflight* offspring batches of *chunk_size* individuals
+    evaluating on *executor* at all times.  As soon as any batch
+    completes it is merged into the population (non-dominated rank +
+    crowding truncation back to *n_pop*) and a new batch is bred from the
+    updated population, so slow evaluations never stall the pool.
+
+    Parameters
+    ----------
+    problem : OptimizationProblem
+    executor : concurrent.futures.Executor
+        Pool used for every evaluation, including the initial population.
+    n_pop : int
+        Population size.
+    n_evals : int
+        Total number of offspring evaluations after the initial population.
+    chunk_size : int
+        Offspring bred and evaluated per submitted task.
+    n_inflight : int or None
+        Number of outstanding tasks; default ``os.cpu_count()``.
+    seed : int
+        Random seed.  Because batches are merged in completion order, runs
+        are only reproducible when evaluations finish in a fixed order.
+    callback : callable or None
+        ``callback(n_done, pareto_x, pareto_obj_raw)`` called roughly ten
+        times over the run.
+    archive : EvaluationArchive or None
+        As for :func:`nsga2`; archived offspring are merged without being
+        submitted.  *n_evals* counts offspring, including archive hits.
+
+    Returns
+    -------
+    pareto_x, pareto_obj : as for :func:`nsga2`.
+    """
     rng = np.random.default_rng(seed)
     lo, hi = problem.lower_bounds, problem.upper_bounds
-    dirs = problem.directions  # +1 min, -1 max
+    dirs = problem.directions
+    chunk_size = max(1, int(chunk_size))
+    n_inflight = n_inflight or os.cpu_count() or 1
 
     pop = rng.uniform(lo, hi, size=(n_pop, problem.n_var))
-    obj_raw = problem.evaluate(pop)
-    obj = obj_raw * dirs[None, :]  # internal: always minimise
+    if archive is None:
+        obj = _evaluate_pop(problem.evaluate, pop, executor, chunk_size)
+    else:
+        obj = archive.evaluate(lambda X: _evaluate_pop(problem.evaluate, X, executor, chunk_size), pop)
+    obj = obj * dirs[None, :]
 
-    eta_c, eta_m, p_mut = 20, 20, 0.2
+    def _breed() -> np.ndarray:
+        rank, crowd = rank_and_crowding(obj)
+        n = chunk_size + chunk_size % 2  # SBX works on pairs
+        return _sbx_pm(pop[_tournament(rank, crowd, rng, n)], lo, hi, rng)[:chunk_size]
+
+    def _submit(children: np.ndarray) -> Tuple[Future, np.ndarray, np.ndarray]:
+        if archive is None:
+            known = np.full((children.shape[0], dirs.size), np.nan)
+            miss = np.ones(children.shape[0], bool)
+        else:
+            known, found = archive.lookup(children)
+            archive.n_hits += int(found.sum())
+            miss = ~found
+        if miss.any():
+            fut = executor.submit(problem.evaluate, children[miss])
+        else:
+            fut = Future()
+            fut.set_result(np.empty((0, dirs.size)))
+        return fut, known, miss
+
+    pending: Dict[Future, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+    submitted = done = 0
+    report_every = max(chunk_size, n_evals // 10)
+    next_report = report_every
+    while done < n_evals:
+        while len(pending) < n_inflight and submitted < n_evals:
+            children = _breed()[: n_evals - submitted]
+            fut, known, miss = _submit(children)
+            pending[fut] = (children, known, miss)
+            submitted += children.shape[0]
+        finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for fut in finished:
+            children, obj_ch, miss = pending.pop(fut)
+            if miss.any():
+                obj_ch[miss] = np.asarray(fut.result(), float).reshape(int(miss.sum()), -1)
+                if archive is not None:
+                    archive.add(children[miss], obj_ch[miss])
+            obj_ch = obj_ch * dirs[None, :]
+            combined_pop = np.vstack([pop, children])
+            combined_obj = np.vstack([obj, obj_ch])
+            keep = _survivors(combined_obj, n_pop)
+            pop, obj = combined_pop[keep], combined_obj[keep]
+            done += children.shape[0]
+
+        if callback and (done >= next_report or done >= n_evals):
+            next_report += report_every
+            bf = fast_nondominated_sort(obj)[0]
+            callback(done, pop[bf], obj[bf] * dirs[None, :])
+
+    best_front = fast_nondominated_sort(obj)[0]
+    return pop[best_front], obj[best_front] * dirs[None, :]
+
+
+def optuna_batch_search(
+    evaluate_batch: Callable[[np.ndarray], np.ndarray],
+    lower: np.ndarray,
+    upper: np.ndarray,
+    directions: List[str],
+    *,
+    n_trials: int = 500,
+    batch_size: int = 64,
+    names: Optional[List[str]] = None,
+    sampler: Any = None,
+    study: Any = None,
+    stop_event: Any = None,
+    n_jobs: int = 1,
+) -> Any:
+    """Optuna search with batched ask/tell over a vectorised objective.
+
+    Trials are asked *batch_size* at a time, their parameters stacked into
+    one ``(n_batch, n_var)`` array and scored with a single
+    *evaluate_batch* call, so a surrogate ``predict`` is never called row
+    by row.  Parameters with ``lower == upper`` are held fixed and
+    trials with non-finite objectives are told as failed.
+
+    Parameters
+    ----------
+    evaluate_batch : callable (X) -> Y
+        Maps ``(n_batch, n_var)`` to ``(n_batch, n_obj)`` (or ``(n_batch,)``).
+    lower, upper : 1-D arrays (n_var,)
+        Search bounds.
+    directions : list of {"minimize", "maximize"}
+        One entry per objective.
+    n_trials, batch_size : int
+        Total trials and trials asked per round.
+    names : list of str or None
+        Optuna parameter names (default ``x0, x1, ...``).
+    sampler, study : optuna objects or None
+        Custom sampler, or an existing study to continue.
+    stop_event : threading.Event or None
+        Stops after the current batch when set.
+    n_jobs : int
+        If > 1, each batch is split into *n_jobs* chunks evaluated in a
+        thread pool.
+
+    Returns
+    -------
+    study : optuna.Study
+    """
+    import optuna
+
+    if study is None:
+        study = optuna.create_study(directions=list(directions), sampler=sampler)
+    _optuna_ask_tell(study, [evaluate_batch], lower, upper, names, n_trials=n_trials,
+                     batch_size=batch_size, n_jobs=n_jobs, stop_event=stop_event)
+    return study
 
-    def _sbx_pm(parents: np.ndarray) -> np.ndarray:
-        n, d = parents.shape
-        children = parents.copy()
-        for i in range(0, n - 1, 2):
-            if rng.random() < 0.9:
-                u = rng.random(d)
-                beta = np.where(
-                    u <= 0.5,
-                    (2 * u) ** (1.0 / (eta_c + 1)),
-                    (1.0 / (2 * (1 - u))) ** (1.0 / (eta_c + 1)),
-                )
-                c1 = 0.5 * ((1 + beta) * parents[i] + (1 - beta) * parents[i + 1])
-                c2 = 0.5 * ((1 - beta) * parents[i] + (1 + beta) * parents[i + 1])
-                children[i] = np.clip(c1, lo, hi)
-                children[i + 1] = np.clip(c2, lo, hi)
-        for i in range(n):
-            for j in range(d):
-                if rng.random() < p_mut:
-                    delta = hi[j] - lo[j]
-                    if delta < 1e-15:
-                        continue
-                    u = rng.random()
-                    if u < 0.5:
-                        dq = (2 * u) ** (1.0 / (eta_m + 1)) - 1
+
+def _optuna_ask_tell(
+    study: Any,
+    stages: List[Callable[[np.ndarray], np.ndarray]],
+    lower: np.ndarray,
+    upper: np.ndarray,
+    names: Optional[List[str]],
+    *,
+    n_trials: int,
+    batch_size: int,
+    n_jobs: int = 1,
+    stop_event: Any = None,
+    on_batch: Optional[Callable[[np.ndarray, np.ndarray, np.ndarray], None]] = None,
+) -> None:
+    """Batched ask/tell loop shared by the Optuna searches.
+
+    Each round asks up to *batch_size* trials (parameters with
+    ``lower == upper`` are pinned, not sampled), stacks them into one
+    array and scores it with each of *stages* in turn, split over
+    *n_jobs* threads.  Trials with a non-finite value are told as failed.
+    With several stages (coarse to full fidelity, single objective) each
+    stage value is reported as an intermediate value and the study's
+    pruner decides which trials continue.  ``on_batch(X, Y, done)`` then
+    receives the batch, its values ``(n_batch, n_obj)`` and the indices
+    of the trials told complete (whose rows of *Y* are last-stage values).
+    """
+    import optuna
+
+    lo = np.asarray(lower, float)
+    hi = np.asarray(upper, float)
+    names = list(names) if names is not None else [f"x{i}" for i in range(lo.size)]
+    free = np.flatnonzero(hi > lo)
+    dists = {
+        names[i]: optuna.distributions.FloatDistribution(float(lo[i]), float(hi[i]))
+        for i in free
+    }
+    multi = len(study.directions) > 1
+    n_jobs = max(1, int(n_jobs))
+    ex = ThreadPoolExecutor(max_workers=n_jobs) if n_jobs > 1 else None
+
+    try:
+        done = 0
+        while done < n_trials and not (stop_event is not None and stop_event.is_set()):
+            nb = min(max(1, int(batch_size)), n_trials - done)
+            trials = [study.ask(dists) for _ in range(nb)]
+            X = np.tile(lo, (nb, 1))
+            for r, t in enumerate(trials):
+                X[r, free] = [t.params[names[i]] for i in free]
+
+            alive = np.arange(nb)
+            Y = None
+            for step, fn in enumerate(stages):
+                vals = _evaluate_pop(fn, X[alive], ex, -(-alive.size // n_jobs))
+                if Y is None:
+                    Y = np.full((nb, vals.shape[1]), np.nan)
+                Y[alive] = vals
+                ok = np.all(np.isfinite(vals), axis=1)
+                for b in alive[~ok]:
+                    study.tell(trials[b], state=optuna.trial.TrialState.FAIL)
+                alive = alive[ok]
+                if step == len(stages) - 1 or alive.size == 0:
+                    break
+                keep = []
+                for b in alive:
+                    trials[b].report(float(Y[b, 0]), step)
+                    if trials[b].should_prune():
+                        study.tell(trials[b], state=optuna.trial.TrialState.PRUNED)
                     else:
-                        dq = 1 - (2 * (1 - u)) ** (1.0 / (eta_m + 1))
-                    children[i, j] = np.clip(children[i, j] + dq * delta, lo[j], hi[j])
-        return children
+                        keep.append(b)
+                alive = np.asarray(keep, dtype=int)
+                if alive.size == 0:
+                    break
 
-    for gen in range(n_gen):
-        fronts = fast_nondominated_sort(obj)
-        rank = np.zeros(n_pop, dtype=int)
-        crowd = np.zeros(n_pop, dtype=float)
-        for fi, front in enumerate(fronts):
-            for idx in front:
-                rank[idx] = fi
-            cd = crowding_distance(obj, front)
-            for k_i, idx in enumerate(front):
-                crowd[idx] = cd[k_i]
-
-        # Tournament selection
-        sel = np.empty_like(pop)
-        for i in range(n_pop):
-            a, b = rng.integers(0, n_pop, 2)
-            if rank[a] < rank[b]:
-                sel[i] = pop[a]
-            elif rank[a] > rank[b]:
-                sel[i] = pop[b]
-            elif crowd[a] > crowd[b]:
-                sel[i] = pop[a]
-            else:
-                sel[i] = pop[b]
+            for b in alive:
+                study.tell(trials[b], [float(v) for v in Y[b]] if multi else float(Y[b, 0]))
+            if on_batch is not None:
+                on_batch(X, Y, alive)
+            done += nb
+    finally:
+        if ex is not None:
+            ex.shutdown()
 
-        children = _sbx_pm(sel)
-        obj_ch_raw = problem.evaluate(children)
-        obj_ch = obj_ch_raw * dirs[None, :]
 
-        combined_pop = np.vstack([pop, children])
-        combined_obj = np.vstack([obj, obj_ch])
-        fronts_all = fast_nondominated_sort(combined_obj)
-
-        new_pop, new_obj = [], []
-        for front in fronts_all:
-            if len(new_pop) + len(front) <= n_pop:
-                for idx in front:
-                    new_pop.append(combined_pop[idx])
-                    new_obj.append(combined_obj[idx])
-            else:
-                cd = crowding_distance(combined_obj, front)
-                order = np.argsort(-cd)
-                remain = n_pop - len(new_pop)
-                for k_i in order[:remain]:
-                    new_pop.append(combined_pop[front[k_i]])
-                    new_obj.append(combined_obj[front[k_i]])
-                break
+# -----------------------------------------------------------------------
+#  Particle-swarm optimisation
+# -----------------------------------------------------------------------
 
-        pop = np.array(new_pop)
-        obj = np.array(new_obj)
+class _Swarm:
+    """One bounded particle swarm: positions, velocities, personal/global bests.
 
-        if callback and (gen % max(1, n_gen // 10) == 0 or gen == n_gen - 1):
-            bf = fast_nondominated_sort(obj)[0]
-            callback(gen, pop[bf], (obj[bf] * dirs[None, :]))  # raw values
+    Also carries its own stagnation bookkeeping so that it can be advanced
+    independently (e.g. in a worker process for :func:`pso_islands`).
+    """
 
-    best_front = fast_nondominated_sort(obj)[0]
-    return pop[best_front], obj[best_front] * dirs[None, :]  # raw obj values
+    def __init__(
+        self,
+        objective: Callable[[np.ndarray], np.ndarray],
+        lo: np.ndarray,
+        hi: np.ndarray,
+        n_particles: int,
+        rng: np.random.Generator,
+        x0: Optional[np.ndarray],
+        inertia: float,
+        cognitive: float,
+        social: float,
+        vmax_frac: float,
+        project: Optional[Callable[[np.ndarray], np.ndarray]],
+    ):
+        self.objective = objective
+        self.lo, self.hi = lo, hi
+        self.rng = rng
+        self.w, self.c1, self.c2 = inertia, cognitive, social
+        self.project = project
+        self.vmax = np.maximum(vmax_frac * (hi - lo), 1e-12)
+        n, d = n_particles, lo.size
+        self.x = rng.uniform(lo, hi, (n, d))
+        if x0 is not None:
+            self.x[0] = np.clip(x0, lo, hi)
+        if project is not None:
+            self.x = project(self.x)
+        self.v = rng.uniform(-self.vmax, self.vmax, (n, d))
+        self.pbest_x = self.x.copy()
+        self.pbest_f = np.full(n, np.inf)
+        self.gbest_x = self.x[0].copy()
+        self.gbest_f = np.inf
+        self.started = False
+        self.best_ref = np.inf
+        self.jam = 0
+        self.shakes = 0
+        self.done = False
+
+    def evaluate(self) -> bool:
+        """Score the current positions; return True if the global best improved."""
+        self.started = True
+        f = np.asarray(self.objective(self.x), float).reshape(-1)
+        f = np.where(np.isfinite(f), f, np.inf)
+        better = f < self.pbest_f
+        self.pbest_f[better] = f[better]
+        self.pbest_x[better] = self.x[better]
+        i = int(np.argmin(f))
+        if f[i] < self.gbest_f:
+            self.gbest_f = float(f[i])
+            self.gbest_x = self.x[i].copy()
+            return True
+        return False
+
+    def step(self) -> bool:
+        """One velocity/position update followed by evaluation."""
+        r1 = self.rng.random(self.x.shape)
+        r2 = self.rng.random(self.x.shape)
+        self.v = np.clip(
+            self.w * self.v
+            + self.c1 * r1 * (self.pbest_x - self.x)
+            + self.c2 * r2 * (self.gbest_x[None, :] - self.x),
+            -self.vmax, self.vmax,
+        )
+        self.x = np.clip(self.x + self.v, self.lo, self.hi)
+        if self.project is not None:
+            self.x = self.project(self.x)
+        return self.evaluate()
+
+    def shake(self, frac: float) -> None:
+        """Scatter the swarm around the global best and re-draw velocities."""
+        span = frac * (self.hi - self.lo)
+        self.x = np.clip(
+            self.gbest_x + self.rng.uniform(-span, span, self.x.shape),
+            self.lo, self.hi,
+        )
+        if self.project is not None:
+            self.x = self.project(self.x)
+        self.v = self.rng.uniform(-self.vmax, self.vmax, self.x.shape)
+
+    def iterate(self, stall: int, max_restarts: int, restart_frac: float, tol: float) -> bool:
+        """:meth:`step` plus stagnation restarts; sets :attr:`done` on a final stall."""
+        if not self.started:
+            self.evaluate()
+            self.best_ref = self.gbest_f
+        improved = self.step()
+        if self.gbest_f < self.best_ref - tol:
+            self.best_ref = self.gbest_f
+            self.jam = 0
+        else:
+            self.jam += 1
+            if self.jam >= stall and self.shakes < max_restarts:
+                self.shake(restart_frac)
+                self.jam = 0
+                self.shakes += 1
+            elif self.jam >= 3 * stall:
+                self.done = True
+        return improved
+
+    def immigrate(self, xs: np.ndarray, fs: np.ndarray) -> None:
+        """Replace the worst particles with migrants *xs* (personal-best values *fs*)."""
+        worst = np.argsort(self.pbest_f)[::-1][: len(xs)]
+        self.x[worst] = xs
+        self.pbest_x[worst] = xs
+        self.pbest_f[worst] = fs
+        i = int(np.argmin(fs))
+        if fs[i] < self.gbest_f:
+            self.gbest_f = float(fs[i])
+            self.gbest_x = xs[i].copy()
+
+
+# stop flag of a pool worker process, installed by _init_island_worker
+_island_stop: Any = None
+
+
+def _init_island_worker(stop: Any) -> None:
+    global _island_stop
+    _island_stop = stop
+
+
+def _advance_island(
+    swarm: _Swarm, n_steps: int, stall: int, max_restarts: int,
+    restart_frac: float, tol: float, stop: Any = None,
+) -> _Swarm:
+    """Run *n_steps* iterations of one island (process-pool worker).
+
+    Stops early once *stop* (or, in a pool worker, the shared stop flag)
+    is set; it is checked before every iteration.
+    """
+    stop = stop if stop is not None else _island_stop
+    for _ in range(n_steps):
+        if swarm.done or (stop is not None and stop.is_set()):
+            break
+        swarm.iterate(stall, max_restarts, restart_frac, tol)
+    return swarm
+
+
+def pso(
+    objective: Callable[[np.ndarray], np.ndarray],
+    lower_bounds: np.ndarray,
+    upper_bounds: np.ndarray,
+    *,
+    n_particles: int = 100,
+    n_iter: int = 300,
+    x0: Optional[np.ndarray] = None,
+    seed: Optional[int] = 42,
+    inertia: float = 0.72,
+    cognitive: float = 1.49,
+    social: float = 1.49,
+    vmax_frac: float = 0.3,
+    stall_iter: Optional[int] = None,
+    max_restarts: int = 5,
+    restart_frac: float = 0.3,
+    tol: float = 1e-6,
+    project: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+    callback: Optional[Callable[[int, np.ndarray, float, bool], Optional[bool]]] = None,
+    stop_event: Any = None,
+) -> Tuple[np.ndarray, float]:
+    """Minimise *objective* with a bounded particle swarm.
+
+    Parameters
+    ----------
+    objective : callable (X) -> f
+        Vectorised objective mapping ``(n_particles, n_var)`` to
+        ``(n_particles,)``.  Non-finite values are treated as ``inf``.
+    lower_bounds, upper_bounds : 1-D arrays (n_var,)
+        Box bounds; variables with ``lower == upper`` stay fixed.
+    n_particles, n_iter : int
+        Swarm size and maximum number of iterations.
+    x0 : 1-D array or None
+        Initial guess, placed as particle 0.
+    seed : int or None
+        Random seed.
+    inertia, cognitive, social : float
+        PSO coefficients (constriction-type defaults 0.72 / 1.49 / 1.49).
+    vmax_frac : float
+        Velocity limit as a fraction of the bound range.
+    stall_iter : int or None
+        Iterations without improvement (by more than *tol*) before the
+        swarm is shaken around the global best; default
+        ``max(30, n_iter // 4)``.  After *max_restarts* shakes, the run
+        stops once it stalls for ``3 * stall_iter`` iterations.
+    max_restarts : int
+        Maximum number of stagnation restarts.
+    restart_frac : float
+        Scatter half-width on restart, as a fraction of the bound range.
+    tol : float
+        Minimum decrease that counts as an improvement.
+    project : callable (X) -> X or None
+        Optional repair applied to positions after every move
+        (e.g. periodicity constraints).
+    callback : callable or None
+        ``callback(it, best_x, best_f, improved)`` after every iteration;
+        returning ``True`` stops the run.
+    stop_event : threading.Event or None
+        Stops the run when set.
+
+    Returns
+    -------
+    best_x : 1-D array (n_var,)
+    best_f : float
+    """
+    lo = np.asarray(lower_bounds, float)
+    hi = np.asarray(upper_bounds, float)
+    swarm = _Swarm(
+        objective, lo, hi, int(n_particles), np.random.default_rng(seed), x0,
+        inertia, cognitive, social, vmax_frac, project,
+    )
+    stall = stall_iter if stall_iter is not None else max(30, n_iter // 4)
+    for it in range(n_iter):
+        if stop_event is not None and stop_event.is_set():
+            break
+        improved = swarm.iterate(stall, max_restarts, restart_frac, tol)
+        if callback is not None and callback(it, swarm.gbest_x.copy(), swarm.gbest_f, improved):
+            break
+        if swarm.done:
+            break
+    if not swarm.started:
+        swarm.evaluate()
+    return swarm.gbest_x.copy(), float(swarm.gbest_f)
+
+
+def pso_islands(
+    objective: Callable[[np.ndarray], np.ndarray],
+    lower_bounds: np.ndarray,
+    upper_bounds: np.ndarray,
+    *,
+    n_islands: int = 4,
+    n_particles: int = 100,
+    n_iter: int = 300,
+    migration_interval: int = 20,
+    n_migrants: int = 2,
+    x0: Optional[np.ndarray] = None,
+    seed: Optional[int] = 42,
+    n_jobs: Optional[int] = None,
+    inertia: float = 0.72,
+    cognitive: float = 1.49,
+    social: float = 1.49,
+    vmax_frac: float = 0.3,
+    stall_iter: Optional[int] = None,
+    max_restarts: int = 5,
+    restart_frac: float = 0.3,
+    tol: float = 1e-6,
+    project: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+    callback: Optional[Callable[[int, np.ndarray, float, bool], Optional[bool]]] = None,
+    stop_event: Any = None,
+) -> Tuple[np.ndarray, float]:
+    """Island-model PSO: independent swarms in a process pool with ring migration.
+
+    Each island is a :func:`pso` swarm with its own random stream spawned
+    from *seed*.  Every *migration_interval* iterations the islands are
+    synchronised and each sends its *n_migrants* best personal bests to
+    the next island in a ring, replacing that island's worst particles.
+    The result depends only on *seed*, not on *n_jobs* or scheduling.
+
+    Parameters
+    ----------
+    objective : callable (X) -> f
+        As for :func:`pso`; must be picklable when ``n_jobs > 1``
+        (a module-level function or an instance of a module-level class).
+    n_islands : int
+        Number of swarms.
+    migration_interval : int
+        Iterations between migrations.
+    n_migrants : int
+        Particles sent from each island per migration.
+    x0 : 1-D array or None
+        Initial guess, placed in the first island only.
+    n_jobs : int or None
+        Worker processes (default ``min(n_islands, os.cpu_count())``);
+        ``1`` runs all islands in the calling process.  Workers are
+        started with the ``spawn`` method, which is safe from threaded
+        (e.g. GUI) processes.
+    callback : callable or None
+        ``callback(it, best_x, best_f, improved)`` after every migration
+        epoch, as for :func:`pso`; *improved* tells whether the global best
+        dropped during the epoch.  Returning ``True`` stops the run.
+    stop_event : threading.Event or None
+        Stops the run when set; islands check it before every iteration,
+        also inside worker processes.
+
+    Other parameters are as for :func:`pso` and apply to every island.
+
+    Returns
+    -------
+    best_x : 1-D array (n_var,)
+    best_f : float
+    """
+    lo = np.asarray(lower_bounds, float)
+    hi = np.asarray(upper_bounds, float)
+    n_islands = max(1, int(n_islands))
+    seqs = np.random.SeedSequence(seed).spawn(n_islands)
+    islands = [
+        _Swarm(
+            objective, lo, hi, int(n_particles), np.random.default_rng(sq),
+            x0 if i == 0 else None, inertia, cognitive, social, vmax_frac, project,
+        )
+        for i, sq in enumerate(seqs)
+    ]
+    stall = stall_iter if stall_iter is not None else max(30, n_iter // 4)
+    n_mig = max(0, min(int(n_migrants), int(n_particles) - 1))
+    workers = n_jobs if n_jobs is not None else min(n_islands, os.cpu_count() or 1)
+    ex = mp_stop = None
+    if workers > 1 and n_islands > 1:
+        # spawn, not fork: forking a process with GUI/BLAS threads is unsafe
+        ctx = multiprocessing.get_context("spawn")
+        mp_stop = ctx.Event()
+        ex = ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                 initializer=_init_island_worker, initargs=(mp_stop,))
+    try:
+        it = 0
+        best_f = min(s.gbest_f for s in islands)
+        while it < n_iter and not all(s.done for s in islands):
+            if stop_event is not None and stop_event.is_set():
+                break
+            n_steps = min(max(1, int(migration_interval)), n_iter - it)
+            args = (n_steps, stall, max_restarts, restart_frac, tol)
+            if ex is None:
+                islands = [_advance_island(s, *args, stop_event) for s in islands]
+            else:
+                futs = [ex.submit(_advance_island, s, *args) for s in islands]
+                while wait(futs, timeout=0.1)[1]:
+                    if stop_event is not None and stop_event.is_set():
+                        mp_stop.set()  # workers see it at their next iteration
+                islands = [f.result() for f in futs]
+            it += n_steps
+
+            if n_islands > 1 and n_mig > 0:
+                emigrants = []
+                for s in islands:
+                    top = np.argsort(s.pbest_f)[:n_mig]
+                    emigrants.append((s.pbest_x[top].copy(), s.pbest_f[top].copy()))
+                for i, (xs, fs) in enumerate(emigrants):
+                    islands[(i + 1) % n_islands].immigrate(xs, fs)
+
+            best = min(islands, key=lambda s: s.gbest_f)
+            improved = best.gbest_f < best_f
+            best_f = min(best_f, best.gbest_f)
+            if callback is not None and callback(it, best.gbest_x.copy(), best.gbest_f, improved):
+                break
+    finally:
+        if ex is not None:
+            ex.shutdown()
+    best = min(islands, key=lambda s: s.gbest_f)
+    return best.gbest_x.copy(), float(best.gbest_f)
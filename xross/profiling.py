@@ -0,0 +1,356 @@
+"""
+xross.profiling — Streaming summary statistics for process datasets.
+
+One pass over row chunks accumulates, per numeric column, the count,
+missing values, mean/variance (Chan's pairwise update), min/max and a
+histogram whose range doubles as new extremes arrive, together with the
+pairwise-complete Pearson correlation matrix and a uniform random sample
+of rows for plots and quantiles.  Memory is bounded by the chunk size and
+the sample size, not the dataset.
+
+Results are cached by a content hash of the data, so profiling the same
+dataset again costs only the hash.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+__all__ = [
+    "DataProfile",
+    "dataset_hash",
+    "profile_dataframe",
+    "profile_csv",
+]
+
+_CACHE: "OrderedDict[str, DataProfile]" = OrderedDict()
+_CACHE_SIZE = 8
+
+
+@dataclass
+class DataProfile:
+    """Profile of the numeric columns of a dataset.
+
+    Attributes
+    ----------
+    columns : list of str
+    n_rows : int
+    count, missing : 1-D int arrays (n_col,)
+        Finite and missing values per column.
+    mean, std, min, max : 1-D arrays (n_col,)
+        Exact over all rows (``std`` with ``ddof=1``).
+    corr : 2-D array (n_col, n_col)
+        Pairwise-complete Pearson correlation, as :meth:`pandas.DataFrame.corr`.
+    hist_counts, hist_edges : lists of 1-D arrays
+        Histogram of every column over all rows.
+    sample : DataFrame
+        Uniform random sample of rows (all rows when the dataset is small).
+    """
+
+    columns: List[str]
+    n_rows: int
+    count: np.ndarray
+    missing: np.ndarray
+    mean: np.ndarray
+    std: np.ndarray
+    min: np.ndarray
+    max: np.ndarray
+    corr: np.ndarray
+    hist_counts: List[np.ndarray]
+    hist_edges: List[np.ndarray]
+    sample: pd.DataFrame = field(repr=False)
+
+    @property
+    def sampled(self) -> bool:
+        """True when :attr:`sample` is a strict subset of the rows."""
+        return len(self.sample) < self.n_rows
+
+    def describe(self) -> pd.DataFrame:
+        """Table in the layout of ``df.describe().T`` plus a *missing* column.
+
+        Quartiles come from :attr:`sample`, so they are estimates when
+        :attr:`sampled` is true; everything else is exact.
+        """
+        q = self.sample.quantile([0.25, 0.5, 0.75]).to_numpy().T.reshape(len(self.columns), 3)
+        return pd.DataFrame({
+            "count": self.count.astype(float), "mean": self.mean, "std": self.std,
+            "min": self.min, "25%": q[:, 0], "50%": q[:, 1], "75%": q[:, 2],
+            "max": self.max, "missing": self.missing,
+        }, index=self.columns)
+
+    def corr_frame(self) -> pd.DataFrame:
+        """Correlation matrix as a labelled DataFrame."""
+        return pd.DataFrame(self.corr, index=self.columns, columns=self.columns)
+
+
+# -----------------------------------------------------------------------
+#  Accumulator
+# -----------------------------------------------------------------------
+
+class _Profiler:
+    """Chunk-wise accumulator behind :func:`profile_dataframe` / :func:`profile_csv`."""
+
+    def __init__(self, columns: List[str], bins: int, sample_size: int, seed: int):
+        p = len(columns)
+        self.columns = columns
+        self.bins = bins
+        self.n_fine = 8 * bins  # resolution left for the range to grow; merged in finish()
+        self.sample_size = sample_size
+        self.rng = np.random.default_rng(seed)
+        self.n_rows = 0
+        self.n = np.zeros(p)
+        self.mean = np.zeros(p)
+        self.m2 = np.zeros(p)
+        self.lo = np.full(p, np.inf)
+        self.hi = np.full(p, -np.inf)
+        self.shift: Optional[np.ndarray] = None
+        self.n_ij = np.zeros((p, p))
+        self.s_ij = np.zeros((p, p))
+        self.ss_ij = np.zeros((p, p))
+        self.cross = np.zeros((p, p))
+        self.h_origin = np.full(p, np.nan)
+        self.h_width = np.ones(p)
+        self.h_counts = np.zeros((p, self.n_fine), np.int64)
+        self.keys = np.empty(0)
+        self.rows = np.empty((0, p))
+
+    def add(self, X: np.ndarray) -> None:
+        X = np.asarray(X, float)
+        if X.shape[0] == 0:
+            return
+        self.n_rows += X.shape[0]
+        fin = np.isfinite(X)
+        M = fin.astype(float)
+
+        # moments: Chan et al. pairwise combination
+        n_c = M.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_c = np.where(fin, X, 0.0).sum(axis=0) / n_c
+        mean_c = np.where(n_c > 0, mean_c, 0.0)
+        m2_c = (np.where(fin, X - mean_c, 0.0) ** 2).sum(axis=0)
+        n_tot = self.n + n_c
+        delta = mean_c - self.mean
+        with np.errstate(invalid="ignore", divide="ignore"):
+            frac = np.where(n_tot > 0, n_c / n_tot, 0.0)
+        self.mean += delta * frac
+        self.m2 += m2_c + delta ** 2 * self.n * frac
+        self.n = n_tot
+        self.lo = np.fmin(self.lo, np.where(fin, X, np.inf).min(axis=0))
+        self.hi = np.fmax(self.hi, np.where(fin, X, -np.inf).max(axis=0))
+
+        # pairwise-complete co-moments, shifted by the first chunk's mean
+        if self.shift is None:
+            self.shift = mean_c.copy()
+        Z = np.where(fin, X - self.shift, 0.0)
+        self.n_ij += M.T @ M
+        self.s_ij += Z.T @ M
+        self.ss_ij += (Z * Z).T @ M
+        self.cross += Z.T @ Z
+
+        for j in range(X.shape[1]):
+            x = X[fin[:, j], j]
+            if x.size:
+                self._hist_add(j, x)
+
+        # uniform sample: keep the rows with the smallest random keys
+        keys = np.concatenate([self.keys, self.rng.random(X.shape[0])])
+        rows = np.vstack([self.rows, X])
+        if keys.size > self.sample_size:
+            keep = np.argpartition(keys, self.sample_size)[: self.sample_size]
+            keys, rows = keys[keep], rows[keep]
+        self.keys, self.rows = keys, rows
+
+    def _hist_add(self, j: int, x: np.ndarray) -> None:
+        B = self.n_fine
+        lo, hi = x.min(), x.max()
+        if np.isnan(self.h_origin[j]):
+            w = (hi - lo) / B
+            if w <= 0:
+                w = max(abs(lo), 1.0) * 1e-3
+                lo -= w * B / 2
+            self.h_origin[j], self.h_width[j] = lo, w
+        a, w, c = self.h_origin[j], self.h_width[j], self.h_counts[j]
+        # widen the range by doubling the bin width (merging bin pairs)
+        while lo < a:
+            c = np.concatenate([np.zeros(B // 2, np.int64), c.reshape(-1, 2).sum(axis=1)])
+            a, w = a - B * w, 2 * w
+        while hi > a + B * w:
+            c = np.concatenate([c.reshape(-1, 2).sum(axis=1), np.zeros(B // 2, np.int64)])
+            w = 2 * w
+        idx = np.clip(((x - a) / w).astype(np.int64), 0, B - 1)
+        self.h_counts[j] = c + np.bincount(idx, minlength=B)
+        self.h_origin[j], self.h_width[j] = a, w
+
+    def finish(self) -> DataProfile:
+        cnt = self.n.astype(np.int64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.sqrt(self.m2 / (self.n - 1))
+            nn = self.n_ij
+            mi = self.s_ij / nn  # mean of i over rows where j is present
+            var_i = self.ss_ij / nn - mi ** 2
+            cov = self.cross / nn - mi * mi.T
+            corr = cov / np.sqrt(var_i * var_i.T)
+        corr[nn < 2] = np.nan
+        corr = np.clip(corr, -1.0, 1.0)
+        has = cnt > 0
+        d = np.flatnonzero((cnt > 1) & (np.diag(var_i) > 0))
+        corr[d, d] = 1.0
+
+        counts, edges = [], []
+        for j in range(len(self.columns)):
+            c = self.h_counts[j]
+            if not c.any():
+                counts.append(np.zeros(0, np.int64))
+                edges.append(np.zeros(1))
+                continue
+            nz = np.flatnonzero(c)
+            i0, i1 = nz[0], nz[-1] + 1
+            w = self.h_width[j]
+            c = c[i0:i1]
+            e0 = self.h_origin[j] + i0 * w
+            while c.size >= 2 * self.bins:
+                if c.size % 2:
+                    c = np.append(c, 0)
+                c, w = c.reshape(-1, 2).sum(axis=1), 2 * w
+            counts.append(c)
+            edges.append(e0 + w * np.arange(c.size + 1))
+
+        order = np.argsort(self.keys)
+        return DataProfile(
+            columns=list(self.columns),
+            n_rows=self.n_rows,
+            count=cnt,
+            missing=self.n_rows - cnt,
+            mean=np.where(has, self.mean, np.nan),
+            std=std,
+            min=np.where(has, self.lo, np.nan),
+            max=np.where(has, self.hi, np.nan),
+            corr=corr,
+            hist_counts=counts,
+            hist_edges=edges,
+            sample=pd.DataFrame(self.rows[order], columns=self.columns),
+        )
+
+
+def _run(chunks: Iterable[np.ndarray], columns: List[str], bins: int,
+         sample_size: int, seed: int) -> DataProfile:
+    prof = _Profiler(columns, bins, sample_size, seed)
+    for X in chunks:
+        prof.add(X)
+    return prof.finish()
+
+
+def _cached(key: str) -> Optional[DataProfile]:
+    if key in _CACHE:
+        _CACHE.move_to_end(key)
+        return _CACHE[key]
+    return None
+
+
+def _store(key: str, prof: DataProfile) -> None:
+    _CACHE[key] = prof
+    while len(_CACHE) > _CACHE_SIZE:
+        _CACHE.popitem(last=False)
+
+
+# -----------------------------------------------------------------------
+#  Public API
+# -----------------------------------------------------------------------
+
+def dataset_hash(df: pd.DataFrame, chunk_size: int = 200_000) -> str:
+    """Content hash of a DataFrame (values and column names, not the index)."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update("\x1f".join(map(str, df.columns)).encode())
+    for i in range(0, len(df), chunk_size):
+        h.update(pd.util.hash_pandas_object(df.iloc[i:i + chunk_size], index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def profile_dataframe(
+    df: pd.DataFrame,
+    *,
+    bins: int = 20,
+    sample_size: int = 10_000,
+    chunk_size: int = 200_000,
+    seed: int = 0,
+    use_cache: bool = True,
+) -> DataProfile:
+    """Profile the numeric columns of *df* in row chunks.
+
+    Parameters
+    ----------
+    df : DataFrame
+        Non-numeric columns are ignored.
+    bins : int
+        Approximate number of histogram bins per column.
+    sample_size : int
+        Rows kept for plots and quartiles.
+    chunk_size : int
+        Rows per pass step (bounds temporary memory).
+    seed : int
+        Sampling seed.
+    use_cache : bool
+        Reuse the profile of identical data (keyed by :func:`dataset_hash`
+        and the settings).
+
+    Returns
+    -------
+    DataProfile
+    """
+    num = df.select_dtypes(include=[np.number])
+    key = None
+    if use_cache:
+        key = f"df:{dataset_hash(num, chunk_size)}:{bins}:{sample_size}:{seed}"
+        hit = _cached(key)
+        if hit is not None:
+            return hit
+    chunks = (num.iloc[i:i + chunk_size].to_numpy(float) for i in range(0, len(num), chunk_size))
+    prof = _run(chunks, [str(c) for c in num.columns], bins, sample_size, seed)
+    if key is not None:
+        _store(key, prof)
+    return prof
+
+
+def profile_csv(
+    path: str,
+    *,
+    bins: int = 20,
+    sample_size: int = 10_000,
+    chunk_size: int = 200_000,
+    seed: int = 0,
+    use_cache: bool = True,
+) -> DataProfile:
+    """Profile the numeric columns of a CSV file without loading it whole.
+
+    Numeric columns are those pandas infers as numeric in the first
+    chunk.  The cache key is the file path, size and modification time.
+    See :func:`profile_dataframe` for the parameters.
+    """
+    st = os.stat(path)
+    key = f"csv:{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}:{bins}:{sample_size}:{seed}"
+    if use_cache:
+        hit = _cached(key)
+        if hit is not None:
+            return hit
+    reader = pd.read_csv(path, chunksize=chunk_size)
+    first = next(reader, None)
+    cols: List[str] = [] if first is None else list(first.select_dtypes(include=[np.number]).columns)
+
+    def _chunks():
+        if first is None:
+            return
+        yield first[cols].to_numpy(float)
+        for chunk in reader:
+            yield pd.DataFrame({c: pd.to_numeric(chunk[c], errors="coerce") for c in cols}).to_numpy(float)
+
+    prof = _run(_chunks(), [str(c) for c in cols], bins, sample_size, seed)
+    if use_cache:
+        _store(key, prof)
+    return prof
@@ -0,0 +1,830 @@
+"""
+xross.surrogate — Cheap regression surrogates for expensive objectives.
+
+Provides two models with a common interface (``predict``, incremental
+``update``, ``cross_validate``, ``importance``), used both by the
+optimisation window's CSV models and for pre-screening offspring in
+:func:`xross.optimize.nsga2`:
+
+* :class:`IDWSurrogate` — inverse-distance weighting on min–max normalised
+  inputs, optionally on top of a global linear trend.  It needs no
+  training beyond storing the data; predictions are computed in query
+  chunks against the whole training set or, for large training sets,
+  against the *k* nearest neighbours found with a KD-tree
+  (scikit-learn's ``KDTree`` when available).
+* :class:`GPSurrogate` — Gaussian-process regression with predictive
+  variance and block Cholesky updates.
+
+:func:`permutation_importance` scores input variables for any model with a
+``predict`` method, permuting one column at a time in a reused buffer.
+Cross-validation is closed-form for both models (no refits).
+
+:func:`recommend_batch` proposes the next *q* experiments from a model
+with predictive variance by batch expected improvement (one objective) or
+expected hypervolume improvement (several objectives).
+:func:`predict_csv` scores CSV files of any size in bounded memory.
+"""
+
+from __future__ import annotations
+
+import copy
+import math
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Any, Callable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from xross.optimize import fast_nondominated_sort, hypervolume
+
+try:
+    from sklearn.neighbors import KDTree
+except ImportError:  # pragma: no cover - optional
+    KDTree = None
+
+__all__ = [
+    "IDWSurrogate",
+    "GPSurrogate",
+    "CrossValidation",
+    "PermutationImportance",
+    "permutation_importance",
+    "predict_csv",
+    "recommend_batch",
+]
+
+
+class _Surrogate(ABC):
+    """Shared diagnostics for surrogates with ``predict`` and ``cross_validate``."""
+
+    X: np.ndarray
+    Y: np.ndarray
+    _importance: Optional["PermutationImportance"] = None
+
+    @property
+    def importance(self) -> np.ndarray:
+        """Permutation importance ``(n_y, n_x)``, rows normalised to sum 1."""
+        return self.permutation_importance().normalised()
+
+    def permutation_importance(self, **kwargs: Any) -> "PermutationImportance":
+        """:func:`permutation_importance` on the training data (cached for default arguments)."""
+        if kwargs:
+            return permutation_importance(self, self.X, self.Y, **kwargs)
+        if self._importance is None:
+            self._importance = permutation_importance(self, self.X, self.Y)
+        return self._importance
+
+    @abstractmethod
+    def predict(self, xnew: np.ndarray) -> np.ndarray:
+        """Predict outputs for *xnew*, shape ``(n, n_y)``."""
+
+    @abstractmethod
+    def cross_validate(self, n_folds: Optional[int] = None, seed: int = 0) -> "CrossValidation":
+        """Leave-one-out (``n_folds=None``) or k-fold cross-validated predictions."""
+
+    def score_text(self, names: Optional[list] = None) -> str:
+        """Cross-validated R² / RMSE, one line per output."""
+        cv = self.cross_validate()
+        label = "LOO" if cv.n_folds == self.X.shape[0] else f"{cv.n_folds}-fold"
+        names = names or [f"y{j}" for j in range(self.Y.shape[1])]
+        return "\n".join(
+            f"  {nm}: {label}-R² = {r2:.4f}, RMSE = {rmse:.4g}"
+            for nm, r2, rmse in zip(names, cv.r2, cv.rmse)
+        )
+
+    def _cv_result(self, pred: np.ndarray, fold: np.ndarray) -> "CrossValidation":
+        ss_res = np.sum((self.Y - pred) ** 2, axis=0)
+        ss_tot = np.sum((self.Y - self.Y.mean(axis=0)) ** 2, axis=0)
+        return CrossValidation(
+            pred=pred,
+            r2=1.0 - ss_res / np.maximum(ss_tot, 1e-12),
+            rmse=np.sqrt(ss_res / self.Y.shape[0]),
+            n_folds=int(np.unique(fold).size),
+        )
+
+    @staticmethod
+    def _folds(n: int, n_folds: Optional[int], seed: int) -> np.ndarray:
+        """Fold label per sample; every sample is its own fold for LOO."""
+        if n_folds is None or n_folds >= n:
+            return np.arange(n)
+        return np.random.default_rng(seed).permutation(np.arange(n) % max(2, int(n_folds)))
+
+
+class IDWSurrogate(_Surrogate):
+    """Inverse-distance-weighted interpolator ``Y ≈ f(X)``.
+
+    Parameters
+    ----------
+    X : 2-D array (n_samples, n_x)
+        Training inputs.
+    Y : 2-D array (n_samples, n_y) or 1-D array
+        Training outputs.
+    power : float
+        Distance exponent of the weights ``1 / d**power``.
+    trend : bool
+        If True, fit a linear least-squares trend and interpolate only its
+        residuals.  Plain IDW is flat between and beyond the samples (its
+        predictions never leave the range of ``Y``); the trend lets the
+        model extrapolate, which matters when it is used to rank unseen
+        candidates.
+    k : int or None
+        If given, only the *k* nearest training samples contribute to each
+        prediction (found with a KD-tree).  ``None`` uses all samples.
+    max_block : int
+        Upper bound on the number of query × sample distances held in
+        memory at once; queries are processed in chunks of
+        ``max_block // n_samples`` rows.
+
+    Notes
+    -----
+    The input scaling is fixed by the initial data (as for
+    :class:`GPSurrogate`), so :meth:`update` only normalises the new rows;
+    the trend is refit from accumulated normal equations.
+    """
+
+    def __init__(
+        self,
+        X: np.ndarray,
+        Y: np.ndarray,
+        power: float = 2.0,
+        trend: bool = False,
+        k: Optional[int] = None,
+        max_block: int = 4_000_000,
+    ):
+        self.power = float(power)
+        self.trend = bool(trend)
+        self.k = None if k is None else int(k)
+        self.max_block = int(max_block)
+        self.X = np.atleast_2d(np.asarray(X, float))
+        self.Y = np.asarray(Y, float).reshape(self.X.shape[0], -1)
+        self._rescale()
+
+    def _rescale(self) -> None:
+        self.xmin = self.X.min(0)
+        self.xmax = self.X.max(0)
+        self.xrng = np.where(self.xmax - self.xmin < 1e-12, 1.0, self.xmax - self.xmin)
+        self.Xn = (self.X - self.xmin) / self.xrng
+        self._sq = np.sum(self.Xn ** 2, axis=1)
+        self._tree = None
+        self._importance = None
+        if self.trend:
+            A = np.hstack([np.ones((self.Xn.shape[0], 1)), self.Xn])
+            self._AtA, self._AtY = A.T @ A, A.T @ self.Y
+            self.beta = np.linalg.lstsq(A, self.Y, rcond=None)[0]
+            self.resid = self.Y - A @ self.beta
+        else:
+            self.beta = None
+            self.resid = self.Y
+
+    def update(self, X: np.ndarray, Y: np.ndarray) -> "IDWSurrogate":
+        """Append samples incrementally and return ``self``.
+
+        Only the *m* new rows are normalised; with ``trend=True`` the
+        ``(n_x + 1)``-square normal equations are updated and re-solved and
+        the residuals refreshed, ``O(n·n_x·n_y)``.  The KD-tree (if used)
+        is rebuilt lazily on the next prediction.
+        """
+        X = np.atleast_2d(np.asarray(X, float))
+        Y = np.asarray(Y, float).reshape(X.shape[0], -1)
+        Xn = (X - self.xmin) / self.xrng
+        self.X = np.vstack([self.X, X])
+        self.Y = np.vstack([self.Y, Y])
+        self.Xn = np.vstack([self.Xn, Xn])
+        self._sq = np.concatenate([self._sq, np.sum(Xn ** 2, axis=1)])
+        self._tree = None
+        self._importance = None
+        if self.trend:
+            A = np.hstack([np.ones((Xn.shape[0], 1)), Xn])
+            self._AtA += A.T @ A
+            self._AtY += A.T @ Y
+            self.beta = np.linalg.lstsq(self._AtA, self._AtY, rcond=None)[0]
+            self.resid = self.Y - (self.beta[0] + self.Xn @ self.beta[1:])
+        else:
+            self.resid = self.Y
+        return self
+
+    # ------------------------------------------------------------------
+    #  Prediction
+    # ------------------------------------------------------------------
+
+    def _sqdist(self, xn: np.ndarray) -> np.ndarray:
+        """Squared distances ``(len(xn), n_samples)`` via the Gram expansion."""
+        d2 = xn @ (-2.0 * self.Xn.T)
+        d2 += np.sum(xn ** 2, axis=1)[:, None]
+        d2 += self._sq[None, :]
+        return np.maximum(d2, 0.0, out=d2)
+
+    def _neighbours(self, xn: np.ndarray, k: int):
+        """``(d2, idx)`` of the *k* nearest samples for each row of *xn*."""
+        if KDTree is not None:
+            if self._tree is None:
+                self._tree = KDTree(self.Xn)
+            d, idx = self._tree.query(xn, k=k)
+            return d ** 2, idx
+        d2 = self._sqdist(xn)
+        idx = np.argpartition(d2, k - 1, axis=1)[:, :k]
+        return np.take_along_axis(d2, idx, axis=1), idx
+
+    def _weights(self, d2: np.ndarray) -> np.ndarray:
+        w = np.maximum(d2, 1e-24)
+        if self.power == 2.0:
+            np.reciprocal(w, out=w)
+        else:
+            np.power(w, -0.5 * self.power, out=w)
+        w /= w.sum(axis=1, keepdims=True)
+        return w
+
+    def predict(self, xnew: np.ndarray) -> np.ndarray:
+        """Predict outputs for *xnew*, shape ``(n, n_y)``."""
+        xn = (np.atleast_2d(np.asarray(xnew, float)) - self.xmin) / self.xrng
+        n_s = self.Xn.shape[0]
+        k = None if self.k is None or self.k >= n_s else self.k
+        out = np.empty((xn.shape[0], self.Y.shape[1]))
+        step = max(1, self.max_block // (k or n_s))
+        for i in range(0, xn.shape[0], step):
+            q = xn[i:i + step]
+            if k is None:
+                out[i:i + step] = self._weights(self._sqdist(q)) @ self.resid
+            else:
+                d2, idx = self._neighbours(q, k)
+                out[i:i + step] = np.einsum("qk,qky->qy", self._weights(d2), self.resid[idx])
+        if self.beta is not None:
+            out += self.beta[0] + xn @ self.beta[1:]
+        return out
+
+    # ------------------------------------------------------------------
+    #  Diagnostics
+    # ------------------------------------------------------------------
+
+    def cross_validate(self, n_folds: Optional[int] = None, seed: int = 0) -> "CrossValidation":
+        """Leave-one-out (default) or k-fold cross-validated predictions.
+
+        IDW needs no training, so each held-out prediction is the usual
+        weighted average with the weights of the held-out fold set to
+        zero — one chunked pass over the sample distance matrix instead
+        of *n* refits.  With ``trend=True`` the linear trend is refit per
+        fold (LOO uses the closed-form hat-matrix correction) and the
+        residual interpolation reuses the full-data residuals.
+
+        Parameters
+        ----------
+        n_folds : int or None
+            Number of random folds; ``None`` (or ``>= n_samples``) is LOO.
+        seed : int
+            Seed for the fold assignment.
+        """
+        n = self.Xn.shape[0]
+        fold = self._folds(n, n_folds, seed)
+        loo = np.unique(fold).size == n
+
+        trend = np.zeros_like(self.Y)
+        if self.beta is not None:
+            A = np.hstack([np.ones((n, 1)), self.Xn])
+            if loo:
+                # y_i - trend_{-i}(x_i) = e_i / (1 - h_ii)
+                h = np.sum(A * (A @ np.linalg.pinv(A.T @ A)), axis=1)
+                trend = self.Y - self.resid / np.maximum(1.0 - h, 1e-12)[:, None]
+            else:
+                for f in np.unique(fold):
+                    tr = fold != f
+                    beta = np.linalg.lstsq(A[tr], self.Y[tr], rcond=None)[0]
+                    trend[~tr] = A[~tr] @ beta
+
+        k = None if self.k is None or self.k >= n - 1 else self.k
+        pred = np.empty_like(self.Y)
+        step = max(1, self.max_block // n)
+        for i in range(0, n, step):
+            d2 = self._sqdist(self.Xn[i:i + step])
+            d2[fold[i:i + step, None] == fold[None, :]] = np.inf
+            if k is None:
+                pred[i:i + step] = self._weights(d2) @ self.resid
+            else:
+                idx = np.argpartition(d2, k - 1, axis=1)[:, :k]
+                w = self._weights(np.take_along_axis(d2, idx, axis=1))
+                pred[i:i + step] = np.einsum("qk,qky->qy", w, self.resid[idx])
+        pred += trend
+        return self._cv_result(pred, fold)
+
+
+class GPSurrogate(_Surrogate):
+    """Gaussian-process regression with a squared-exponential kernel.
+
+    Inputs are min–max normalised and outputs standardised with the
+    statistics of the initial data; all outputs share one kernel.  The
+    inverse Cholesky factor ``L⁻¹`` of the kernel matrix is kept, so
+    :meth:`update` appends rows with a block update (``O(n² m)`` for *m*
+    new rows) instead of refactorising, and batch predictions are plain
+    matrix products.
+
+    Parameters
+    ----------
+    X : 2-D array (n_samples, n_x)
+    Y : 2-D array (n_samples, n_y) or 1-D array
+    length_scale : float, 1-D array (n_x,) or None
+        Kernel length scale(s) in normalised input units.  ``None`` picks
+        an isotropic value by log marginal likelihood on a grid.
+    noise : float or None
+        Noise variance relative to the (unit) signal variance.  ``None``
+        selects it on the same grid.
+    n_hyper : int
+        At most this many samples (random subset) are used for the
+        hyper-parameter grid search.
+    max_block : int
+        Bound on query × sample kernel entries held in memory at once.
+    """
+
+    def __init__(
+        self,
+        X: np.ndarray,
+        Y: np.ndarray,
+        length_scale: Any = None,
+        noise: Optional[float] = None,
+        n_hyper: int = 500,
+        max_block: int = 4_000_000,
+        seed: int = 0,
+    ):
+        self.X = np.atleast_2d(np.asarray(X, float))
+        self.Y = np.asarray(Y, float).reshape(self.X.shape[0], -1)
+        self.max_block = int(max_block)
+        self.xmin = self.X.min(0)
+        self.xrng = np.where(np.ptp(self.X, axis=0) < 1e-12, 1.0, np.ptp(self.X, axis=0))
+        self.ymean = self.Y.mean(0)
+        self.ystd = np.where(self.Y.std(0) < 1e-12, 1.0, self.Y.std(0))
+        self.Xn = (self.X - self.xmin) / self.xrng
+        Yn = (self.Y - self.ymean) / self.ystd
+
+        if length_scale is None or noise is None:
+            ls, nz = self._select_hyper(self.Xn, Yn, n_hyper, seed)
+            length_scale = ls if length_scale is None else length_scale
+            noise = nz if noise is None else noise
+        self.length_scale = np.broadcast_to(np.asarray(length_scale, float), (self.X.shape[1],)).copy()
+        self.noise = float(noise)
+
+        L = np.linalg.cholesky(self._kernel(self.Xn, self.Xn) + self.noise * np.eye(len(Yn)))
+        self.Li = np.linalg.inv(L)
+        self._v = self.Li @ Yn
+        self._finish()
+
+    def _kernel(self, A: np.ndarray, B: np.ndarray) -> np.ndarray:
+        a, b = A / self.length_scale, B / self.length_scale
+        d2 = a @ (-2.0 * b.T)
+        d2 += np.sum(a ** 2, axis=1)[:, None]
+        d2 += np.sum(b ** 2, axis=1)[None, :]
+        return np.exp(-0.5 * np.maximum(d2, 0.0, out=d2), out=d2)
+
+    def _select_hyper(self, Xn: np.ndarray, Yn: np.ndarray, n_hyper: int, seed: int):
+        """Grid search of (length scale, noise) maximising the log marginal likelihood."""
+        if len(Xn) > n_hyper:
+            idx = np.random.default_rng(seed).choice(len(Xn), n_hyper, replace=False)
+            Xn, Yn = Xn[idx], Yn[idx]
+        n, d = Xn.shape
+        best, best_lml = (1.0, 1e-4), -np.inf
+        for ls in np.geomspace(0.05, 2.0, 10) * np.sqrt(d):
+            self.length_scale = np.full(d, ls)
+            K = self._kernel(Xn, Xn)
+            for nz in (1e-6, 1e-4, 1e-2, 1e-1):
+                try:
+                    L = np.linalg.cholesky(K + nz * np.eye(n))
+                except np.linalg.LinAlgError:
+                    continue
+                v = np.linalg.solve(L, Yn)
+                lml = -0.5 * np.sum(v ** 2) - Yn.shape[1] * np.sum(np.log(np.diag(L)))
+                if lml > best_lml:
+                    best, best_lml = (ls, nz), lml
+        return best
+
+    def _finish(self) -> None:
+        self._alpha = self.Li.T @ self._v
+        self._importance = None
+
+    def update(self, X: np.ndarray, Y: np.ndarray) -> "GPSurrogate":
+        """Append samples with a block Cholesky update and return ``self``."""
+        X = np.atleast_2d(np.asarray(X, float))
+        Y = np.asarray(Y, float).reshape(X.shape[0], -1)
+        Xn = (X - self.xmin) / self.xrng
+        Yn = (Y - self.ymean) / self.ystd
+        B = self.Li @ self._kernel(self.Xn, Xn)  # (n, m) = L⁻¹ k
+        S = self._kernel(Xn, Xn) + self.noise * np.eye(len(Xn)) - B.T @ B
+        L22i = np.linalg.inv(np.linalg.cholesky(S))
+        n, m = self.Li.shape[0], len(Xn)
+        Li = np.zeros((n + m, n + m))
+        Li[:n, :n] = self.Li
+        Li[n:, :n] = -L22i @ (B.T @ self.Li)
+        Li[n:, n:] = L22i
+        self.Li = Li
+        self._v = np.vstack([self._v, L22i @ (Yn - B.T @ self._v)])
+        self.X = np.vstack([self.X, X])
+        self.Y = np.vstack([self.Y, Y])
+        self.Xn = np.vstack([self.Xn, Xn])
+        self._finish()
+        return self
+
+    def _posterior(self, xnew: np.ndarray, with_var: bool):
+        xn = (np.atleast_2d(np.asarray(xnew, float)) - self.xmin) / self.xrng
+        mean = np.empty((xn.shape[0], self.Y.shape[1]))
+        var = np.empty(xn.shape[0]) if with_var else None
+        step = max(1, self.max_block // self.Xn.shape[0])
+        for i in range(0, xn.shape[0], step):
+            Ks = self._kernel(xn[i:i + step], self.Xn)
+            mean[i:i + step] = Ks @ self._alpha
+            if with_var:
+                var[i:i + step] = 1.0 - np.sum((Ks @ self.Li.T) ** 2, axis=1)
+        mean = mean * self.ystd + self.ymean
+        if not with_var:
+            return mean, None
+        return mean, np.maximum(var, 0.0)[:, None] * self.ystd ** 2
+
+    def predict_mean_var(self, xnew: np.ndarray):
+        """Posterior mean and variance of the latent function, each ``(n, n_y)``."""
+        return self._posterior(xnew, True)
+
+    def predict(self, xnew: np.ndarray) -> np.ndarray:
+        """Posterior mean, shape ``(n, n_y)`` (skips the variance work)."""
+        return self._posterior(xnew, False)[0]
+
+    def cross_validate(self, n_folds: Optional[int] = None, seed: int = 0) -> "CrossValidation":
+        """Closed-form leave-one-out / k-fold predictions from ``K⁻¹``.
+
+        The held-out residual of fold *f* is ``(K⁻¹)_ff⁻¹ α_f`` (Rasmussen
+        & Williams §5.4.2), so no refits are needed; hyper-parameters are
+        those of the full model.
+        """
+        n = self.X.shape[0]
+        fold = self._folds(n, n_folds, seed)
+        resid = np.empty_like(self._alpha)
+        if np.unique(fold).size == n:
+            resid = self._alpha / np.sum(self.Li ** 2, axis=0)[:, None]
+        else:
+            for f in np.unique(fold):
+                idx = np.flatnonzero(fold == f)
+                Kinv_ff = self.Li[:, idx].T @ self.Li[:, idx]
+                resid[idx] = np.linalg.solve(Kinv_ff, self._alpha[idx])
+        return self._cv_result(self.Y - resid * self.ystd, fold)
+
+
+@dataclass
+class CrossValidation:
+    """Result of :meth:`IDWSurrogate.cross_validate`.
+
+    Attributes
+    ----------
+    pred : 2-D array (n_samples, n_y)
+        Held-out prediction for every training sample.
+    r2, rmse : 1-D arrays (n_y,)
+        Cross-validated R² and RMSE per output.
+    n_folds : int
+    """
+
+    pred: np.ndarray
+    r2: np.ndarray
+    rmse: np.ndarray
+    n_folds: int
+
+
+# -----------------------------------------------------------------------
+#  Permutation importance
+# -----------------------------------------------------------------------
+
+@dataclass
+class PermutationImportance:
+    """Result of :func:`permutation_importance`.
+
+    Attributes
+    ----------
+    importances : 3-D array (n_repeats, n_y, n_x)
+        Increase in MSE of each output when each input column is shuffled.
+    mean, std : 2-D arrays (n_y, n_x)
+        Mean and standard deviation over repeats.
+    ci_low, ci_high : 2-D arrays (n_y, n_x)
+        Normal-approximation confidence interval of the mean.
+    """
+
+    importances: np.ndarray
+    mean: np.ndarray
+    std: np.ndarray
+    ci_low: np.ndarray
+    ci_high: np.ndarray
+
+    def normalised(self) -> np.ndarray:
+        """Mean importance clipped at 0, rows scaled to sum 1."""
+        imp = np.clip(self.mean, 0, None)
+        row_sum = imp.sum(1, keepdims=True)
+        return imp / np.where(row_sum < 1e-12, 1.0, row_sum)
+
+
+def permutation_importance(
+    model: Any,
+    X: np.ndarray,
+    Y: np.ndarray,
+    *,
+    n_repeats: int = 5,
+    seed: int = 42,
+    n_jobs: Optional[int] = 1,
+    ci: float = 0.95,
+    max_block: int = 20_000_000,
+) -> PermutationImportance:
+    """Permutation importance of each input column for every output.
+
+    Each worker tiles *X* once into a reused buffer of as many repeats as
+    fit in its share of *max_block* values; for each variable only that column is
+    overwritten with its shuffles (and restored afterwards), and the
+    buffer is scored with one ``model.predict`` call per block of
+    repeats.  Permutations are drawn up front from *seed*, so the result
+    does not depend on *n_jobs*.
+
+    Parameters
+    ----------
+    model : object with ``predict(X) -> (n, n_y)``
+    X : 2-D array (n, n_x)
+    Y : 2-D array (n, n_y) or 1-D array
+    n_repeats : int
+        Independent permutations per variable.
+    seed : int
+        Random seed for the permutations.
+    n_jobs : int or None
+        Variables scored concurrently in a thread pool (NumPy releases the
+        GIL in the heavy array work).  ``None`` uses all CPUs.
+    ci : float
+        Confidence level of ``ci_low`` / ``ci_high``.
+    max_block : int
+        Upper bound on the values in the permuted buffers of all workers
+        together (at least one copy of *X* per worker).
+
+    Returns
+    -------
+    PermutationImportance
+    """
+    X = np.atleast_2d(np.asarray(X, float))
+    n, n_x = X.shape
+    Y = np.asarray(Y, float).reshape(n, -1)
+    R = max(1, int(n_repeats))
+    rng = np.random.default_rng(seed)
+    perms = rng.permuted(np.broadcast_to(np.arange(n), (n_x, R, n)), axis=2)
+
+    base_mse = np.mean((model.predict(X) - Y) ** 2, axis=0)
+
+    n_jobs = (os.cpu_count() or 1) if n_jobs is None else max(1, int(n_jobs))
+    groups = np.array_split(np.arange(n_x), min(n_jobs, n_x))
+    # repeats per predict call, sharing max_block between the workers
+    rb = int(np.clip(max_block // (len(groups) * n * n_x), 1, R))
+
+    def _score(cols: np.ndarray) -> np.ndarray:
+        """MSE increase ``(len(cols), R, n_y)`` for the given variables."""
+        out = np.empty((cols.size, R, Y.shape[1]))
+        buf = np.tile(X, (rb, 1))
+        for a, j in enumerate(cols):
+            for r0 in range(0, R, rb):
+                k = min(rb, R - r0)
+                buf[:k * n, j] = X[perms[j, r0:r0 + k], j].ravel()
+                pred = np.asarray(model.predict(buf[:k * n]), float).reshape(k, n, -1)
+                out[a, r0:r0 + k] = np.mean((pred - Y) ** 2, axis=1) - base_mse
+            buf[:, j] = np.tile(X[:, j], rb)
+        return out
+
+    if n_jobs == 1:
+        delta = np.concatenate([_score(g) for g in groups])
+    else:
+        with ThreadPoolExecutor(max_workers=min(n_jobs, len(groups))) as ex:
+            delta = np.concatenate(list(ex.map(_score, groups)))
+
+    imp = np.transpose(delta, (1, 2, 0))  # (R, n_y, n_x)
+    mean = imp.mean(axis=0)
+    std = imp.std(axis=0, ddof=1) if R > 1 else np.zeros_like(mean)
+    half = NormalDist().inv_cdf(0.5 + ci / 2) * std / np.sqrt(R)
+    return PermutationImportance(imp, mean, std, mean - half, mean + half)
+
+
+# -----------------------------------------------------------------------
+#  Batch Bayesian recommendation
+# -----------------------------------------------------------------------
+
+_erf = np.vectorize(math.erf, otypes=[float])
+
+
+def _expected_improvement(mu: np.ndarray, sd: np.ndarray, best: float) -> np.ndarray:
+    """Closed-form EI for minimisation."""
+    sd = np.maximum(sd, 1e-12)
+    z = (best - mu) / sd
+    cdf = 0.5 * (1.0 + _erf(z / math.sqrt(2.0)))
+    pdf = np.exp(-0.5 * z ** 2) / math.sqrt(2.0 * math.pi)
+    return (best - mu) * cdf + sd * pdf
+
+
+def _hv_improvement(samples: np.ndarray, front: np.ndarray, ref: np.ndarray) -> np.ndarray:
+    """Hypervolume gained by adding each row of *samples* to *front*."""
+    out = np.zeros(len(samples))
+    box = np.prod(np.clip(ref[None, :] - samples, 0.0, None), axis=1)
+    for i in np.flatnonzero(box > 0):
+        # HVI(y) = vol[y, ref] - HV of the front clipped to that box
+        out[i] = box[i] - hypervolume(np.maximum(front, samples[i]), ref, n_samples=4000)
+    return np.maximum(out, 0.0)
+
+
+def recommend_batch(
+    model: Any,
+    lower: np.ndarray,
+    upper: np.ndarray,
+    q: int = 4,
+    directions: Union[Sequence[str], np.ndarray, None] = None,
+    *,
+    n_candidates: int = 2000,
+    n_screen: int = 64,
+    n_mc: int = 32,
+    min_distance: float = 0.05,
+    ref_point: Optional[np.ndarray] = None,
+    seed: int = 0,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Propose *q* new input points by batch EI / EHVI.
+
+    The batch is built greedily with "kriging believer" fantasies: after
+    each pick the model (a copy) is updated with its own predicted mean
+    there, which collapses the variance around that point so the next
+    pick goes elsewhere — the usual sequential approximation to q-EI /
+    q-EHVI.  Candidates closer than *min_distance* (in min–max normalised
+    input units, scaled by ``sqrt(n_x)``) to an earlier pick are also
+    excluded.
+
+    Parameters
+    ----------
+    model : object with ``predict_mean_var`` and ``update``
+        E.g. :class:`GPSurrogate`; it is not modified.
+    lower, upper : 1-D arrays (n_x,)
+        Search bounds.
+    q : int
+        Batch size.
+    directions : sequence of {"minimize", "maximize"} or array of ±1
+        Per output; default minimise all.
+    n_candidates : int
+        Random candidates scored per pick (half uniform in the bounds,
+        half perturbations of the best observed points).
+    n_screen, n_mc : int
+        Multi-objective only: candidates passed to Monte-Carlo EHVI after
+        a cheap optimistic screen, and posterior samples per candidate.
+    min_distance : float
+        Minimum normalised spacing between picks.
+    ref_point : 1-D array or None
+        Hypervolume reference in raw output units; default is the worst
+        observed value of each output pushed out by 10 % of its range.
+    seed : int
+        Random seed.
+
+    Returns
+    -------
+    X : 2-D array (q, n_x)
+        Recommended inputs, in pick order.
+    acq : 1-D array (q,)
+        Acquisition value (EI or EHVI) of each pick when it was chosen.
+    mean, std : 2-D arrays (q, n_y)
+        Model prediction at the picks (before any fantasy update).
+    """
+    if not (hasattr(model, "predict_mean_var") and hasattr(model, "update")):
+        raise TypeError("recommend_batch needs a model with predictive variance, e.g. GPSurrogate")
+    rng = np.random.default_rng(seed)
+    lo = np.asarray(lower, float)
+    hi = np.asarray(upper, float)
+    n_x = lo.size
+    n_y = model.Y.shape[1]
+    if directions is None:
+        sign = np.ones(n_y)
+    elif isinstance(directions[0], str):
+        sign = np.array([1.0 if d == "minimize" else -1.0 for d in directions])
+    else:
+        sign = np.asarray(directions, float)
+    span = np.where(hi - lo > 0, hi - lo, 1.0)
+
+    F = model.Y * sign  # observed, internal minimisation
+    if n_y == 1:
+        best = float(F.min())
+        elite = model.X[np.argsort(F[:, 0])[:10]]
+    else:
+        nd = fast_nondominated_sort(F)[0]
+        front, elite = F[nd], model.X[nd]
+        if ref_point is None:
+            r = np.ptp(F, axis=0)
+            ref = F.max(axis=0) + 0.1 * np.where(r > 0, r, 1.0)
+        else:
+            ref = np.asarray(ref_point, float) * sign
+
+    fantasy = copy.deepcopy(model)
+    picks, acqs = [], []
+    for _ in range(q):
+        n_u = n_candidates // 2
+        cand = np.vstack([
+            rng.uniform(lo, hi, (n_u, n_x)),
+            np.clip(elite[rng.integers(0, len(elite), n_candidates - n_u)]
+                    + rng.normal(0.0, 0.05, (n_candidates - n_u, n_x)) * span, lo, hi),
+        ])
+        if picks:
+            P = np.asarray(picks)
+            d = np.sqrt(np.sum(((cand[:, None, :] - P[None]) / span) ** 2, axis=2)).min(axis=1)
+            cand = cand[d >= min_distance * np.sqrt(n_x)]
+            if len(cand) == 0:
+                break
+        mu, var = fantasy.predict_mean_var(cand)
+        mu, sd = mu * sign, np.sqrt(var)
+        if n_y == 1:
+            acq = _expected_improvement(mu[:, 0], sd[:, 0], best)
+            k = int(np.argmax(acq))
+            a = float(acq[k])
+        else:
+            # optimistic screen (lower confidence bound), then MC-EHVI
+            lcb = mu - 2.0 * sd
+            rank = np.empty(len(lcb), int)
+            for r_, fr in enumerate(fast_nondominated_sort(lcb)):
+                rank[fr] = r_
+            screen = np.lexsort((lcb.sum(axis=1), rank))[:n_screen]
+            z = rng.standard_normal((n_mc, 1, n_y))
+            ehvi = np.array([
+                _hv_improvement(mu[i] + sd[i] * z[:, 0], front, ref).mean() for i in screen
+            ])
+            j = int(np.argmax(ehvi))
+            k, a = int(screen[j]), float(ehvi[j])
+        picks.append(cand[k])
+        acqs.append(a)
+        fantasy.update(cand[k][None], fantasy.predict(cand[k][None]))
+
+    X = np.asarray(picks).reshape(-1, n_x)
+    mean, var = model.predict_mean_var(X)
+    return X, np.asarray(acqs), mean, np.sqrt(var)
+
+
+# -----------------------------------------------------------------------
+#  Streaming batch prediction
+# -----------------------------------------------------------------------
+
+def predict_csv(
+    model: Any,
+    src: str,
+    dst: str,
+    x_cols: Sequence[str],
+    y_names: Optional[Sequence[str]] = None,
+    *,
+    chunk_size: int = 100_000,
+    progress: Optional[Callable[[int], None]] = None,
+    stop_event: Any = None,
+) -> int:
+    """Append ``<y>(pred)`` columns to a CSV, streaming it in chunks.
+
+    Only *chunk_size* rows are held in memory at once; each chunk goes
+    through one vectorised ``model.predict`` call and is appended to a
+    temporary file that replaces *dst* when the pass completes, so an
+    interrupted run never leaves a truncated result behind.
+
+    Parameters
+    ----------
+    model : object with ``predict``
+        Surrogate; ``predict`` maps ``(n, n_x)`` to ``(n, n_y)``.
+    src, dst : str
+        Input and output CSV paths.
+    x_cols : sequence of str
+        Input columns, in model order.
+    y_names : sequence of str or None
+        Output names; default ``y0, y1, ...``.
+    chunk_size : int
+        Rows per chunk.
+    progress : callable or None
+        Called with the running row count after each chunk.
+    stop_event : threading.Event or None
+        When set, the pass is abandoned after the current chunk: the
+        temporary file is removed, *dst* is left untouched and 0 is
+        returned.
+
+    Returns
+    -------
+    int
+        Number of rows written.
+
+    Raises
+    ------
+    KeyError
+        If *src* lacks any of *x_cols*.
+    """
+    x_cols = list(x_cols)
+    cols = pd.read_csv(src, nrows=0).columns
+    miss = [c for c in x_cols if c not in cols]
+    if miss:
+        raise KeyError(f"Missing columns: {miss}")
+    tmp = dst + ".tmp"
+    n = 0
+    try:
+        for chunk in pd.read_csv(src, chunksize=chunk_size):
+            if stop_event is not None and stop_event.is_set():
+                return 0
+            Yp = np.asarray(model.predict(chunk[x_cols].to_numpy(float)))
+            names = y_names or [f"y{j}" for j in range(Yp.shape[1])]
+            for j, yn in enumerate(names):
+                chunk[f"{yn}(pred)"] = Yp[:, j]
+            chunk.to_csv(tmp, mode="w" if n == 0 else "a", header=n == 0, index=False)
+            n += len(chunk)
+            if progress is not None:
+                progress(n)
+        if n == 0:
+            pd.DataFrame(columns=list(cols) + [f"{yn}(pred)" for yn in (y_names or [])]).to_csv(tmp, index=False)
+        os.replace(tmp, dst)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return n
@@ -7,19 +7,29 @@ combines Optuna (Bayesian) warm-start with particle-swarm optimisation.
 
 from __future__ import annotations
 
+import dataclasses
+import datetime
+import os
 import re
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
 
-from xross.core import parratt
+from xross.core import parratt, parratt_batch
+from xross.optimize import _optuna_ask_tell
 
 __all__ = [
     "load_xrdml",
     "peak_preserving_downsample",
     "expand_stack",
+    "expand_stack_batch",
     "normalize_periodicity",
     "fit_xrr_residual",
+    "fit_xrr_residual_batch",
+    "XRRObjective",
+    "fidelity_subsets",
+    "create_warm_start_study",
+    "optuna_warm_start",
 ]
 
 
@@ -213,6 +223,41 @@ def expand_stack(
     )
 
 
+def expand_stack_batch(
+    base_n: np.ndarray,
+    base_k: np.ndarray,
+    base_t: np.ndarray,
+    base_s: np.ndarray,
+    blocks: List[Tuple[str, int, int, int]],
+    substrate: Dict[str, float],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Population version of :func:`expand_stack`.
+
+    The base arrays have shape ``(n_pop, n_base)``; the returned arrays
+    have shape ``(n_pop, n_full)`` with vacuum and substrate columns.
+    """
+    idx: List[int] = []
+    for kind, i0, i1, rep in blocks:
+        idx += list(range(i0, i1)) * rep
+    idx_arr = np.asarray(idx, dtype=int)
+
+    def _full(base: np.ndarray, top: float, bottom: float) -> np.ndarray:
+        base = np.atleast_2d(np.asarray(base, float))
+        n_pop = base.shape[0]
+        return np.hstack([
+            np.full((n_pop, 1), top),
+            base[:, idx_arr],
+            np.full((n_pop, 1), bottom),
+        ])
+
+    return (
+        _full(base_n, 1.0, substrate["n"]),
+        _full(base_k, 0.0, substrate["k"]),
+        _full(base_t, 0.0, 0.0),
+        _full(base_s, 0.0, substrate["s"]),
+    )
+
+
 def normalize_periodicity(
     t_base: np.ndarray,
     blocks: List[Tuple[str, int, int, int]],
@@ -271,3 +316,312 @@ def fit_xrr_residual(
     w = weights if weights is not None else np.ones_like(r)
     chi2 = float(np.mean(r * r * w))
     return chi2, y_calc
+
+
+def fit_xrr_residual_batch(
+    theta: np.ndarray,
+    y_exp: np.ndarray,
+    n_arr: np.ndarray,
+    k_arr: np.ndarray,
+    d_arr: np.ndarray,
+    s_arr: np.ndarray,
+    wavelength_nm: float,
+    weights: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Population-batched version of :func:`fit_xrr_residual`.
+
+    The layer arrays have shape ``(n_pop, N_layers)``.
+
+    Returns
+    -------
+    chi2 : 1-D array (n_pop,)
+    y_calc : 2-D array (n_pop, n_angles)
+    """
+    y_sim = parratt_batch(theta, n_arr, k_arr, d_arr, s_arr, wavelength_nm)
+    y_sim = np.maximum(y_sim, 1e-18)
+    y_exp_c = np.maximum(np.asarray(y_exp, float), 1e-18)[None, :]
+    scale = np.exp(np.mean(np.log(y_exp_c) - np.log(y_sim), axis=1))
+    y_calc = y_sim * scale[:, None]
+    r = np.log10(y_exp_c) - np.log10(y_calc)
+    w = weights if weights is not None else np.ones(r.shape[1])
+    chi2 = np.mean(r * r * np.asarray(w, float)[None, :], axis=1)
+    return chi2, y_calc
+
+
+@dataclasses.dataclass
+class XRRObjective:
+    """Picklable, population-batched chi² objective for XRR curve fitting.
+
+    Decision vectors are laid out per base layer as
+
+    * ``mode="density"`` — ``[t | s | rho]`` with ``n = 1 - 2.7e-6·rho``
+      and ``k = 0``;
+    * ``mode="nk"`` — ``[n | k]`` with thickness and roughness fixed to
+      *base_t* / *base_s*.
+
+    Instances can be sent to worker processes (e.g. :func:`xross.optimize.pso_islands`).
+
+    Attributes
+    ----------
+    theta, y_exp : 1-D arrays
+        Measured curve (angles in degrees).
+    weights : 1-D array or None
+        Per-point weights of the log-residual.
+    blocks : list of (kind, i0, i1, repeat)
+    substrate : dict with ``"n"``, ``"k"``, ``"s"``
+    wavelength_nm : float
+    mode : ``"density"`` or ``"nk"``
+    base_t, base_s : 1-D arrays or None
+        Fixed thickness / roughness for ``mode="nk"``.
+    d_targets : list of float or None
+        Repeat-block periods enforced with :func:`normalize_periodicity`.
+    fixed_t : 1-D bool array or None
+        Thickness freeze mask used by the periodicity rescaling.
+    chunk : int
+        Rows evaluated per batched Parratt call (bounds memory).
+    """
+
+    theta: np.ndarray
+    y_exp: np.ndarray
+    weights: Optional[np.ndarray]
+    blocks: List[Tuple[str, int, int, int]]
+    substrate: Dict[str, float]
+    wavelength_nm: float
+    mode: str = "density"
+    base_t: Optional[np.ndarray] = None
+    base_s: Optional[np.ndarray] = None
+    d_targets: Optional[List[float]] = None
+    fixed_t: Optional[np.ndarray] = None
+    chunk: int = 32
+
+    def subset(self, idx: np.ndarray) -> "XRRObjective":
+        """Copy restricted to the scan points *idx* (for multi-fidelity stages)."""
+        w = None if self.weights is None else np.asarray(self.weights)[idx]
+        return dataclasses.replace(
+            self, theta=np.asarray(self.theta)[idx],
+            y_exp=np.asarray(self.y_exp)[idx], weights=w,
+        )
+
+    def project(self, X: np.ndarray) -> np.ndarray:
+        """Apply the repeat-block period constraint to the thickness columns."""
+        if not self.d_targets or self.mode != "density":
+            return X
+        nl = X.shape[1] // 3
+        X[:, :nl] = np.array([
+            normalize_periodicity(t, self.blocks, self.d_targets, self.fixed_t)
+            for t in X[:, :nl]
+        ])
+        return X
+
+    def stack(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Expanded ``(n, k, d, sigma)`` arrays of shape ``(n_pop, n_full)``."""
+        X = np.atleast_2d(np.asarray(X, float))
+        m = X.shape[0]
+        if self.mode == "density":
+            nl = X.shape[1] // 3
+            tb, sb, rb = X[:, :nl], X[:, nl:2 * nl], X[:, 2 * nl:]
+            if self.d_targets:
+                tb = self.project(X.copy())[:, :nl]
+            return expand_stack_batch(1 - 2.7e-6 * rb, np.zeros_like(rb), tb, sb,
+                                      self.blocks, self.substrate)
+        if self.mode == "nk":
+            nl = X.shape[1] // 2
+            return expand_stack_batch(X[:, :nl], X[:, nl:],
+                                      np.tile(self.base_t, (m, 1)), np.tile(self.base_s, (m, 1)),
+                                      self.blocks, self.substrate)
+        raise ValueError(f"Unknown mode: {self.mode!r}")
+
+    def curves(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(chi2, y_calc)`` for every row of *X*."""
+        X = np.atleast_2d(np.asarray(X, float))
+        chi, yc = [], []
+        for i0 in range(0, X.shape[0], max(1, int(self.chunk))):
+            c, y = fit_xrr_residual_batch(
+                self.theta, self.y_exp, *self.stack(X[i0:i0 + self.chunk]),
+                self.wavelength_nm, self.weights,
+            )
+            chi.append(c)
+            yc.append(y)
+        return np.concatenate(chi), np.vstack(yc)
+
+    def __call__(self, X: np.ndarray) -> np.ndarray:
+        return self.curves(X)[0]
+
+
+# -----------------------------------------------------------------------
+#  Optuna warm start
+# -----------------------------------------------------------------------
+
+def fidelity_subsets(n_points: int, n_stages: int = 3, min_points: int = 40) -> List[np.ndarray]:
+    """Nested index subsets of a scan for multi-fidelity evaluation.
+
+    Stage *k* takes every ``2**(n_stages-1-k)``-th point, so the first
+    stage is the coarsest and the last stage is the full scan.  Stages
+    with fewer than *min_points* points are dropped.
+
+    Returns
+    -------
+    list of 1-D int arrays, coarse to fine.
+    """
+    full = np.arange(n_points, dtype=int)
+    out: List[np.ndarray] = []
+    for k in range(max(1, int(n_stages)) - 1):
+        idx = full[:: 2 ** (n_stages - 1 - k)]
+        if idx.size >= min_points:
+            out.append(idx)
+    out.append(full)
+    return out
+
+
+def create_warm_start_study(
+    storage: str = "memory",
+    *,
+    directory: Optional[str] = None,
+    study_name: Optional[str] = None,
+    sampler: Any = None,
+    pruner: Any = None,
+) -> Any:
+    """Create a fresh Optuna study for one warm-start run.
+
+    Parameters
+    ----------
+    storage : ``"memory"`` or ``"journal"``
+        ``"memory"`` keeps all trials in RAM (no file I/O in the loop).
+        ``"journal"`` appends to ``<directory>/<study_name>.journal`` —
+        one small append-only log per run instead of a shared database.
+    directory : str or None
+        Target directory for the journal file (required for ``"journal"``).
+    study_name : str or None
+        Defaults to ``xrr_<timestamp>`` so separate fits never mix.
+    sampler, pruner : optuna objects or None
+
+    Returns
+    -------
+    optuna.Study
+    """
+    import optuna
+
+    if study_name is None:
+        study_name = "xrr_" + datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    if storage == "memory":
+        backend = None
+    elif storage == "journal":
+        if not directory:
+            raise ValueError("directory is required for journal storage")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{study_name}.journal")
+        try:
+            from optuna.storages.journal import JournalFileBackend
+        except ImportError:  # optuna < 4.0
+            from optuna.storages import JournalFileStorage as JournalFileBackend
+        backend = optuna.storages.JournalStorage(JournalFileBackend(path))
+    else:
+        raise ValueError(f"Unknown storage mode: {storage!r}")
+    return optuna.create_study(
+        direction="minimize", sampler=sampler, pruner=pruner,
+        storage=backend, study_name=study_name,
+    )
+
+
+def optuna_warm_start(
+    evaluate_batch: Union[Callable[[np.ndarray], np.ndarray],
+                          Sequence[Callable[[np.ndarray], np.ndarray]]],
+    lower: np.ndarray,
+    upper: np.ndarray,
+    *,
+    n_trials: int = 60,
+    batch_size: int = 8,
+    n_jobs: int = 1,
+    names: Optional[Sequence[str]] = None,
+    sampler: Any = None,
+    study: Any = None,
+    stop_event: Any = None,
+    snapshot_path: Optional[str] = None,
+    snapshot_every: int = 5,
+) -> Tuple[np.ndarray, float, Any]:
+    """Batched Optuna ask/tell search used as the XRR warm start.
+
+    Trials are requested *batch_size* at a time, evaluated with a single
+    population call to *evaluate_batch* and told back to the study.
+    Parameters with ``lower == upper`` are held fixed and not sampled.
+
+    When *evaluate_batch* is a sequence of callables (coarse to full
+    fidelity, e.g. built from :func:`fidelity_subsets`), each stage value
+    is reported as an intermediate value and the study's pruner decides
+    which trials continue to the next, more expensive stage.
+
+    Parameters
+    ----------
+    evaluate_batch : callable (X) -> chi2, or sequence of them
+        Maps ``(n_batch, n_var)`` to ``(n_batch,)`` objective values.
+    lower, upper : 1-D arrays (n_var,)
+        Search bounds.
+    n_trials : int
+        Total number of trials.
+    batch_size : int
+        Trials asked per round.
+    n_jobs : int
+        If > 1, each batch is split into *n_jobs* chunks evaluated in a
+        thread pool (the numpy kernels release the GIL).
+    names : sequence of str or None
+        Optuna parameter names (default ``x0, x1, ...``).
+    sampler, study : optuna objects or None
+        Custom sampler, or an existing study to continue.
+    stop_event : threading.Event or None
+        Stops after the current batch when set.
+    snapshot_path : str or None
+        If given, the parameter vectors and full-fidelity values of the
+        completed (finite) trials are written as compact arrays (``.npz`` with keys ``x``, ``y``,
+        ``names``) every *snapshot_every* batches and at the end, instead
+        of per-trial JSON attributes.
+    snapshot_every : int
+        Snapshot interval in batches.
+
+    Returns
+    -------
+    best_x : 1-D array (n_var,)
+    best_value : float
+        Best full-fidelity value (``inf`` if no trial completed).
+    study : optuna.Study
+    """
+    import optuna
+
+    stages = list(evaluate_batch) if isinstance(evaluate_batch, (list, tuple)) else [evaluate_batch]
+    lo = np.asarray(lower, float)
+    n_var = lo.size
+    names = list(names) if names is not None else [f"x{i}" for i in range(n_var)]
+    if study is None:
+        study = optuna.create_study(direction="minimize", sampler=sampler)
+
+    hist_x: List[np.ndarray] = []
+    hist_y: List[np.ndarray] = []
+    best_x, best_val = lo.copy(), np.inf
+    n_batch = 0
+
+    def _snapshot() -> None:
+        if snapshot_path is None:
+            return
+        np.savez_compressed(
+            snapshot_path,
+            x=np.vstack(hist_x) if hist_x else np.empty((0, n_var)),
+            y=np.concatenate(hist_y) if hist_y else np.empty(0),
+            names=np.asarray(names),
+        )
+
+    def _on_batch(X: np.ndarray, Y: np.ndarray, ok: np.ndarray) -> None:
+        nonlocal best_x, best_val, n_batch
+        if ok.size:  # failed and pruned trials are not warm-start material
+            vals = Y[ok, 0]
+            hist_x.append(X[ok])
+            hist_y.append(vals)
+            i = int(np.argmin(vals))
+            if vals[i] < best_val:
+                best_x, best_val = X[ok[i]].copy(), float(vals[i])
+        n_batch += 1
+        if n_batch % max(1, int(snapshot_every)) == 0:
+            _snapshot()
+
+    _optuna_ask_tell(study, stages, lo, upper, names, n_trials=n_trials, batch_size=batch_size,
+                     n_jobs=n_jobs, stop_event=stop_event, on_batch=_on_batch)
+    _snapshot()
+    return best_x, best_val, study